@@ -0,0 +1,171 @@
+"""
+Benchmark reader backend (openpyxl vs calamine vs stream) pada source file ARGO dan RAFM.
+
+Kernel dijalankan serial di proses ini (tanpa pool) supaya yang diukur murni waktu
+baca + parse per file. Hasil penjumlahan tiap backend dibandingkan dengan openpyxl.
+Untuk backend 'stream' ditampilkan juga pembagian waktu inflate / parse / wait.
+
+Mode --formulas: ukuran dan waktu tulis sheet Checking Summary (writer headless, streaming)
+dengan formula per sel vs satu shared formula per blok, untuk trad / ul / reas.
+
+Usage: python run_benchmark.py "<input excel>" [--repeat=N] [--limit=N]
+       python run_benchmark.py --formulas [--rows=N] [--repeat=N]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from syntax.readers import calamine_available, phase_totals, source_base_name
+
+
+def _close(a, b, tol=1e-6):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b) <= tol * max(1.0, abs(a), abs(b))
+    return a == b
+
+
+def _diff(base, other):
+    """Jumlah nilai yang berbeda antara dua hasil kernel (dict atau tuple dict)"""
+    if isinstance(base, tuple) or isinstance(other, tuple):
+        if base is None or other is None:
+            return 0 if base is other else 1
+        return sum(_diff(b, o) for b, o in zip(base, other))
+    keys = set(base or {}) | set(other or {})
+    return sum(1 for k in keys if not _close((base or {}).get(k), (other or {}).get(k)))
+
+
+def build_tasks(input_excel, limit=None):
+    """Task kernel ARGO dan RAFM persis seperti yang dikirim main jenis ke worker"""
+    from syntax.run_config import load_run_config
+    from syntax.kernels import process_argo_file, process_extraction_file, process_reas_rafm_file
+    from syntax import control_4_trad as trad, control_4_ul as ul, control_4_reas as reas
+
+    config = load_run_config(input_excel)
+    module = {'trad': trad, 'ul': ul, 'reas': reas}[config.jenis]
+
+    tasks = {'argo': [], 'rafm': []}
+    for f in config.source_files('argo')[:limit]:
+        tasks['argo'].append((process_argo_file, {'file_path': f, 'columns': module.columns_to_sum_argo,
+                                                  'layout': None}))
+
+    for f in config.source_files('rafm')[:limit]:
+        file_name = source_base_name(f)
+        if config.jenis == 'reas':
+            tasks['rafm'].append((process_reas_rafm_file, {
+                'file_path': f, 'file_name': file_name, 'columns': module.columns_to_sum_rafm,
+                'sheets': module.target_sheets, 'layout': None}))
+            continue
+        if config.jenis == 'trad':
+            spec = module.build_filter_spec(config.filter_rafm, file_name, 'RAFM')
+            groups = (('speed', module.columns_to_sum_rafm), ('nonneg', module.additional_columns),
+                      ('sar', module.c_sar))
+        else:
+            spec = module.build_filter_spec(config.filter_rafm, file_name)
+            groups = (('speed', module.columns_to_sum_rafm), ('nonneg', module.additional_columns))
+        if spec is None:
+            continue
+        tasks['rafm'].append((process_extraction_file, {
+            'file_path': f, 'file_name': file_name, 'spec': spec, 'groups': groups,
+            'sheets': module.target_sheets, 'layout': None}))
+    return config.jenis, tasks
+
+
+def run_backend(tasks, backend, repeat=1):
+    """Returns: (detik terbaik dari repeat, list hasil kernel tanpa statistik scan)"""
+    best, results = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        results = [fn({**args, 'reader': backend})[0] for fn, args in tasks]
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main(input_excel, repeat=1, limit=None):
+    backends = ['openpyxl', 'stream'] + (['calamine'] if calamine_available() else [])
+    if 'calamine' not in backends:
+        print("⚠️ python-calamine tidak terpasang, hanya openpyxl yang diukur")
+
+    jenis, tasks = build_tasks(input_excel, limit)
+    print(f"📊 Benchmark reader: {os.path.basename(input_excel)} ({jenis.upper()}), repeat={repeat}\n")
+    print(f"{'source':<8}{'files':>6}{'backend':>12}{'detik':>10}{'file/s':>9}{'speedup':>9}{'selisih':>9}")
+
+    for source, source_tasks in tasks.items():
+        if not source_tasks:
+            continue
+        base_seconds, base_results = None, None
+        for backend in backends:
+            phase_totals(reset=True)
+            seconds, results = run_backend(source_tasks, backend, repeat)
+            phases = phase_totals()
+            if base_results is None:
+                base_seconds, base_results = seconds, results
+            mismatches = sum(_diff(b, r) for b, r in zip(base_results, results))
+            rate = len(source_tasks) / seconds if seconds else 0.0
+            speedup = base_seconds / seconds if seconds else 0.0
+            print(f"{source:<8}{len(source_tasks):>6}{backend:>12}{seconds:>10.2f}{rate:>9.1f}"
+                  f"{speedup:>8.1f}x{mismatches:>9}")
+            if phases['files']:
+                print(f"{'':<26}inflate {phases['inflate']:.2f} | parse {phases['parse']:.2f} | "
+                      f"wait {phases['wait']:.2f} detik (total {repeat} repeat, thread inflate overlap)")
+    print("\nselisih = jumlah nilai yang berbeda dari hasil openpyxl (harus 0)")
+
+
+def formula_benchmark(rows=5000, repeat=1, measures=20):
+    """Checking Summary sintetis per jenis ditulis dengan FORMULA_MODES, ukuran + waktu"""
+    import zipfile
+
+    import numpy as np
+    import pandas as pd
+    from openpyxl import Workbook
+
+    from syntax.main import SHEET_ORDER
+    from syntax.xlsx_writer import CHECKING_SUMMARY_OFFSETS, FORMULA_MODES, write_workbook
+
+    folder = tempfile.mkdtemp(prefix='control4_formula_bench_')
+    manual = os.path.join(folder, 'manual.xlsx')
+    Workbook().save(manual)
+    print(f"📊 Benchmark formula Checking Summary: {rows} baris x {measures} measure, repeat={repeat}\n")
+    print(f"{'jenis':<6}{'mode':>8}{'sel formula':>13}{'XML sheet':>12}{'file':>11}{'detik':>9}{'speedup':>9}")
+
+    rng = np.random.default_rng(0)
+    for jenis, sheet in (('trad', 'Checking Summary AZTRAD'), ('ul', 'Checking Summary AZUL'),
+                         ('reas', 'Checking Summary REAS')):
+        name_cols = CHECKING_SUMMARY_OFFSETS[jenis][0] - 1
+        df = pd.DataFrame(rng.normal(0, 1e6, (rows, measures)), columns=[f"m{i}" for i in range(measures)])
+        for i, col in enumerate(['No', 'ARGO File Name', 'RAFM File Name', 'UVSG File Name'][:name_cols]):
+            df.insert(i, col, np.arange(1, rows + 1) if col == 'No' else [f"{col[:4]}_{n}" for n in range(rows)])
+
+        base = None
+        for mode in FORMULA_MODES:
+            output = os.path.join(folder, f"{jenis}_{mode}.xlsx")
+            best = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                write_workbook(manual, {sheet: df}, output, jenis, SHEET_ORDER[jenis], streaming=True,
+                               formula_mode=mode)
+                elapsed = time.perf_counter() - t0
+                best = elapsed if best is None else min(best, elapsed)
+            with zipfile.ZipFile(output) as z:
+                part = max((i for i in z.infolist() if i.filename.startswith('xl/worksheets/')),
+                           key=lambda i: i.file_size)
+                xml = z.read(part.filename)
+            formula_cells = xml.count(b'<f')
+            base = base or best
+            print(f"{jenis:<6}{mode:>8}{formula_cells:>13}{part.file_size / 1e6:>10.2f}MB"
+                  f"{os.path.getsize(output) / 1e6:>9.2f}MB{best:>9.2f}{base / best:>8.1f}x")
+    print(f"\nOutput benchmark: {folder}")
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    if '--formulas' in sys.argv[1:]:
+        formula_benchmark(rows=int(options.get('rows', 5000)), repeat=int(options.get('repeat', 1)))
+        sys.exit(0)
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    main(args[0], repeat=int(options.get('repeat', 1)),
+         limit=int(options['limit']) if 'limit' in options else None)
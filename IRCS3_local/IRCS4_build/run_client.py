@@ -0,0 +1,48 @@
+"""
+Pengganti run_program.py saat server lokal (run_server.py) sudah jalan: job dikirim ke
+server yang worker dan cache-nya sudah warm, jadi tidak ada biaya start / import.
+
+Usage: python run_client.py [input_file_or_folder] [--only=...] [--select=...] [--period=...] [--pipeline]
+       [--no-history] [--retry-failed] [--writer=xlwings|headless|streaming] [--no-incremental]
+       [--formulas=cell|shared]
+       python run_client.py --status | --shutdown
+"""
+import sys
+import time
+import datetime
+
+from syntax.client import DEFAULT_PORT, shutdown, status, submit
+
+input_path = r"P:\13. Employee Folder\Christo\control 4\Q3 25\input excel\input trad con.xlsx"
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    port = int(options.pop('port', DEFAULT_PORT))
+
+    if '--status' in argv:
+        info = status(port)
+        print(info if info is not None else "❌ Server tidak jalan")
+        sys.exit(0 if info is not None else 1)
+    if '--shutdown' in argv:
+        print("👋 Server dihentikan" if shutdown(port) else "❌ Server tidak jalan")
+        sys.exit(0)
+
+    start = time.time()
+    job = {k: options[k] for k in ('only', 'select', 'preflight', 'period', 'writer') if k in options}
+    if '--pipeline' in argv:
+        job['pipeline'] = True
+    if '--no-history' in argv:
+        job['history'] = False
+    if '--retry-failed' in argv:
+        job['retry_failed'] = True
+    if '--no-incremental' in argv:
+        job['incremental'] = False
+    if 'formulas' in options:
+        job['formula_mode'] = options['formulas']
+    outputs = submit(args[0] if args else input_path, port=port, **job)
+    elapsed = time.time() - start
+    formatted = str(datetime.timedelta(seconds=int(elapsed)))
+    print(f"\n⏱️ Total runtime: {formatted}")
+    sys.exit(0 if outputs else 1)
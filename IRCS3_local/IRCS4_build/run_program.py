@@ -1,4 +1,3 @@
-from syntax.main import main
 import time
 import datetime
 
@@ -7,6 +6,10 @@ input_path = r"P:\13. Employee Folder\Christo\control 4\Q3 25\input excel\input
 if __name__ == "__main__":
     print("🚀 Starting program...")
     start = time.time()
+    # Import di sini, bukan di top-level: worker yang di-spawn menjalankan ulang modul ini
+    # sebagai __mp_main__ dan tidak perlu ikut memuat pandas / control_4_*
+    from syntax.main import main
+    print(f"📦 Import syntax.main: {time.time() - start:.2f} detik")
     main(input_path)
     elapsed = time.time() - start
     formatted = str(datetime.timedelta(seconds=int(elapsed)))
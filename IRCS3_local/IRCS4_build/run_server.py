@@ -0,0 +1,17 @@
+"""
+Start server lokal Control 4: worker pool dan cache tetap warm antar run.
+Job dikirim dengan run_client.py.
+
+Usage: python run_server.py [--workers=N] [--reader=openpyxl|calamine|stream|auto] [--port=N]
+"""
+import sys
+
+if __name__ == "__main__":
+    # Import di sini, bukan di top-level: worker yang di-spawn menjalankan ulang modul ini
+    # sebagai __mp_main__ dan tidak perlu ikut memuat pandas / control_4_*
+    from syntax.client import DEFAULT_PORT
+    from syntax.server import serve
+    options = dict(a[2:].split('=', 1) for a in sys.argv[1:] if a.startswith('--') and '=' in a)
+    serve(port=int(options.get('port', DEFAULT_PORT)),
+          max_workers=int(options['workers']) if 'workers' in options else None,
+          reader=options.get('reader', 'openpyxl'))
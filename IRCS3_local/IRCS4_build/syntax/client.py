@@ -0,0 +1,77 @@
+"""
+Client tipis untuk server lokal (syntax/server.py).
+
+Hanya memakai standard library, jadi start dalam hitungan milidetik: tidak ada import
+pandas / openpyxl dan tidak ada pool worker di sisi client.
+"""
+import json
+import os
+import urllib.error
+import urllib.request
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = int(os.environ.get('CONTROL4_PORT', 8754))
+
+
+def _url(port, path):
+    return f"http://{DEFAULT_HOST}:{port}{path}"
+
+
+def _request(port, path, payload=None, timeout=None):
+    data = None if payload is None else json.dumps(payload).encode('utf-8')
+    req = urllib.request.Request(_url(port, path), data=data,
+                                 headers={'Content-Type': 'application/json'})
+    return urllib.request.urlopen(req, timeout=timeout)
+
+
+def submit(input_path, port=DEFAULT_PORT, **options):
+    """
+    Jalankan input workbook di server dan print progress-nya selagi berjalan.
+    options: argumen main (only, select, pipeline, preflight, ...).
+
+    Returns:
+        list path output file, atau None jika server tidak bisa dihubungi / job ditolak
+    """
+    payload = {'input': os.path.abspath(input_path), **options}
+    try:
+        resp = _request(port, '/run', payload)
+    except urllib.error.HTTPError as e:
+        print(f"❌ Job ditolak server: {e.read().decode('utf-8', 'replace')}")
+        return None
+    except urllib.error.URLError as e:
+        print(f"❌ Server tidak bisa dihubungi di {_url(port, '')} ({e.reason}); "
+              f"jalankan dulu: python run_server.py")
+        return None
+
+    outputs = None
+    with resp:
+        for raw in resp:
+            event = json.loads(raw)
+            if event['event'] == 'log':
+                print(event['line'])
+            elif event['event'] == 'done':
+                outputs = event['outputs']
+                if event.get('error'):
+                    print(f"❌ Job gagal: {event['error']}")
+                print(f"📡 Server: job selesai dalam {event['seconds']:.2f} detik, "
+                      f"{len(outputs)} output file")
+                for path in outputs:
+                    print(f"   📄 {path}")
+    return outputs
+
+
+def status(port=DEFAULT_PORT):
+    """Status server (dict) atau None jika server tidak jalan"""
+    try:
+        with _request(port, '/status', timeout=5) as resp:
+            return json.loads(resp.read())
+    except urllib.error.URLError:
+        return None
+
+
+def shutdown(port=DEFAULT_PORT):
+    try:
+        _request(port, '/shutdown', {}, timeout=5).close()
+        return True
+    except urllib.error.URLError:
+        return False
@@ -1,11 +1,18 @@
+import numpy as np
 import pandas as pd
-import glob
 import os
-from concurrent.futures import ProcessPoolExecutor
+from syntax.scheduler import run_file_tasks
+from syntax.run_config import load_run_config
+from syntax.preflight import SourceSpec, run_preflight
+from syntax.stages import StageGraph
 import re
-from openpyxl import load_workbook
+from syntax.readers import source_base_name
+from syntax.result_cache import mark_reuse, select_specs
+from syntax.goc_filter import compile_filter
+from syntax.kernels import process_argo_file, process_extraction_file
+from syntax.schema import (SCAN_STATS_SHEET, FrameSchema, empty_totals, fill_totals, scan_statistics_frame,
+                           totals_frame)
 from itertools import zip_longest
-import traceback
 
 columns_to_sum_argo = [
     'prm_inc','lrc_cl_ins','lrc_cl_inv','r_exp_m','r_acq_cost',
@@ -41,110 +48,16 @@ additional_columns = ['cov_units', 'pv_r_exp_m', 'pv_surr']
 c_sar = ['c_sar']
 additional_columns_uvsg = ['cov_units', 'pv_r_exp_m', 'pv_surr']
 u_sar = ['u_sar']
+nattr_exp = ['nattr_exp_acq', 'nattr_exp_inv', 'nattr_exp_maint']
+ARGO_SCHEMA = FrameSchema('ARGO totals', tuple(columns_to_sum_argo))
+RAFM_SCHEMA = FrameSchema('RAFM totals', tuple(columns_to_sum_rafm + additional_columns + c_sar))
+UVSG_SCHEMA = FrameSchema('UVSG totals', tuple(columns_to_sum_uvsg + additional_columns_uvsg + u_sar))
 target_sheets = ['extraction_IDR', 'extraction_USD']
+# Header kembar di sheet RAFM: kolom terakhir yang dipakai (UVSG: kolom pertama)
+RAFM_DUPLICATES = 'last'
 global_filter_rafm = None
 global_filter_uvsg = None
 
-def parse_numeric_fast(val):
-    if val is None or val == '':
-        return None
-    if isinstance(val, (int, float)):
-        return float(val)
-
-    if isinstance(val, str):
-        s = val.strip()
-        if not s or s.lower() in ['none', 'nan', 'n/a', '-', '--']:
-            return None
-        s = s.replace('\xa0', '').replace(' ', '').replace('\u202f','')
-        s = s.replace('−', '-')
-        s = re.sub(r'[^\d,.\-()%]', '', s)
-        is_percent = s.endswith('%')
-        if is_percent:
-            s = s[:-1]
-        is_negative = False
-        if s.startswith('(') and s.endswith(')'):
-            is_negative = True
-            s = s[1:-1]
-
-        comma_count = s.count(',')
-        dot_count = s.count('.')
-
-        try:
-            if comma_count > 1 and dot_count == 1 and s.rfind('.') > s.rfind(','):
-                result = float(s.replace(',', ''))
-            elif comma_count == 1 and dot_count > 0 and s.rfind(',') > s.rfind('.'):
-                result = float(s.replace('.', '').replace(',', '.'))
-            elif dot_count == 0 and comma_count == 1:
-                result = float(s.replace(',', '.'))
-            elif dot_count > 1 and comma_count == 0:
-                result = float(s.replace('.', ''))
-            elif comma_count == 0 and dot_count <= 1:
-                result = float(s)
-            else:
-                result = float(s.replace(',', '').replace('.', ''))
-
-            if is_negative:
-                result = -result
-            if is_percent:
-                result /= 100.0
-
-            return result
-
-        except ValueError:
-            return None
-
-    try:
-        return float(val)
-    except:
-        return None
-
-def process_argo_file(file_path):
-    file_name_argo = os.path.splitext(os.path.basename(file_path))[0]
-    
-    try:
-        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
-        sheet = wb['Sheet1']
-        
-        data = list(sheet.values)
-        if not data:
-            wb.close()
-            print(f"❌ File {file_name_argo} kosong")
-            return {'File_Name': file_name_argo}
-        
-        header = [str(h).strip().lower() for h in data[0]]
-        col_index = {}
-        for col in columns_to_sum_argo:
-            try:
-                idx = header.index(col.lower())
-                col_index[col] = idx
-            except ValueError:
-                print(f"⚠️ Kolom '{col}' tidak ditemukan di file {file_name_argo}")
-        
-        sums = {col: 0 for col in col_index}
-        row_count = 0
-        parsed_count = {col: 0 for col in col_index}
-        skipped_count = {col: 0 for col in col_index}
-    
-        for row_idx, row in enumerate(data[1:], start=2):
-            row_count += 1
-            for col, idx in col_index.items():
-                if idx < len(row):
-                    val = row[idx]
-                    parsed_val = parse_numeric_fast(val)
-                    if parsed_val is not None:
-                        sums[col] += parsed_val
-                        parsed_count[col] += 1
-                    else:
-                        skipped_count[col] += 1
-        
-        wb.close()
-    except Exception as e:
-        print(f"❌ Gagal proses {file_name_argo}: {e}")
-        sums = {}
-    
-    sums['File_Name'] = file_name_argo
-    return sums
-
 def try_match_filter(filter_df, file_name):
     base = os.path.splitext(file_name)[0]
     candidates = [
@@ -165,287 +78,79 @@ def try_match_filter(filter_df, file_name):
     return filter_df[filter_df['File Name'] == file_name]
 
 
-def process_rafm_file(args):
-    file_path, file_name, filter_df = args
-    try:
-        match = try_match_filter(filter_df, file_name)
-        if match.empty:
-            print(f"⚠️ Filter match empty for RAFM file: {file_name}")
-            return None
-
-        total_sums = {col: 0.0 for col in columns_to_sum_rafm}
-        additional_sums = {col: 0.0 for col in additional_columns}
-        csar_columns = {col: 0.0 for col in c_sar}
-
-        speed = int(match['Speed Duration'].values[0])
-        exclude = str(match['Exclude Year'].values[0])
-        include = str(match['Include Year'].values[0])
-        sar = int(match['C_sar'].values[0])
-
-        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
-        
-        for sheet_name in target_sheets:
-            try:
-                actual_sheetnames = [s.strip() for s in wb.sheetnames]
-                matched_sheet = None
-                for s in actual_sheetnames:
-                    if s.lower().strip() == sheet_name.lower().strip():
-                        matched_sheet = s
-                        break
-                
-                if matched_sheet is None:
-                    continue
-
-                sheet = wb[matched_sheet]
-                data = list(sheet.values)
-                if not data:
-                    continue
-                
-                header = data[0]
-                expected = [c.lower() for c in columns_to_sum_rafm + additional_columns + c_sar]
-                col_index = {}
-                
-                for i, col in enumerate(header):
-                    col_name = str(col).strip().lower() if col is not None else ''
-                    if col_name in expected or col_name == 'goc' or col_name == 'period':
-                        col_index[col_name] = i
-
-                if 'goc' not in col_index:
-                    continue
-
-                for row in data[1:]:
-                    val_goc = ''
-                    try:
-                        idx_goc = col_index.get('goc')
-                        if idx_goc is not None and idx_goc < len(row):
-                            val_goc = str(row[idx_goc]) if row[idx_goc] is not None else ''
-                    except Exception:
-                        val_goc = ''
-
-                    period_idx = col_index.get('period')
-                    period_value = None
-                    if period_idx is not None and period_idx < len(row):
-                        period_raw = row[period_idx]
-                        period_value = parse_numeric_fast(period_raw)
-                        if period_value is not None:
-                            period_value = int(period_value)
-
-                    skip_row = False
-                    if include != '-' and exclude != '-':
-                        if include not in val_goc or exclude in val_goc:
-                            skip_row = True
-                    elif include != '-':
-                        if include not in val_goc:
-                            skip_row = True
-                    elif exclude != '-':
-                        if exclude in val_goc:
-                            skip_row = True
-                    if skip_row:
-                        continue
-
-                    if period_value is not None and period_value > speed:
-                        for col in columns_to_sum_rafm:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                v = parse_numeric_fast(row[idx])
-                                if v is not None and v != 0:
-                                    total_sums[col] += v
-
-                    if period_value is not None and period_value >= 0:
-                        for col in additional_columns:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                v = parse_numeric_fast(row[idx])
-                                if v is not None and v != 0:
-                                    additional_sums[col] += v
-
-                    if period_value is not None and period_value >= sar:
-                        for col in c_sar:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                v = parse_numeric_fast(row[idx])
-                                if v is not None and v != 0:
-                                    csar_columns[col] += v
-
-            except Exception:
-                print(f"Error processing sheet {sheet_name} in file {file_name}:")
-                traceback.print_exc()
-                continue
-
-        wb.close()
-        total_sums['File_Name'] = file_name
-        additional_sums['File_Name'] = file_name
-        csar_columns['File_Name'] = file_name
-
-        return total_sums, additional_sums, csar_columns
-
-    except Exception:
-        print(f"Fatal error in processing file {file_name}:")
-        traceback.print_exc()
-        return None
-
-def process_uvsg_file(args):
-    file_path, file_name, filter_df = args
-
+def build_filter_spec(filter_df, file_name, label):
+    """Resolve baris Filter RAFM / UVSG jadi dict biasa untuk kernel worker"""
     match = try_match_filter(filter_df, file_name)
     if match.empty:
-        print(f"⚠️ File UVSG '{file_name}' tidak berhasil diproses atau hasilnya None.")
-        return None
-
-    match = match.iloc[0]
-
-    try:
-        speed = int(match['Speed Duration'])
-        exclude = str(match['Exclude Year'])
-        include = str(match['Include Year'])
-        sar = int(match['C_sar'])
-    except Exception as e:
-        print(f"❌ Error membaca filter UVSG untuk {file_name}: {e}")
+        print(f"⚠️ Filter match empty for {label} file: {file_name}")
         return None
 
-    total_sums = {col: 0.0 for col in columns_to_sum_uvsg}
-    additional_sums = {col: 0.0 for col in additional_columns_uvsg}
-    usar_columns = {col: 0.0 for col in u_sar}
-
     try:
-        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
-        
-        for sheet_name in target_sheets:
-            try:
-                actual_sheets = [s.strip() for s in wb.sheetnames]
-                matched_sheet = None
-                for s in actual_sheets:
-                    if s.lower() == sheet_name.lower().strip():
-                        matched_sheet = s
-                        break
-                if matched_sheet is None:
-                    continue
-
-                sheet = wb[matched_sheet]
-                data = list(sheet.values)
-                if not data:
-                    continue
-
-                header = data[0]
-                header_lower = [str(h).strip().lower() if h else '' for h in header]
-                col_index = {}
-                
-                for col in columns_to_sum_uvsg + additional_columns_uvsg + u_sar + ['goc', 'period']:
-                    cl = col.lower()
-                    if cl in header_lower:
-                        col_index[cl] = header_lower.index(cl)
-
-                if 'goc' not in col_index:
-                    continue
-
-                for row in data[1:]:
-                    val_goc = str(row[col_index['goc']]) if col_index['goc'] < len(row) and row[col_index['goc']] is not None else ''
-                    period_idx = col_index.get('period')
-                    period_value = None
-                    if period_idx is not None and period_idx < len(row):
-                        period_value = parse_numeric_fast(row[period_idx])
-                        if period_value is not None:
-                            period_value = int(period_value)
-
-                    skip_row = False
-                    if include != '-' and exclude != '-':
-                        if include not in val_goc or exclude in val_goc:
-                            skip_row = True
-                    elif include != '-':
-                        if include not in val_goc:
-                            skip_row = True
-                    elif exclude != '-':
-                        if exclude in val_goc:
-                            skip_row = True
-                    if skip_row:
-                        continue
-
-                    if period_value is not None and period_value > speed:
-                        for col in columns_to_sum_uvsg:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                v = parse_numeric_fast(row[idx])
-                                if v is not None and v != 0:
-                                    total_sums[col] += v
-
-                    if period_value is not None and period_value >= 0:
-                        for col in additional_columns_uvsg:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                v = parse_numeric_fast(row[idx])
-                                if v is not None and v != 0:
-                                    additional_sums[col] += v
-
-                    if period_value is not None and period_value >= sar:
-                        for col in u_sar:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                v = parse_numeric_fast(row[idx])
-                                if v is not None and v != 0:
-                                    usar_columns[col] += v
-            except Exception:
-                print(f"Error processing sheet {sheet_name} in file {file_name}:")
-                traceback.print_exc()
-                continue
-                
-        wb.close()
-        total_sums['File_Name'] = file_name
-        additional_sums['File_Name'] = file_name
-        usar_columns['File_Name'] = file_name
-
-        return total_sums, additional_sums, usar_columns
-
+        spec = {
+            'speed': int(match['Speed Duration'].values[0]),
+            'exclude': str(match['Exclude Year'].values[0]),
+            'include': str(match['Include Year'].values[0]),
+            'sar': int(match['C_sar'].values[0]),
+        }
+        compile_filter(spec['include'], spec['exclude'])
+        return spec
     except Exception as e:
-        print(f"❌ Gagal membaca file UVSG {file_name}: {e}")
+        print(f"❌ Error membaca filter {label} untuk {file_name}: {e}")
         return None
 
 
-def main(params):
-    global global_filter_rafm, global_filter_uvsg
-
-    input_excel = params['input excel']
-
-    excel_file = pd.ExcelFile(input_excel)
-    code = pd.read_excel(excel_file, sheet_name='Code')
-    sign_logic = pd.read_excel(excel_file, sheet_name='Sign Logic')
-    control = pd.read_excel(excel_file, sheet_name='Control')
-    file_path_df = pd.read_excel(excel_file, sheet_name='File Path')
-    global_filter_rafm = pd.read_excel(excel_file, sheet_name='Filter RAFM')
-    global_filter_uvsg = pd.read_excel(excel_file, sheet_name='Filter UVSG')
-    excel_file.close()
-
-    path_map = dict(zip(file_path_df['Name'].str.lower(), file_path_df['File Path']))
-    folder_path_argo = path_map.get('argo', '')
-    folder_path_rafm = path_map.get('rafm', '')
-    folder_path_uvsg = path_map.get('uvsg', '')
-    argo_files_from_code = set(code['ARGO File Name'].astype(str).str.strip().str.lower())
-    rafm_files_from_code = set(code['RAFM File Name'].astype(str).str.strip().str.lower())
-    uvsg_files_from_code = set(code['UVSG File Name'].astype(str).str.strip().str.lower())
-
-    file_paths_argo = [
-        f for f in glob.glob(os.path.join(folder_path_argo, '*.xlsx'))
-        if os.path.splitext(os.path.basename(f))[0].lower() in argo_files_from_code
-        and not os.path.basename(f).startswith('~$')
+def preflight_specs(config, sources=None):
+    """Ekspektasi sheet & kolom per source untuk preflight header (sources: filter source folder)"""
+    specs = [
+        SourceSpec('argo', config.source_files('argo'), ['Sheet1'], columns=columns_to_sum_argo),
+        SourceSpec('rafm', config.source_files('rafm'), target_sheets, require_all=False,
+                   key_column='goc', columns=columns_to_sum_rafm + additional_columns + c_sar,
+                   duplicates=RAFM_DUPLICATES),
+        SourceSpec('uvsg', config.source_files('uvsg'), target_sheets, require_all=False,
+                   key_column='goc', columns=columns_to_sum_uvsg + additional_columns_uvsg + u_sar),
     ]
-
-    file_paths_rafm = [
-        f for f in glob.glob(os.path.join(folder_path_rafm, '*.xlsx'))
-        if os.path.splitext(os.path.basename(f))[0].lower() in rafm_files_from_code
-        and not os.path.basename(f).startswith('~$')
-    ]
-
-    file_paths_uvsg = [
-        f for f in glob.glob(os.path.join(folder_path_uvsg, '*.xlsx'))
-        if os.path.splitext(os.path.basename(f))[0].lower() in uvsg_files_from_code
-        and not os.path.basename(f).startswith('~$')
-    ]
-    
-    optimal_workers = min(os.cpu_count() or 4, max(len(file_paths_argo), 1))
-    
-    with ProcessPoolExecutor(max_workers=optimal_workers) as executor:
-        summary_rows_argo = list(executor.map(process_argo_file, file_paths_argo))
+    return [spec for spec in specs if sources is None or spec.source in sources]
+
+
+def run_extraction_tasks(params, file_paths, filter_df, groups, label, layouts, selection=None, duplicates='first'):
+    """
+    Kirim file RAFM / UVSG ke worker; file tanpa filter valid hasilnya None.
+    duplicates: kolom header kembar yang dipakai, mengikuti reader lama per source.
+    """
+    results = [None] * len(file_paths)
+    tasks, positions = [], []
+    for pos, f in enumerate(file_paths):
+        file_name = source_base_name(f)
+        spec = build_filter_spec(filter_df, file_name, label)
+        if spec is None:
+            continue
+        tasks.append({'file_path': f, 'file_name': file_name, 'spec': spec, 'groups': groups,
+                      'sheets': target_sheets, 'layout': layouts.get(f),
+                      'reader': params.get('reader', 'openpyxl'), 'stage': label.lower(),
+                      'duplicates': duplicates})
+        positions.append(pos)
+
+    tasks = mark_reuse(tasks, selection, label.lower())
+    for pos, result in zip(positions, run_file_tasks(params, process_extraction_file, tasks)):
+        results[pos] = result
+    return results
+
+
+PIPELINE = StageGraph('trad')
+
+
+@PIPELINE.stage('argo_totals', sources=('argo',))
+def argo_totals(ctx):
+    """Scan ARGO -> satu baris per ARGO File Name di sheet Code"""
+    code = ctx['config'].code.copy()
+    layouts, reader = ctx['layouts'], ctx['reader']
+
+    tasks = [{'file_path': f, 'columns': columns_to_sum_argo, 'layout': layouts.get(f, {}).get('Sheet1'),
+              'reader': reader} for f in ctx['config'].source_files('argo')]
+    summary_rows_argo = run_file_tasks(
+        ctx['params'], process_argo_file, mark_reuse(tasks, ctx['selection'], 'argo'))
     
-    cf_argo = pd.DataFrame(summary_rows_argo)
+    cf_argo = totals_frame(summary_rows_argo, ARGO_SCHEMA)
     if 'File_Name' in cf_argo.columns:
         cols = ['File_Name'] + [col for col in cf_argo.columns if col != 'File_Name']
         cf_argo = cf_argo[cols]
@@ -457,12 +162,88 @@ def main(params):
     columns_to_drop = [col for col in ['RAFM File Name', 'UVSG File Name'] if col in cf_argo.columns]
     if columns_to_drop:
         cf_argo = cf_argo.drop(columns=columns_to_drop)
+    return cf_argo
+
+
+@PIPELINE.stage('check_sign', deps=('argo_totals',))
+def check_sign_stage(ctx, cf_argo):
+    """Baris check sign di bawah CF ARGO + total pelanggaran sign logic"""
+    logic_row = ctx['config'].sign_logic.iloc[0]
+    valid_cols = [col for col in logic_row.index if col in cf_argo.columns]
     
-    file_entries = [(f, os.path.splitext(os.path.basename(f))[0], global_filter_rafm) 
-                    for f in file_paths_rafm]
+    def check_sign(val, logic_sign):
+        if pd.isna(val):
+            return 0
+        if logic_sign == 1:
+            return 1 if val < 0 else 0
+        elif logic_sign == "-":
+            return 0  
+        elif logic_sign == -1:
+            return 1 if val > 0 else 0 
+        return 0 
+
+    check_sign_summary_row = {
+        col: cf_argo[col].apply(lambda val: check_sign(val, logic_row[col])).sum()
+        for col in valid_cols
+    }
 
-    with ProcessPoolExecutor(max_workers=optimal_workers) as executor:
-        results = list(executor.map(process_rafm_file, file_entries))
+    for col in cf_argo.columns:
+        if col not in check_sign_summary_row:
+            check_sign_summary_row[col] = None
+    
+    check_sign_summary = pd.DataFrame([check_sign_summary_row])[cf_argo.columns]
+    cf_argo = pd.concat([cf_argo, check_sign_summary], ignore_index=True)
+    check_sign_total = sum(val for val in check_sign_summary_row.values() if isinstance(val, (int, float)))
+    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = check_sign_total
+    return cf_argo, check_sign_total
+
+
+@PIPELINE.stage('cf_argo', deps=('check_sign',))
+def cf_argo_sheet(ctx, checked):
+    cf_argo = checked[0].copy()
+    sign_logic = ctx['config'].sign_logic.copy()
+
+    index_labels = list(range(1, len(cf_argo))) + ['check sign']
+    cf_argo.insert(0, 'No', index_labels)
+    cf_argo = pd.concat([cf_argo, sign_logic], ignore_index=True)
+    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = 'Sign Logic'
+
+    columns_name_argo = list(cf_argo.columns[:2])
+    columns_cf_argo =  columns_name_argo + cols_to_compare
+    columns_cf_argo = [k for k in columns_cf_argo if k in cf_argo.columns]
+    return cf_argo[columns_cf_argo]
+
+
+@PIPELINE.stage('control', deps=('check_sign',))
+def control_sheet(ctx, checked):
+    control = ctx['config'].control.copy()
+    check_sign_total = checked[1]
+
+    control['check sign'] = ''
+    control['result'] = ''
+
+    val_year_idx = control[control.iloc[:, 0] == 'Val Year'].index
+    if not val_year_idx.empty:
+        idx = val_year_idx[0]
+        control.at[idx, 'check sign'] = 'Check Sign'
+        control.at[idx, 'result'] = check_sign_total
+    return control
+
+
+def _code_rafm(code):
+    code_rafm = code.copy()
+    if 'UVSG File Name' in code_rafm.columns:
+        code_rafm = code_rafm.drop(columns=['UVSG File Name'])
+    return code_rafm
+
+
+@PIPELINE.stage('rafm_totals', sources=('rafm',))
+def rafm_totals(ctx):
+    """Scan RAFM (filter Speed / GOC / C_sar), baris SUM_ dijumlahkan dari produk yang cocok"""
+    config = ctx['config']
+    rafm_groups = (('speed', columns_to_sum_rafm), ('nonneg', additional_columns), ('sar', c_sar))
+    results = run_extraction_tasks(ctx['params'], config.source_files('rafm'), config.filter_rafm.copy(),
+                                   rafm_groups, 'RAFM', ctx['layouts'], ctx['selection'], RAFM_DUPLICATES)
     
     summary_rows_rafm = []
     additional_summary_rows = []
@@ -479,19 +260,17 @@ def main(params):
         combined_row = {**main_row, **add_row, **csar_row}
         combined_summary.append(combined_row)
 
-    cf_rafm_1 = pd.DataFrame(combined_summary)
+    cf_rafm_1 = totals_frame(combined_summary, RAFM_SCHEMA)
 
     if not cf_rafm_1.empty and 'File_Name' in cf_rafm_1.columns:
         cols = ['File_Name'] + [col for col in cf_rafm_1.columns if col != 'File_Name']
         cf_rafm_1 = cf_rafm_1[cols]
 
-    code_rafm = code.copy()
-    if 'UVSG File Name' in code_rafm.columns:
-        code_rafm = code_rafm.drop(columns=['UVSG File Name'])
+    code_rafm = _code_rafm(config.code)
     
     cf_rafm = cf_rafm_1.rename(columns={'File_Name': 'RAFM File Name'})
-    cf_rafm_merge = pd.merge(code_rafm, cf_rafm, on="RAFM File Name", how="left")
-    cf_rafm_merge.fillna(0, inplace=True)
+    cf_rafm_merge = fill_totals(pd.merge(code_rafm, cf_rafm, on="RAFM File Name", how="left"), cf_rafm,
+                                "RAFM File Name")
 
     numeric_cols = cf_rafm_merge.select_dtypes(include='number').columns
     sum_rows = cf_rafm_merge[cf_rafm_merge['RAFM File Name'].str.contains("SUM_", na=False)]
@@ -521,25 +300,44 @@ def main(params):
     
     cf_rafm['dac_cov_units'] = cf_rafm['cov_units']
     cf_rafm['dac'] = -cf_rafm['r_acq_cost']
-    
-    nattr_exp = ['nattr_exp_acq', 'nattr_exp_inv', 'nattr_exp_maint']
-    for col in nattr_exp:
-        cf_rafm[col] = cf_rafm[col].astype(str).str.replace(',', '').astype(float)
     cf_rafm['nattr_exp'] = cf_rafm['nattr_exp_acq'] + cf_rafm['nattr_exp_inv'] + cf_rafm['nattr_exp_maint']
-    
+    return cf_rafm
+
+
+@PIPELINE.stage('rafm_output', deps=('rafm_totals',))
+def rafm_output_sheet(ctx, cf_rafm):
+    global_filter_rafm = ctx['config'].filter_rafm.copy()
+
+    cf_rafm = cf_rafm.groupby('RAFM File Name', as_index=False).first()
+    global_filter_rafm = global_filter_rafm.rename(columns={'File Name':'RAFM File Name'})
+    cf_rafm = pd.merge(global_filter_rafm, cf_rafm, on='RAFM File Name', how='left')
+
+    index_labels_rafm = list(range(1, len(cf_rafm)+1))
+    cf_rafm.insert(0, 'No', index_labels_rafm)
+
+    columns_name_rafm = list(cf_rafm.columns[:6])
+    columns_cf_rafm =  columns_name_rafm + cols_to_compare
+    columns_cf_rafm = [k for k in columns_cf_rafm if k in cf_rafm.columns]
+    return cf_rafm[columns_cf_rafm]
+
+
+@PIPELINE.stage('uvsg_totals', sources=('uvsg',))
+def uvsg_totals(ctx):
+    """Scan UVSG (filter Speed / GOC / U_sar), digabung dengan sheet Code"""
+    config = ctx['config']
+    file_paths_uvsg = config.source_files('uvsg')
+
     summary_rows_uvsg = []
     additional_summary_rows = []
     usar_summary_uvsg = []
 
     if file_paths_uvsg:
         try:
-            file_entries = [(f, os.path.splitext(os.path.basename(f))[0], global_filter_uvsg) 
-                           for f in file_paths_uvsg]
-
-            with ProcessPoolExecutor(max_workers=optimal_workers) as executor:
-                results_uvsg = list(executor.map(process_uvsg_file, file_entries))
+            uvsg_groups = (('speed', columns_to_sum_uvsg), ('nonneg', additional_columns_uvsg), ('sar', u_sar))
+            results_uvsg = run_extraction_tasks(ctx['params'], file_paths_uvsg, config.filter_uvsg.copy(),
+                                                uvsg_groups, 'UVSG', ctx['layouts'], ctx['selection'])
 
-            for entry, result in zip(file_entries, results_uvsg):
+            for result in results_uvsg:
                 if isinstance(result, tuple) and len(result) == 3:
                     total_sums, additional_sums, usar_columns = result
                     summary_rows_uvsg.append(total_sums)
@@ -555,14 +353,14 @@ def main(params):
         combined_summary.append(combined_row)
 
     if combined_summary:
-        uvsg_1 = pd.DataFrame(combined_summary)
+        uvsg_1 = totals_frame(combined_summary, UVSG_SCHEMA)
         if 'File_Name' in uvsg_1.columns:
             cols = ['File_Name'] + [col for col in uvsg_1.columns if col != 'File_Name']
             uvsg_1 = uvsg_1[cols]
         else:
-            uvsg_1 = pd.DataFrame(columns=['File_Name'] + columns_to_sum_uvsg + additional_columns_uvsg + u_sar)
+            uvsg_1 = empty_totals(UVSG_SCHEMA)
     else:
-        uvsg_1 = pd.DataFrame(columns=['File_Name'] + columns_to_sum_uvsg + additional_columns_uvsg + u_sar)
+        uvsg_1 = empty_totals(UVSG_SCHEMA)
 
     uvsg_1 = uvsg_1.rename(columns={'u_sar': 'c_sar'})
     if 'period' in uvsg_1.columns:
@@ -570,121 +368,108 @@ def main(params):
     
     uvsg_1['dac_cov_units'] = uvsg_1['cov_units']
     uvsg_1['dac'] = -uvsg_1['r_acq_cost']
-    for col in nattr_exp:
-        uvsg_1[col] = uvsg_1[col].astype(str).str.replace(',', '').astype(float)
     uvsg_1['nattr_exp'] = uvsg_1['nattr_exp_acq'] + uvsg_1['nattr_exp_inv'] + uvsg_1['nattr_exp_maint']
 
     uvsg_2 = uvsg_1.copy()
-    code_uvsg = code.copy()
+    code_uvsg = config.code.copy()
     if 'ARGO File Name' in code_uvsg.columns:
         code_uvsg = code_uvsg.drop(columns=['ARGO File Name'])
     
     uvsg = uvsg_2.rename(columns={'File_Name': 'UVSG File Name'})
-    uvsg_merged = pd.merge(code_uvsg, uvsg, on="UVSG File Name", how="left")
-    uvsg_merged.fillna(0, inplace=True)
+    uvsg_merged = fill_totals(pd.merge(code_uvsg, uvsg, on="UVSG File Name", how="left"), uvsg,
+                               "UVSG File Name")
     if 'RAFM File Name' in uvsg_merged.columns:
         uvsg = uvsg_merged.drop(columns=['RAFM File Name'])
     else:
         uvsg = uvsg_merged.copy()
-    
+    return uvsg
 
-    final = code.copy()
-    for col in cols_to_compare:
-        if col not in code.columns:
-            final[col] = pd.NA
-    logic_row = sign_logic.iloc[0]
 
-    mapping_code = global_filter_rafm.drop(columns={'File Name'})
-    mapping = pd.concat([code_rafm, mapping_code], axis=1)
-    mask = mapping['RAFM File Name'].astype(str).str.contains('_ori', regex=True, na=False)
-    mapping = mapping[~mask].copy()
-    
-    cf_rafm = cf_rafm.groupby('RAFM File Name', as_index=False).first()
-    global_filter_rafm = global_filter_rafm.rename(columns={'File Name':'RAFM File Name'})
-    cf_rafm = pd.merge(global_filter_rafm, cf_rafm, on='RAFM File Name', how='left')
-    
+@PIPELINE.stage('uvsg_output', deps=('uvsg_totals',))
+def uvsg_output_sheet(ctx, uvsg):
+    global_filter_uvsg = ctx['config'].filter_uvsg.copy()
+
     global_filter_uvsg = global_filter_uvsg.groupby('File Name', as_index=False).first()
     global_filter_uvsg = global_filter_uvsg.rename(columns={'File Name':'UVSG File Name'})
     uvsg = pd.merge(uvsg, global_filter_uvsg, on='UVSG File Name', how='left')
 
-    valid_cols = [col for col in logic_row.index if col in cf_argo.columns]
-    
-    def check_sign(val, logic_sign):
-        if pd.isna(val):
-            return 0
-        if logic_sign == 1:
-            return 1 if val < 0 else 0
-        elif logic_sign == "-":
-            return 0  
-        elif logic_sign == -1:
-            return 1 if val > 0 else 0 
-        return 0 
-
-    check_sign_summary_row = {
-        col: cf_argo[col].apply(lambda val: check_sign(val, logic_row[col])).sum()
-        for col in valid_cols
-    }
-
-    for col in cf_argo.columns:
-        if col not in check_sign_summary_row:
-            check_sign_summary_row[col] = None
-    
-    check_sign_summary = pd.DataFrame([check_sign_summary_row])[cf_argo.columns]
-    cf_argo = pd.concat([cf_argo, check_sign_summary], ignore_index=True)
-    check_sign_total = sum(val for val in check_sign_summary_row.values() if isinstance(val, (int, float)))
-    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = check_sign_total
-    
-    index_labels = list(range(1, len(cf_argo))) + ['check sign']
-    cf_argo.insert(0, 'No', index_labels)
-    cf_argo = pd.concat([cf_argo, sign_logic], ignore_index=True)
-    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = 'Sign Logic'
-    
-
-    index_labels_final = list(range(1, len(final)+1))
-    final.insert(0, 'No', index_labels_final)
-
-    control['check sign'] = ''
-    control['result'] = ''
-
-    val_year_idx = control[control.iloc[:, 0] == 'Val Year'].index
-    if not val_year_idx.empty:
-        idx = val_year_idx[0]
-        control.at[idx, 'check sign'] = 'Check Sign'
-        control.at[idx, 'result'] = check_sign_total
-
     if 'UVSG File Name' in uvsg.columns:
         last_3_cols = uvsg.columns[-4:].tolist()
         other_cols_uvsg = [col for col in uvsg.columns if col not in last_3_cols and col != 'UVSG File Name']
         uvsg = uvsg[['UVSG File Name'] + last_3_cols + other_cols_uvsg]
-    
-    index_labels_rafm = list(range(1, len(cf_rafm)+1))
-    cf_rafm.insert(0, 'No', index_labels_rafm)
+
     index_labels_uvsg = list(range(1, len(uvsg)+1))
     uvsg.insert(0, 'No', index_labels_uvsg)
-    
-    columns_name_argo = list(cf_argo.columns[:2])
-    columns_cf_argo =  columns_name_argo + cols_to_compare
-    columns_cf_argo = [k for k in columns_cf_argo if k in cf_argo.columns]
-    cf_argo = cf_argo[columns_cf_argo]
-
-    columns_name_rafm = list(cf_rafm.columns[:6])
-    columns_cf_rafm =  columns_name_rafm + cols_to_compare
-    columns_cf_rafm = [k for k in columns_cf_rafm if k in cf_rafm.columns]
-    cf_rafm = cf_rafm[columns_cf_rafm]
 
     columns_name_uvsg = list(uvsg.columns[:6])
     columns_uvsg =  columns_name_uvsg + cols_to_compare
     columns_uvsg = [k for k in columns_uvsg if k in uvsg.columns]
-    uvsg = uvsg[columns_uvsg]  
-
-    return {
-        'Control': control,
-        'Code': mapping,
-        "CF ARGO AZTRAD": cf_argo,
-        "RAFM Output AZTRAD": cf_rafm,
-        "RAFM Output AZUL_PI": uvsg,
-        "Checking Summary AZTRAD": final
-    }
+    return uvsg[columns_uvsg]
+
+
+@PIPELINE.stage('mapping')
+def mapping_sheet(ctx):
+    config = ctx['config']
+    mapping_code = config.filter_rafm.drop(columns={'File Name'})
+    mapping = pd.concat([_code_rafm(config.code), mapping_code], axis=1)
+    mask = mapping['RAFM File Name'].astype(str).str.contains('_ori', regex=True, na=False)
+    return mapping[~mask].copy()
+
+
+@PIPELINE.stage('checking_summary')
+def checking_summary_sheet(ctx):
+    code = ctx['config'].code
+    final = code.copy()
+    for col in cols_to_compare:
+        if col not in code.columns:
+            final[col] = np.nan
+
+    index_labels_final = list(range(1, len(final)+1))
+    final.insert(0, 'No', index_labels_final)
+    return final
+
+
+PIPELINE.output('Control', 'control')
+PIPELINE.output('Code', 'mapping')
+PIPELINE.output('CF ARGO AZTRAD', 'cf_argo')
+PIPELINE.output('RAFM Output AZTRAD', 'rafm_output')
+PIPELINE.output('RAFM Output AZUL_PI', 'uvsg_output')
+PIPELINE.output('Checking Summary AZTRAD', 'checking_summary')
+PIPELINE.alias('check-sign', 'Control')
+PIPELINE.alias('argo', 'CF ARGO AZTRAD')
+PIPELINE.alias('rafm', 'RAFM Output AZTRAD')
+PIPELINE.alias('uvsg', 'RAFM Output AZUL_PI')
+
+
+def main(params):
+    """
+    params['only']: output sheet / alias yang diminta (None -> semua). Hanya stage dan
+    source folder yang dibutuhkan output itu yang dijalankan.
+    params['select']: baris Code yang di-scan ulang (lihat RunConfig.select_rows); baris
+    lain memakai hasil di params['cache'].
+    Statistik scan semua file yang dibaca (atau diambil dari cache) ditambahkan sebagai
+    sheet 'Scan Statistics'.
+    """
+    config = params.get('config') or load_run_config(params['input excel'], 'trad')
+    only = params.get('only')
+
+    selection = config.select_rows(params.get('select'))
+    if selection is not None:
+        print(f"🎯 Selection: {sum(len(v) for v in selection.values())} file di-scan ulang, "
+              f"file lain dari hasil run sebelumnya")
+
+    layouts = params.get('layouts')
+    if layouts is None:
+        specs = select_specs(preflight_specs(config, PIPELINE.sources(only)), selection)
+        layouts = run_preflight(specs, params.get('preflight', 'error')).layouts
+
+    ctx = {'config': config, 'params': params, 'layouts': layouts,
+           'reader': params.get('reader', 'openpyxl'), 'selection': selection}
+    params['scan_stats'] = []
+    result = PIPELINE.run(ctx, only)
+    if params['scan_stats']:
+        result[SCAN_STATS_SHEET] = scan_statistics_frame(params['scan_stats'])
+    return result
 
 
 if __name__ == '__main__':
@@ -1,9 +1,15 @@
+import numpy as np
 import pandas as pd
-import glob
-import os
-from concurrent.futures import ProcessPoolExecutor
+from syntax.scheduler import run_file_tasks
+from syntax.run_config import load_run_config
+from syntax.preflight import SourceSpec, run_preflight
+from syntax.stages import StageGraph
 import re
-from openpyxl import load_workbook
+from syntax.readers import source_base_name
+from syntax.result_cache import mark_reuse, select_specs
+from syntax.goc_filter import compile_filter
+from syntax.kernels import process_argo_file, process_extraction_file
+from syntax.schema import SCAN_STATS_SHEET, FrameSchema, fill_totals, scan_statistics_frame, totals_frame
 
 columns_to_sum_argo = [
     'prm_inc','lrc_cl_ins','lrc_cl_inv','r_exp_m','r_acq_cost',
@@ -30,244 +36,58 @@ columns_to_compare_rafm = [
 
 additional_columns = ['pv_pw_n','cov_units', 'u_sar', 'pv_r_exp_m', 'pv_surr']
 target_sheets = ['extraction_IDR', 'extraction_USD']
+# Semantik reader RAFM ul: nama sheet persis, header kembar -> kolom terakhir, GOC kosong -> 'None'
+RAFM_READER = {'duplicates': 'last', 'exact_sheets': True, 'none_goc': 'None'}
 global_filter_rafm = None
 all_runs = ['11', '21', '31', '41']
+ARGO_SCHEMA = FrameSchema('ARGO totals', tuple(columns_to_sum_argo))
+RAFM_SCHEMA = FrameSchema('RAFM totals', tuple(columns_to_sum_rafm + additional_columns))
 
-def parse_numeric_fast(val):
-    if val is None or val == '':
-        return None
-    if isinstance(val, (int, float)):
-        return float(val)
-
-    if isinstance(val, str):
-        s = val.strip()
-        if not s or s.lower() in ['none', 'nan', 'n/a', '-', '--']:
-            return None
-        s = s.replace('\xa0', '').replace(' ', '').replace('\u202f','')
-        s = s.replace('−', '-')
-        s = re.sub(r'[^\d,.\-()%]', '', s)
-        is_percent = s.endswith('%')
-        if is_percent:
-            s = s[:-1]
-        is_negative = False
-        if s.startswith('(') and s.endswith(')'):
-            is_negative = True
-            s = s[1:-1]
-
-        comma_count = s.count(',')
-        dot_count = s.count('.')
-
-        try:
-            if comma_count > 1 and dot_count == 1 and s.rfind('.') > s.rfind(','):
-                result = float(s.replace(',', ''))
-            elif comma_count == 1 and dot_count > 0 and s.rfind(',') > s.rfind('.'):
-                result = float(s.replace('.', '').replace(',', '.'))
-            elif dot_count == 0 and comma_count == 1:
-                result = float(s.replace(',', '.'))
-            elif dot_count > 1 and comma_count == 0:
-                result = float(s.replace('.', ''))
-            elif comma_count == 0 and dot_count <= 1:
-                result = float(s)
-            else:
-                result = float(s.replace(',', '').replace('.', ''))
-
-            if is_negative:
-                result = -result
-            if is_percent:
-                result /= 100.0
-
-            return result
-
-        except ValueError:
-            return None
-
-    try:
-        return float(val)
-    except:
-        return None
-
-def process_argo_file(file_path):
-    file_name_argo = os.path.splitext(os.path.basename(file_path))[0]
-    
-    try:
-        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
-        sheet = wb['Sheet1']
-        
-        data = list(sheet.values)
-        if not data:
-            wb.close()
-            print(f"❌ File {file_name_argo} kosong")
-            return {'File_Name': file_name_argo}
-        
-        header = [str(h).strip().lower() for h in data[0]]
-        col_index = {}
-        for col in columns_to_sum_argo:
-            try:
-                idx = header.index(col.lower())
-                col_index[col] = idx
-            except ValueError:
-                print(f"⚠️ Kolom '{col}' tidak ditemukan di file {file_name_argo}")
-        
-        sums = {col: 0 for col in col_index}
-        row_count = 0
-        parsed_count = {col: 0 for col in col_index}
-        skipped_count = {col: 0 for col in col_index}
-    
-        for row_idx, row in enumerate(data[1:], start=2):
-            row_count += 1
-            for col, idx in col_index.items():
-                if idx < len(row):
-                    val = row[idx]
-                    parsed_val = parse_numeric_fast(val)
-                    if parsed_val is not None:
-                        sums[col] += parsed_val
-                        parsed_count[col] += 1
-                    else:
-                        skipped_count[col] += 1
-        
-        wb.close()
-    except Exception as e:
-        print(f"❌ Gagal proses {file_name_argo}: {e}")
-        sums = {}
-    
-    sums['File_Name'] = file_name_argo
-    return sums
 
-def process_rafm_file(args):
-    file_path, file_name, filter_df = args
+def build_filter_spec(filter_df, file_name):
+    """Resolve baris Filter RAFM jadi dict biasa untuk kernel worker"""
     match = filter_df[filter_df['File Name'] == file_name]
     if match.empty:
         return None
 
-    total_sums = {col: 0 for col in columns_to_sum_rafm}
-    additional_sums = {col: 0 for col in additional_columns}
-
-    speed = int(match['Speed Duration'].values[0])
-    exclude = str(match['Exclude Year'].values[0])
-    include = str(match['Include Year'].values[0])
-
+    spec = {
+        'speed': int(match['Speed Duration'].values[0]),
+        'exclude': str(match['Exclude Year'].values[0]),
+        'include': str(match['Include Year'].values[0]),
+    }
     try:
-        wb = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
-        
-        for sheet_name in target_sheets:
-            try:
-                if sheet_name not in wb.sheetnames:
-                    continue
-                
-                actual_sheetnames = [s.strip().lower() for s in wb.sheetnames]
-                target_lower = sheet_name.lower()
-
-                if target_lower not in actual_sheetnames:
-                    continue
-                
-                matched_sheet = wb.sheetnames[actual_sheetnames.index(target_lower)]
-                sheet = wb[matched_sheet]
-                
-                data = list(sheet.values)
-                if not data:
-                    continue
-                
-                header = data[0]
-
-                col_index = {}
-                for i, col in enumerate(header):
-                    col_name = str(col).strip().lower() if col else ''
-                    if col_name in [c.lower() for c in columns_to_sum_rafm + additional_columns] or col_name == 'goc':
-                        col_index[col_name] = i
-
-                if 'goc' not in col_index:
-                    continue
-
-                for row in data[1:]:
-                    val_goc = str(row[col_index['goc']]) if col_index['goc'] < len(row) else ''
-                    period_idx = col_index.get('period')
-                    period_value = None
-                    if period_idx is not None and period_idx < len(row):
-                        period_value = parse_numeric_fast(row[period_idx])
-                        if period_value is not None:
-                            period_value = int(period_value)
-
-                    skip_row = False
-                    if include != '-' and exclude != '-':
-                        if include not in val_goc or exclude in val_goc:
-                            skip_row = True
-                    elif include != '-':
-                        if include not in val_goc:
-                            skip_row = True
-                    elif exclude != '-':
-                        if exclude in val_goc:
-                            skip_row = True
-
-                    if skip_row:
-                        continue
-
-                    if period_value is not None and period_value > speed:
-                        for col in columns_to_sum_rafm:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                val = parse_numeric_fast(row[idx])
-                                if val is not None and val != 0:
-                                    total_sums[col] += val
-
-                    if period_value is not None and period_value >= 0:
-                        for col in additional_columns:
-                            idx = col_index.get(col.lower())
-                            if idx is not None and idx < len(row):
-                                val = parse_numeric_fast(row[idx])
-                                if val is not None and val != 0:
-                                    additional_sums[col] += val
-
-            except:
-                continue
-
-        wb.close()
-
-    except:
-        pass
-
-    total_sums['File_Name'] = file_name
-    additional_sums['File_Name'] = file_name
-    return total_sums, additional_sums
-
-
-def main(params):
-    global global_filter_rafm
-
-    input_excel = params['input excel']
-
-    excel_file = pd.ExcelFile(input_excel)
-    code = pd.read_excel(excel_file, sheet_name='Code')
-    sign_logic = pd.read_excel(excel_file, sheet_name='Sign Logic')
-    control = pd.read_excel(excel_file, sheet_name='Control')
-    file_path_df = pd.read_excel(excel_file, sheet_name='File Path')
-    global_filter_rafm = pd.read_excel(excel_file, sheet_name='Filter RAFM')
-    excel_file.close()
-
-    path_map = dict(zip(file_path_df['Name'].str.lower(), file_path_df['File Path']))
-    folder_path_argo = path_map.get('argo', '')
-    folder_path_rafm = path_map.get('rafm', '')
+        compile_filter(spec['include'], spec['exclude'])
+    except ValueError as e:
+        print(f"❌ Error membaca filter RAFM untuk {file_name}: {e}")
+        return None
+    return spec
+
+def preflight_specs(config, sources=None):
+    """Ekspektasi sheet & kolom per source untuk preflight header (sources: filter source folder)"""
+    specs = [
+        SourceSpec('argo', config.source_files('argo'), ['Sheet1'], columns=columns_to_sum_argo),
+        SourceSpec('rafm', config.source_files('rafm'), target_sheets, require_all=False,
+                   key_column='goc', columns=columns_to_sum_rafm + additional_columns,
+                   duplicates='last', exact=True),
+    ]
+    return [spec for spec in specs if sources is None or spec.source in sources]
 
-    argo_files_from_code = set(code['ARGO File Name'].astype(str).str.strip().str.lower())
-    rafm_files_from_code = set(code['RAFM File Name'].astype(str).str.strip().str.lower())
 
-    file_paths_argo = [
-        f for f in glob.glob(os.path.join(folder_path_argo, '*.xlsx'))
-        if os.path.splitext(os.path.basename(f))[0].lower() in argo_files_from_code
-        and not os.path.basename(f).startswith('~$')
-    ]
+PIPELINE = StageGraph('ul')
 
-    file_paths_rafm = [
-        f for f in glob.glob(os.path.join(folder_path_rafm, '*.xlsx'))
-        if os.path.splitext(os.path.basename(f))[0].lower() in rafm_files_from_code
-        and not os.path.basename(f).startswith('~$')
-    ]
 
-    optimal_workers = min(os.cpu_count() or 4, max(len(file_paths_argo), 1))
+@PIPELINE.stage('argo_totals', sources=('argo',))
+def argo_totals(ctx):
+    """Scan ARGO -> satu baris per ARGO File Name di sheet Code"""
+    code = ctx['config'].code.copy()
+    layouts, reader = ctx['layouts'], ctx['reader']
 
-    with ProcessPoolExecutor(max_workers=optimal_workers) as executor:
-        summary_rows_argo = list(executor.map(process_argo_file, file_paths_argo))
+    tasks = [{'file_path': f, 'columns': columns_to_sum_argo, 'layout': layouts.get(f, {}).get('Sheet1'),
+              'reader': reader} for f in ctx['config'].source_files('argo')]
+    summary_rows_argo = run_file_tasks(
+        ctx['params'], process_argo_file, mark_reuse(tasks, ctx['selection'], 'argo'))
 
-    cf_argo = pd.DataFrame(summary_rows_argo)
+    cf_argo = totals_frame(summary_rows_argo, ARGO_SCHEMA)
     cf_argo = cf_argo.rename(columns={'File_Name': 'ARGO File Name'})
     
     cf_argo = pd.merge(code, cf_argo, on='ARGO File Name', how='left')
@@ -279,12 +99,93 @@ def main(params):
     if 'ARGO File Name' in cf_argo.columns:
         cols = ['ARGO File Name'] + [col for col in cf_argo.columns if col != 'ARGO File Name']
         cf_argo = cf_argo[cols]
+    return cf_argo
+
+
+@PIPELINE.stage('check_sign', deps=('argo_totals',))
+def check_sign_stage(ctx, cf_argo):
+    """Baris check sign di bawah CF ARGO + total pelanggaran sign logic"""
+    logic_row = ctx['config'].sign_logic.iloc[0]
+    valid_cols = [col for col in logic_row.index if col in cf_argo.columns]
+    
+    def check_sign(val, logic_sign):
+        if pd.isna(val):
+            return 0
+        if logic_sign == 1:
+            return 1 if val < 0 else 0
+        elif logic_sign == "-":
+            return 0
+        elif logic_sign == -1:
+            return 1 if val > 0 else 0 
+        return 0 
+
+    check_sign_summary_row = {
+        col: cf_argo[col].apply(lambda val: check_sign(val, logic_row[col])).sum()
+        for col in valid_cols
+    }
+
+    for col in cf_argo.columns:
+        if col not in check_sign_summary_row:
+            check_sign_summary_row[col] = None
+    
+    check_sign_summary = pd.DataFrame([check_sign_summary_row])[cf_argo.columns]
+    cf_argo = pd.concat([cf_argo, check_sign_summary], ignore_index=True)
+    check_sign_total = sum(val for val in check_sign_summary_row.values() if isinstance(val, (int, float)))
+    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = check_sign_total
+    return cf_argo, check_sign_total
+
+
+@PIPELINE.stage('cf_argo', deps=('check_sign',))
+def cf_argo_sheet(ctx, checked):
+    cf_argo = checked[0].copy()
+    sign_logic = ctx['config'].sign_logic.copy()
+
+    index_labels = list(range(1, len(cf_argo))) + ['check sign']
+    cf_argo.insert(0, 'No', index_labels)
+    cf_argo = pd.concat([cf_argo, sign_logic], ignore_index=True)
+    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = 'Sign Logic'
+
+    columns_name_argo = list(cf_argo.columns[:2])
+    columns_cf_argo =  columns_name_argo + columns_to_sum_argo
+    columns_cf_argo = [k for k in columns_cf_argo if k in cf_argo.columns]
+    return cf_argo[columns_cf_argo]
+
+
+@PIPELINE.stage('control', deps=('check_sign',))
+def control_sheet(ctx, checked):
+    control = ctx['config'].control.copy()
+    check_sign_total = checked[1]
+
+    control['check sign'] = ''
+    control['result'] = ''
+
+    val_year_idx = control[control.iloc[:, 0] == 'Val Year'].index
+    if not val_year_idx.empty:
+        idx = val_year_idx[0]
+        control.at[idx, 'check sign'] = 'Check Sign'
+        control.at[idx, 'result'] = check_sign_total
+    return control
+
+
+@PIPELINE.stage('rafm_totals', sources=('rafm',))
+def rafm_totals(ctx):
+    """Scan RAFM (filter Speed / GOC), baris SUM_ dijumlahkan dari produk yang cocok"""
+    config = ctx['config']
+    code = config.code.copy()
+    global_filter_rafm = config.filter_rafm.copy()
 
-    file_entries = [(f, os.path.splitext(os.path.basename(f))[0], global_filter_rafm)
-                    for f in file_paths_rafm]
+    rafm_groups = (('speed', columns_to_sum_rafm), ('nonneg', additional_columns))
+    file_entries = []
+    for f in config.source_files('rafm'):
+        file_name = source_base_name(f)
+        spec = build_filter_spec(global_filter_rafm, file_name)
+        if spec is not None:
+            file_entries.append({'file_path': f, 'file_name': file_name, 'spec': spec, 'groups': rafm_groups,
+                                 'sheets': target_sheets, 'layout': ctx['layouts'].get(f),
+                                 'reader': ctx['reader'], 'stage': 'rafm', **RAFM_READER})
 
-    with ProcessPoolExecutor(max_workers=optimal_workers) as executor:
-        results = list(executor.map(process_rafm_file, file_entries))
+    results = run_file_tasks(ctx['params'], process_extraction_file,
+                             mark_reuse(file_entries, ctx['selection'], 'rafm'))
 
     summary_rows_rafm = []
     additional_summary_rows = []
@@ -299,14 +200,9 @@ def main(params):
         combined_row = {**main_row, **add_row}
         combined_summary.append(combined_row)
 
-    cf_rafm = pd.DataFrame(combined_summary)
-    if not cf_rafm.empty and 'File_Name' in cf_rafm.columns:
-        cols = ['File_Name'] + [col for col in cf_rafm.columns if col != 'File_Name']
-        cf_rafm = cf_rafm[cols]
-    
-    cf_rafm = pd.DataFrame(combined_summary).rename(columns={'File_Name': 'RAFM File Name'})
-    cf_rafm_merge = pd.merge(code, cf_rafm, on="RAFM File Name", how="left").fillna(0)
-    cf_rafm_merge.fillna(0, inplace=True)
+    cf_rafm = totals_frame(combined_summary, RAFM_SCHEMA).rename(columns={'File_Name': 'RAFM File Name'})
+    cf_rafm_merge = fill_totals(pd.merge(code, cf_rafm, on="RAFM File Name", how="left"), cf_rafm,
+                                "RAFM File Name")
 
     sum_rows = cf_rafm_merge[cf_rafm_merge['RAFM File Name'].str.contains("SUM_", na=False)]
     numeric_cols = cf_rafm_merge.select_dtypes(include='number').columns
@@ -335,89 +231,87 @@ def main(params):
     cf_rafm['pv_clm_surr_pw_n'] = cf_rafm[['pv_surr', 'pv_pw_n']].sum(axis=1)
     cf_rafm['nattr_exp_maint_inv'] = cf_rafm[['nattr_exp_inv', 'nattr_exp_maint']].sum(axis=1)
     cf_rafm['dac_cov_units'] = cf_rafm['cov_units']
+    return cf_rafm
 
-    
-    final = code.copy()
-    for col in columns_to_sum_argo:
-        if col not in code.columns:
-            final[col] = pd.NA
-    logic_row = sign_logic.iloc[0]
 
-    mapping_code = global_filter_rafm.drop(columns={'File Name'})
-    mapping = pd.concat([code, mapping_code], axis=1)
-    mask = mapping['RAFM File Name'].astype(str).str.contains('_ori', regex=True, na=False)
-    mapping = mapping[~mask].copy()
-    
+@PIPELINE.stage('rafm_output', deps=('rafm_totals',))
+def rafm_output_sheet(ctx, cf_rafm):
+    global_filter_rafm = ctx['config'].filter_rafm.copy()
+
     cf_rafm = cf_rafm.groupby('RAFM File Name', as_index=False).first()
     global_filter_rafm = global_filter_rafm.rename(columns={'File Name':'RAFM File Name'})
     cf_rafm = pd.merge(global_filter_rafm, cf_rafm, on='RAFM File Name', how='left')
-    logic_row = sign_logic.iloc[0]
 
-    valid_cols = [col for col in logic_row.index if col in cf_argo.columns]
-    
-    def check_sign(val, logic_sign):
-        if pd.isna(val):
-            return 0
-        if logic_sign == 1:
-            return 1 if val < 0 else 0
-        elif logic_sign == "-":
-            return 0
-        elif logic_sign == -1:
-            return 1 if val > 0 else 0 
-        return 0 
+    index_labels_rafm = list(range(1, len(cf_rafm)+1))
+    cf_rafm.insert(0, 'No', index_labels_rafm)
 
-    check_sign_summary_row = {
-        col: cf_argo[col].apply(lambda val: check_sign(val, logic_row[col])).sum()
-        for col in valid_cols
-    }
+    columns_name_rafm = list(cf_rafm.columns[:5])
+    columns_cf_rafm =  columns_name_rafm + columns_to_compare_rafm
+    columns_cf_rafm = [k for k in columns_cf_rafm if k in cf_rafm.columns]
+    return cf_rafm[columns_cf_rafm]
 
-    for col in cf_argo.columns:
-        if col not in check_sign_summary_row:
-            check_sign_summary_row[col] = None
-    
-    check_sign_summary = pd.DataFrame([check_sign_summary_row])[cf_argo.columns]
-    cf_argo = pd.concat([cf_argo, check_sign_summary], ignore_index=True)
-    check_sign_total = sum(val for val in check_sign_summary_row.values() if isinstance(val, (int, float)))
-    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = check_sign_total
-    
-    index_labels = list(range(1, len(cf_argo))) + ['check sign']
-    cf_argo.insert(0, 'No', index_labels)
-    cf_argo = pd.concat([cf_argo, sign_logic], ignore_index=True)
-    cf_argo.loc[cf_argo.index[-1], 'ARGO File Name'] = 'Sign Logic'
-    
+
+@PIPELINE.stage('mapping')
+def mapping_sheet(ctx):
+    config = ctx['config']
+    mapping_code = config.filter_rafm.drop(columns={'File Name'})
+    mapping = pd.concat([config.code.copy(), mapping_code], axis=1)
+    mask = mapping['RAFM File Name'].astype(str).str.contains('_ori', regex=True, na=False)
+    return mapping[~mask].copy()
+
+
+@PIPELINE.stage('checking_summary')
+def checking_summary_sheet(ctx):
+    code = ctx['config'].code
+    final = code.copy()
+    for col in columns_to_sum_argo:
+        if col not in code.columns:
+            final[col] = np.nan
 
     index_labels_final = list(range(1, len(final)+1))
     final.insert(0, 'No', index_labels_final)
+    return final
 
-    control['check sign'] = ''
-    control['result'] = ''
 
-    val_year_idx = control[control.iloc[:, 0] == 'Val Year'].index
-    if not val_year_idx.empty:
-        idx = val_year_idx[0]
-        control.at[idx, 'check sign'] = 'Check Sign'
-        control.at[idx, 'result'] = check_sign_total
-    
-    index_labels_rafm = list(range(1, len(cf_rafm)+1))
-    cf_rafm.insert(0, 'No', index_labels_rafm)
+PIPELINE.output('Control', 'control')
+PIPELINE.output('Code', 'mapping')
+PIPELINE.output('CF ARGO AZUL', 'cf_argo')
+PIPELINE.output('RAFM Output AZUL', 'rafm_output')
+PIPELINE.output('Checking Summary AZUL', 'checking_summary')
+PIPELINE.alias('check-sign', 'Control')
+PIPELINE.alias('argo', 'CF ARGO AZUL')
+PIPELINE.alias('rafm', 'RAFM Output AZUL')
 
-    columns_name_argo = list(cf_argo.columns[:2])
-    columns_cf_argo =  columns_name_argo + columns_to_sum_argo
-    columns_cf_argo = [k for k in columns_cf_argo if k in cf_argo.columns]
-    cf_argo = cf_argo[columns_cf_argo]
 
-    columns_name_rafm = list(cf_rafm.columns[:5])
-    columns_cf_rafm =  columns_name_rafm + columns_to_compare_rafm
-    columns_cf_rafm = [k for k in columns_cf_rafm if k in cf_rafm.columns]
-    cf_rafm = cf_rafm[columns_cf_rafm]
-
-    return {
-        'Control': control,
-        'Code': mapping,
-        "CF ARGO AZUL": cf_argo,
-        "RAFM Output AZUL": cf_rafm,
-        "Checking Summary AZUL": final
-    }
+def main(params):
+    """
+    params['only']: output sheet / alias yang diminta (None -> semua). Hanya stage dan
+    source folder yang dibutuhkan output itu yang dijalankan.
+    params['select']: baris Code yang di-scan ulang (lihat RunConfig.select_rows); baris
+    lain memakai hasil di params['cache'].
+    Statistik scan semua file yang dibaca (atau diambil dari cache) ditambahkan sebagai
+    sheet 'Scan Statistics'.
+    """
+    config = params.get('config') or load_run_config(params['input excel'], 'ul')
+    only = params.get('only')
+
+    selection = config.select_rows(params.get('select'))
+    if selection is not None:
+        print(f"🎯 Selection: {sum(len(v) for v in selection.values())} file di-scan ulang, "
+              f"file lain dari hasil run sebelumnya")
+
+    layouts = params.get('layouts')
+    if layouts is None:
+        specs = select_specs(preflight_specs(config, PIPELINE.sources(only)), selection)
+        layouts = run_preflight(specs, params.get('preflight', 'error')).layouts
+
+    ctx = {'config': config, 'params': params, 'layouts': layouts,
+           'reader': params.get('reader', 'openpyxl'), 'selection': selection}
+    params['scan_stats'] = []
+    result = PIPELINE.run(ctx, only)
+    if params['scan_stats']:
+        result[SCAN_STATS_SHEET] = scan_statistics_frame(params['scan_stats'])
+    return result
 
 
 if __name__ == '__main__':
@@ -0,0 +1,108 @@
+"""
+Ekspresi filter GOC untuk kolom Include Year / Exclude Year di sheet Filter RAFM / UVSG.
+
+Term dipisah ';', spasi di sekitar term diabaikan:
+  2020                substring GOC (perilaku lama, case-sensitive)
+  pre:AZTRAD          GOC diawali teks ini
+  suf:_2020           GOC diakhiri teks ini
+  re:_20(19|20)$      regex (re.search) pada GOC
+  period:1-12         period dalam range (inklusif); juga period:>=13, period:<=24, period:5
+  '-' / kosong        tanpa filter
+
+Include: baris dipakai jika GOC cocok dengan salah satu term GOC include dan period masuk
+salah satu range include (masing-masing hanya jika ada). Exclude: baris dibuang jika GOC
+cocok dengan salah satu term GOC exclude atau period masuk salah satu range exclude.
+
+Filter di-compile sekali per file; keputusan GOC di-memo per nilai GOC yang berbeda, jadi
+biaya evaluasi mengikuti jumlah GOC unik, bukan jumlah baris. Hanya stdlib (dipakai kernel).
+"""
+import re
+
+TERM_SEPARATOR = ';'
+NO_FILTER = ('', '-')
+_PERIOD_RANGE = re.compile(r'^(?:(-?\d+)\s*-\s*(-?\d+)|(>=|<=|>|<)?\s*(-?\d+))$')
+
+
+def _compile_term(term):
+    """Term GOC -> predicate str -> bool"""
+    kind, sep, value = term.partition(':')
+    kind = kind.strip().lower() if sep else ''
+    if kind == 'pre':
+        return lambda goc, v=value.strip(): goc.startswith(v)
+    if kind == 'suf':
+        return lambda goc, v=value.strip(): goc.endswith(v)
+    if kind == 're':
+        try:
+            pattern = re.compile(value.strip())
+        except re.error as e:
+            raise ValueError(f"Regex GOC tidak valid '{value.strip()}': {e}") from None
+        return lambda goc: pattern.search(goc) is not None
+    return lambda goc, v=term: v in goc
+
+
+def _parse_period(text):
+    """'1-12' / '>=13' / '5' -> (low, high) inklusif, None = tanpa batas"""
+    match = _PERIOD_RANGE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Range period tidak valid: '{text.strip()}' (contoh: 1-12, >=13, 5)")
+    low, high, op, value = match.groups()
+    if low is not None:
+        return int(low), int(high)
+    value = int(value)
+    return {
+        None: (value, value),
+        '>=': (value, None),
+        '>': (value + 1, None),
+        '<=': (None, value),
+        '<': (None, value - 1),
+    }[op]
+
+
+def _parse(expression):
+    """Returns: (list predicate GOC, list range period)"""
+    text = str(expression).strip()
+    if text in NO_FILTER:
+        return [], []
+    goc_terms, periods = [], []
+    for term in text.split(TERM_SEPARATOR):
+        if not term.strip():
+            continue
+        kind, sep, value = term.partition(':')
+        if sep and kind.strip().lower() == 'period':
+            periods.append(_parse_period(value))
+        else:
+            goc_terms.append(_compile_term(term.strip()))
+    return goc_terms, periods
+
+
+def _in_ranges(period, ranges):
+    return any((low is None or period >= low) and (high is None or period <= high) for low, high in ranges)
+
+
+class GocFilter:
+    """Filter hasil compile include / exclude satu file"""
+
+    def __init__(self, include='-', exclude='-'):
+        self.include, self.include_periods = _parse(include)
+        self.exclude, self.exclude_periods = _parse(exclude)
+        self.has_period_filter = bool(self.include_periods or self.exclude_periods)
+        # memo keputusan per nilai GOC unik (dipakai langsung oleh loop kernel)
+        self.goc_memo = {}
+
+    def allows_goc(self, goc):
+        allowed = self.goc_memo.get(goc)
+        if allowed is None:
+            allowed = ((not self.include or any(term(goc) for term in self.include))
+                       and not any(term(goc) for term in self.exclude))
+            self.goc_memo[goc] = allowed
+        return allowed
+
+    def allows_period(self, period):
+        if self.include_periods and not _in_ranges(period, self.include_periods):
+            return False
+        return not (self.exclude_periods and _in_ranges(period, self.exclude_periods))
+
+
+def compile_filter(include='-', exclude='-'):
+    """Compile ekspresi Include Year / Exclude Year; ValueError untuk ekspresi yang tidak valid"""
+    return GocFilter(include, exclude)
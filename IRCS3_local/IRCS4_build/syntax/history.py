@@ -0,0 +1,223 @@
+"""
+History store: hasil setiap run disimpan sebagai Parquet, dipartisi per jenis dan
+valuation period, supaya perbandingan antar quarter tidak perlu membuka workbook lagi.
+
+Layout:  <root>/jenis=<jenis>/period=<period>/<sheet>.parquet  (+ _run.json manifest)
+
+Frame output (CF ARGO, RAFM Output, UVSG, Checking Summary, ...) sudah berisi satu baris
+per source file, jadi itu juga agregat per file. delta() membaca dua partisi dan
+menghasilkan pergerakan product x measure.
+
+Usage: python -m syntax.history periods <jenis>
+       python -m syntax.history delta <jenis> <period_a> <period_b> [--sheet=...] [--out=file.csv]
+"""
+import datetime
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+DEFAULT_HISTORY_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir(), 'control4_history')
+MANIFEST_FILE = '_run.json'
+NAME_COLUMNS = ['ARGO File Name', 'RAFM File Name', 'UVSG File Name']
+# Kolom numerik yang berupa parameter filter, bukan measure
+NON_MEASURE_COLUMNS = {'No', 'Speed Duration', 'Exclude Year', 'Include Year', 'C_sar', 'U_sar'}
+
+
+def _slug(text):
+    return re.sub(r'[^0-9A-Za-z._-]+', '_', str(text)).strip('_')
+
+
+def _is_bare_year(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return re.fullmatch(r'\d{4}', str(value).strip()) is not None
+
+
+def valuation_period(config, period=None):
+    """
+    Period run: argumen > baris 'period' di sheet File Path > 'Val Year' di sheet Control.
+    'Val Year' yang hanya berisi tahun (mis. 2025) tidak dipakai: semua quarter tahun itu
+    akan menimpa partisi yang sama, jadi period harus diberikan eksplisit.
+    """
+    value = period or config.paths.get('period')
+    if value is None:
+        control = config.control
+        match = control[control.iloc[:, 0] == 'Val Year']
+        if not match.empty and control.shape[1] > 1:
+            value = match.iloc[0, 1]
+            if not isinstance(value, (datetime.date, pd.Timestamp)) and not pd.isna(value) and _is_bare_year(value):
+                print(f"⚠️ Val Year '{value}' hanya berisi tahun -> partisi per quarter akan saling menimpa. "
+                      f"Isi --period=<period> atau baris 'period' di sheet File Path (mis. {_slug(value)}Q1)")
+                return None
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return _slug(value)
+
+
+def _parquet_safe(df):
+    """Kolom object campuran (mis. total check sign di kolom nama file) -> string"""
+    df = df.copy()
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        if not values.map(lambda v: v is None or isinstance(v, str)).all():
+            df[col] = values.map(lambda v: None if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v))
+    return df
+
+
+def measures(df, sheet):
+    """Frame output wide -> long (sheet, product, measure, value), satu baris per product x measure"""
+    name_col = next((c for c in NAME_COLUMNS if c in df.columns), None)
+    if name_col is None:
+        return pd.DataFrame(columns=['sheet', 'product', 'measure', 'value'])
+    rows = df[df[name_col].map(lambda v: isinstance(v, str) and v != 'Sign Logic')]
+    value_cols = [c for c in rows.columns
+                  if c not in NON_MEASURE_COLUMNS and c not in NAME_COLUMNS and c != 'period']
+    values = rows[value_cols].apply(pd.to_numeric, errors='coerce')
+    values.insert(0, 'product', rows[name_col].values)
+    values = values.groupby('product', sort=False).first().reset_index()
+    long = values.melt(id_vars='product', var_name='measure', value_name='value').dropna(subset=['value'])
+    long.insert(0, 'sheet', sheet)
+    return long.reset_index(drop=True)
+
+
+class HistoryStore:
+    """period: override valuation period untuk semua save (default dari input workbook)"""
+
+    def __init__(self, root=None, period=None):
+        self.root = root or DEFAULT_HISTORY_DIR
+        self.period = period
+
+    def partition(self, jenis, period):
+        return os.path.join(self.root, f"jenis={jenis}", f"period={period}")
+
+    def save(self, config, result):
+        """
+        Simpan frame output satu run. Sheet yang tidak ada di result (run --only)
+        tidak menghapus sheet period yang sama dari run sebelumnya.
+
+        Returns:
+            path partisi, atau None jika period tidak diketahui / pyarrow tidak ada
+        """
+        period = valuation_period(config, self.period)
+        if period is None:
+            print("⚠️ History tidak disimpan: period tidak ditemukan (--period / File Path 'period' / Val Year berupa tanggal)")
+            return None
+        try:
+            import pyarrow  # noqa: F401  (engine to_parquet)
+        except ImportError:
+            print("⚠️ History tidak disimpan: pyarrow tidak terpasang (pip install pyarrow)")
+            return None
+
+        folder = self.partition(config.jenis, period)
+        os.makedirs(folder, exist_ok=True)
+        for sheet, df in result.items():
+            path = os.path.join(folder, f"{_slug(sheet)}.parquet")
+            tmp = f"{path}.tmp"
+            _parquet_safe(df).to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+
+        manifest_path = os.path.join(folder, MANIFEST_FILE)
+        manifest = self._manifest(folder)
+        manifest['sheets'] = {**manifest.get('sheets', {}), **{_slug(s): s for s in result}}
+        manifest.update({'input': config.input_excel, 'saved_at': datetime.datetime.now().isoformat(timespec='seconds')})
+        with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, indent=1)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+        print(f"🗄️ History: {config.jenis.upper()} period {period} ({len(result)} sheet) -> {folder}")
+        return folder
+
+    @staticmethod
+    def _manifest(folder):
+        try:
+            with open(os.path.join(folder, MANIFEST_FILE), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def periods(self, jenis):
+        base = os.path.join(self.root, f"jenis={jenis}")
+        if not os.path.isdir(base):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(base) if name.startswith('period='))
+
+    def load(self, jenis, period, sheets=None):
+        """{sheet: DataFrame} untuk satu partisi (sheets: filter nama sheet)"""
+        folder = self.partition(jenis, period)
+        manifest = self._manifest(folder)
+        if not manifest:
+            raise ValueError(f"Tidak ada history {jenis.upper()} period {period} di {self.root}")
+        wanted = {s.lower() for s in sheets} if sheets else None
+        return {
+            sheet: pd.read_parquet(os.path.join(folder, f"{slug}.parquet"))
+            for slug, sheet in manifest['sheets'].items()
+            if wanted is None or sheet.lower() in wanted
+        }
+
+    def delta(self, jenis, period_a, period_b, sheets=None):
+        """
+        Pergerakan product x measure dari period_a ke period_b.
+
+        Returns:
+            DataFrame sheet, product, measure, value_a, value_b, delta, delta_pct
+            (product yang hanya ada di satu period tetap muncul), urut |delta| terbesar
+        """
+        frames = []
+        for period, label in ((period_a, 'value_a'), (period_b, 'value_b')):
+            loaded = self.load(jenis, period, sheets)
+            parts = [m for m in (measures(df, sheet) for sheet, df in loaded.items()) if not m.empty]
+            long = pd.concat(parts, ignore_index=True) if parts else measures(pd.DataFrame(), None)
+            frames.append(long.rename(columns={'value': label}))
+
+        keys = ['sheet', 'product', 'measure']
+        delta = pd.merge(frames[0], frames[1], on=keys, how='outer')
+        delta['delta'] = delta['value_b'].fillna(0) - delta['value_a'].fillna(0)
+        delta['delta_pct'] = delta['delta'] / delta['value_a'].abs().where(delta['value_a'] != 0)
+        order = delta['delta'].abs().sort_values(ascending=False, kind='stable').index
+        return delta.loc[order].reset_index(drop=True)
+
+
+def _main(argv):
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    store = HistoryStore(options.get('root'))
+
+    if len(args) == 2 and args[0] == 'periods':
+        print('\n'.join(store.periods(args[1])) or f"Belum ada history {args[1].upper()}")
+        return 0
+    if len(args) != 4 or args[0] != 'delta':
+        print(__doc__)
+        return 1
+
+    _, jenis, period_a, period_b = args
+    t0 = time.perf_counter()
+    try:
+        delta = store.delta(jenis, period_a, period_b,
+                            options['sheet'].split(',') if 'sheet' in options else None)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - t0
+
+    moved = delta[delta['delta'] != 0]
+    print(f"📈 Delta {jenis.upper()} {period_a} -> {period_b}: {len(moved)} dari {len(delta)} "
+          f"product x measure berubah ({elapsed:.3f} detik)")
+    with pd.option_context('display.width', 200, 'display.max_columns', 10):
+        print(moved.head(int(options.get('top', 30))).to_string(index=False))
+    if 'out' in options:
+        delta.to_csv(options['out'], index=False)
+        print(f"💾 Delta lengkap: {options['out']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
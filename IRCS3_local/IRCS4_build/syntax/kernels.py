@@ -0,0 +1,477 @@
+"""
+Per-file kernels yang dijalankan di pool worker.
+
+Modul ini sengaja ringan: hanya stdlib di top-level, library reader (openpyxl /
+python-calamine, lihat syntax.readers) di-import saat pertama dipakai atau di-warm oleh
+init_worker. Jangan import pandas / syntax.control_4_* di sini, supaya worker yang
+di-spawn (Windows) tidak ikut memuat pandas.
+
+Semua filter (Speed Duration / Include Year / Exclude Year / C_sar) di-resolve di
+parent dan dikirim sebagai dict biasa, bukan DataFrame. Setiap task adalah dict dengan
+key 'reader' untuk backend yang dipakai ('openpyxl', 'calamine' atau 'auto').
+
+Kernel tidak print: warning / error dan counter per file dikirim sebagai record
+terstruktur (syntax.runlog) ke listener di parent, tidak pernah dari loop per baris.
+
+Setiap kernel mengembalikan (hasil, statistik scan): baris yang di-scan, baris yang
+dibuang per tahap filter, dan per measure jumlah nilai parsed / tidak bisa di-parse /
+nol beserta min / max. Statistik dihitung di loop yang sama dengan penjumlahan.
+"""
+import math
+import os
+import re
+import time
+import traceback
+
+from syntax.goc_filter import compile_filter
+from syntax.readers import open_source, source_base_name, warm_backend
+from syntax.runlog import attach_worker, log_event
+
+_worker_info = {'pid': None, 'reader': None, 'import_seconds': None, 'ready_at': None}
+# Queue scheduler: guarded_call melapor (token, timestamp) saat task mulai jalan di worker
+_started_queue = None
+
+
+def init_worker(reader='openpyxl', log_queue=None, started_queue=None):
+    """
+    Pool initializer: warm hanya dependency kernel (library reader), catat waktu import.
+    log_queue: queue run log parent (syntax.runlog.worker_queue) untuk record worker.
+    started_queue: queue scheduler untuk sinyal task mulai (lihat guarded_call).
+    """
+    global _started_queue
+    _started_queue = started_queue
+    attach_worker(log_queue)
+    t0 = time.perf_counter()
+    _worker_info['reader'] = warm_backend(reader)
+    _worker_info['pid'] = os.getpid()
+    _worker_info['import_seconds'] = time.perf_counter() - t0
+    _worker_info['ready_at'] = time.time()
+
+
+def worker_info(_=None):
+    """Probe task: kembalikan pid, waktu import kernel dan timestamp worker siap"""
+    if _worker_info['pid'] is None:
+        init_worker()
+    return dict(_worker_info)
+
+
+def parse_numeric_fast(val):
+    if val is None or val == '':
+        return None
+    if isinstance(val, (int, float)):
+        return float(val)
+
+    if isinstance(val, str):
+        s = val.strip()
+        if not s or s.lower() in ['none', 'nan', 'n/a', '-', '--']:
+            return None
+        # angka biasa / notasi ilmiah (CSV: '1.23E+10') langsung, sebelum karakter dibuang
+        try:
+            result = float(s)
+        except ValueError:
+            pass
+        else:
+            if math.isfinite(result):
+                return result
+        s = s.replace('\xa0', '').replace(' ', '').replace('\u202f','')
+        s = s.replace('−', '-')
+        s = re.sub(r'[^\d,.\-()%]', '', s)
+        is_percent = s.endswith('%')
+        if is_percent:
+            s = s[:-1]
+        is_negative = False
+        if s.startswith('(') and s.endswith(')'):
+            is_negative = True
+            s = s[1:-1]
+
+        comma_count = s.count(',')
+        dot_count = s.count('.')
+
+        try:
+            if comma_count > 1 and dot_count == 1 and s.rfind('.') > s.rfind(','):
+                result = float(s.replace(',', ''))
+            elif comma_count == 1 and dot_count > 0 and s.rfind(',') > s.rfind('.'):
+                result = float(s.replace('.', '').replace(',', '.'))
+            elif dot_count == 0 and comma_count == 1:
+                result = float(s.replace(',', '.'))
+            elif dot_count > 1 and comma_count == 0:
+                result = float(s.replace('.', ''))
+            elif comma_count == 0 and dot_count <= 1:
+                result = float(s)
+            else:
+                result = float(s.replace(',', '').replace('.', ''))
+
+            if is_negative:
+                result = -result
+            if is_percent:
+                result /= 100.0
+
+            return result
+
+        except ValueError:
+            return None
+
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def _measure_stats(columns):
+    """Counter per measure: [parsed, unparseable, zero, min, max]"""
+    return {col: [0, 0, 0, float('inf'), float('-inf')] for col in columns}
+
+
+def scan_stats(stage, file_name, rows, measures, dropped=None, thresholds=None):
+    """
+    Record statistik scan satu file.
+
+    dropped    : {tahap filter: baris dibuang} untuk semua measure (GOC, period kosong)
+    thresholds : {measure: (nama threshold, baris dibuang)} untuk filter per grup
+    """
+    thresholds = thresholds or {}
+    return {
+        'stage': stage,
+        'file': file_name,
+        'rows': rows,
+        'dropped': dict(dropped or {}),
+        'measures': {
+            col: {'threshold': thresholds.get(col, (None, 0))[0],
+                  'dropped_threshold': thresholds.get(col, (None, 0))[1],
+                  'parsed': st[0], 'unparseable': st[1], 'zero': st[2],
+                  'min': st[3] if st[0] else None, 'max': st[4] if st[0] else None}
+            for col, st in measures.items()
+        },
+    }
+
+
+def process_argo_file(args):
+    """
+    ARGO: jumlahkan kolom di Sheet1.
+
+    args: {'file_path', 'columns', 'layout', 'reader'}
+      layout : header Sheet1 hasil preflight ({'header_row', 'columns'}) atau None
+
+    Returns:
+        (dict sums + File_Name, statistik scan)
+    """
+    file_path, columns, layout = args['file_path'], args['columns'], args.get('layout')
+    file_name_argo = source_base_name(file_path)
+
+    wb = open_source(file_path, args.get('reader'))
+    try:
+        if layout:
+            header_index = layout['columns']
+            wanted = {header_index[c.lower()] for c in columns if c.lower() in header_index}
+            data = wb.iter_rows(layout.get('sheet', 'Sheet1'), min_row=layout['header_row'] + 1, columns=wanted)
+        else:
+            data = list(wb.iter_rows('Sheet1'))
+            if not data:
+                log_event('error', "File kosong", stage='argo', file=file_name_argo)
+                return {'File_Name': file_name_argo}, scan_stats('argo', file_name_argo, 0, {})
+            header_index = {}
+            for i, h in enumerate(data[0]):
+                header_index.setdefault(str(h).strip().lower(), i)
+            data = data[1:]
+
+        col_index = {col: header_index[col.lower()] for col in columns if col.lower() in header_index}
+        missing = [col for col in columns if col not in col_index]
+        if missing:
+            log_event('warning', "Kolom tidak ditemukan", stage='argo', file=file_name_argo, columns=missing)
+
+        sums = {col: 0 for col in col_index}
+        stats = _measure_stats(col_index)
+        row_count = 0
+
+        for row in data:
+            row_count += 1
+            for col, idx in col_index.items():
+                if idx < len(row):
+                    val = row[idx]
+                    parsed_val = parse_numeric_fast(val)
+                    st = stats[col]
+                    if parsed_val is None:
+                        if val is not None and val != '':
+                            st[1] += 1
+                        continue
+                    sums[col] += parsed_val
+                    st[0] += 1
+                    if parsed_val == 0:
+                        st[2] += 1
+                    if parsed_val < st[3]:
+                        st[3] = parsed_val
+                    if parsed_val > st[4]:
+                        st[4] = parsed_val
+    finally:
+        wb.close()
+
+    log_event('info', "File selesai", stage='argo', file=file_name_argo, rows=row_count,
+              parsed=sum(st[0] for st in stats.values()), unparseable=sum(st[1] for st in stats.values()))
+    sums['File_Name'] = file_name_argo
+    return sums, scan_stats('argo', file_name_argo, row_count, stats)
+
+
+def process_extraction_file(args):
+    """
+    RAFM / UVSG (trad, ul): jumlahkan sheet extraction dengan filter GOC dan period.
+
+    args: {'file_path', 'file_name', 'spec', 'groups', 'sheets', 'layout', 'reader', 'stage',
+           'duplicates', 'exact_sheets', 'none_goc'}
+      stage  : label run log ('rafm' / 'uvsg')
+      spec   : dict {'speed', 'include', 'exclude', 'sar'} dari sheet Filter; include /
+               exclude adalah ekspresi filter GOC (lihat syntax.goc_filter), di-compile
+               sekali per file
+      groups : tuple (threshold, columns) per grup hasil, threshold salah satu
+               'speed' (period > speed), 'nonneg' (period >= 0), 'sar' (period >= sar)
+      sheets : nama sheet extraction yang dibaca
+      layout : {sheet: {'sheet', 'header_row', 'columns'}} hasil preflight atau None
+      duplicates   : header kembar -> kolom 'first' (default) atau 'last' (reader lama trad RAFM / ul)
+      exact_sheets : nama sheet harus sama persis (reader lama ul), default case-insensitive
+      none_goc     : nilai GOC untuk cell kosong saat filter dicocokkan ('' atau 'None' seperti ul)
+
+    Returns:
+        (tuple dict per grup masing-masing berisi File_Name, statistik scan). File yang
+        tidak bisa dibaca raise; scheduler yang mencatat status, retry dan hasil pengganti.
+    """
+    file_path, file_name = args['file_path'], args['file_name']
+    spec, groups, sheets, layout = args['spec'], args['groups'], args['sheets'], args.get('layout')
+    wb = None
+    try:
+        speed = spec['speed']
+        goc_filter = compile_filter(spec['include'], spec['exclude'])
+        goc_memo = goc_filter.goc_memo
+        period_filter = goc_filter.has_period_filter
+        sar = spec.get('sar', 0)
+
+        group_sums = [{col: 0.0 for col in columns} for _, columns in groups]
+        stats = _measure_stats(col for _, columns in groups for col in columns)
+        dropped = {'goc_filter': 0, 'no_period': 0, 'period_filter': 0}
+        group_dropped = [0] * len(groups)
+        expected = {'goc', 'period'}
+        for _, columns in groups:
+            expected.update(c.lower() for c in columns)
+
+        keep_last = args.get('duplicates') == 'last'
+        none_goc = args.get('none_goc', '')
+        wb = open_source(file_path, args.get('reader'))
+        stage = args.get('stage', 'extraction')
+        counters = {'sheets': 0, 'rows': 0}
+
+        for sheet_name, matched_sheet in wb.sheets_for(sheets, exact=args.get('exact_sheets', False)):
+            try:
+                sheet_layout = layout.get(sheet_name) if layout is not None else None
+                if layout is not None and sheet_layout is None:
+                    # preflight: sheet tidak ada / tanpa header GOC
+                    continue
+
+                if sheet_layout:
+                    col_index = {k: v for k, v in sheet_layout['columns'].items() if k in expected}
+                    data = wb.iter_rows(sheet_layout['sheet'], min_row=sheet_layout['header_row'] + 1,
+                                        columns=set(col_index.values()))
+                else:
+                    data = list(wb.iter_rows(matched_sheet))
+                    if not data:
+                        continue
+                    col_index = {}
+                    for i, col in enumerate(data[0]):
+                        col_name = str(col).strip().lower() if col is not None else ''
+                        if col_name in expected and (keep_last or col_name not in col_index):
+                            col_index[col_name] = i
+                    data = data[1:]
+
+                if 'goc' not in col_index:
+                    log_event('warning', "Kolom GOC tidak ditemukan, sheet dilewati", stage=stage,
+                              file=file_name, sheet=sheet_name)
+                    continue
+
+                counters['sheets'] += 1
+                idx_goc = col_index['goc']
+                period_idx = col_index.get('period')
+                group_index = [
+                    [(col, col_index[col.lower()]) for col in columns if col.lower() in col_index]
+                    for _, columns in groups
+                ]
+
+                for row in data:
+                    counters['rows'] += 1
+                    val_goc = ''
+                    if idx_goc < len(row):
+                        val_goc = str(row[idx_goc]) if row[idx_goc] is not None else none_goc
+
+                    period_value = None
+                    if period_idx is not None and period_idx < len(row):
+                        period_value = parse_numeric_fast(row[period_idx])
+                        if period_value is not None:
+                            period_value = int(period_value)
+
+                    allowed = goc_memo.get(val_goc)
+                    if allowed is None:
+                        allowed = goc_filter.allows_goc(val_goc)
+                    if not allowed:
+                        dropped['goc_filter'] += 1
+                        continue
+                    if period_value is None:
+                        dropped['no_period'] += 1
+                        continue
+                    if period_filter and not goc_filter.allows_period(period_value):
+                        dropped['period_filter'] += 1
+                        continue
+
+                    for g, ((threshold, _), sums, indexed) in enumerate(zip(groups, group_sums, group_index)):
+                        if threshold == 'speed':
+                            take = period_value > speed
+                        elif threshold == 'sar':
+                            take = period_value >= sar
+                        else:
+                            take = period_value >= 0
+                        if not take:
+                            group_dropped[g] += 1
+                            continue
+                        for col, idx in indexed:
+                            if idx < len(row):
+                                raw = row[idx]
+                                v = parse_numeric_fast(raw)
+                                st = stats[col]
+                                if v is None:
+                                    if raw is not None and raw != '':
+                                        st[1] += 1
+                                    continue
+                                st[0] += 1
+                                if v != 0:
+                                    sums[col] += v
+                                else:
+                                    st[2] += 1
+                                if v < st[3]:
+                                    st[3] = v
+                                if v > st[4]:
+                                    st[4] = v
+
+            except Exception as e:
+                log_event('error', f"Sheet gagal diproses: {type(e).__name__}: {e}", stage=stage,
+                          file=file_name, sheet=sheet_name, traceback=traceback.format_exc())
+                continue
+
+        log_event('info', "File selesai", stage=stage, file=file_name, **counters, **dropped)
+        for sums in group_sums:
+            sums['File_Name'] = file_name
+        thresholds = {col: (threshold, n) for (threshold, columns), n in zip(groups, group_dropped)
+                      for col in columns}
+        return tuple(group_sums), scan_stats(stage, file_name, counters['rows'], stats, dropped, thresholds)
+    finally:
+        if wb is not None:
+            wb.close()
+
+
+def process_reas_rafm_file(args):
+    """
+    RAFM reas: header dicari (kolom GOC) dalam 20 baris pertama, tanpa filter.
+
+    args: {'file_path', 'file_name', 'columns', 'sheets', 'layout', 'reader'}
+      layout : {sheet: {'sheet', 'header_row', 'columns'}} hasil preflight atau None
+
+    Returns:
+        (dict sums + File_Name, statistik scan)
+    """
+    file_path, file_name = args['file_path'], args['file_name']
+    columns, sheets, layout = args['columns'], args['sheets'], args.get('layout')
+    total_sums = {col: 0 for col in columns}
+    stats = _measure_stats(columns)
+    row_count = 0
+
+    wb = open_source(file_path, args.get('reader'))
+
+    for sheet_name, actual_sheet in wb.sheets_for(sheets, exact=True):
+        try:
+            lower_targets = [c.lower() for c in columns]
+            sheet_layout = layout.get(sheet_name) if layout is not None else None
+            if sheet_layout:
+                col_index = {k: v for k, v in sheet_layout['columns'].items() if k in lower_targets}
+                rows = wb.iter_rows(actual_sheet, min_row=sheet_layout['header_row'] + 1,
+                                    columns=set(col_index.values()))
+                data_start = []
+            else:
+                rows = iter(wb.iter_rows(actual_sheet))
+                header = None
+                for _ in range(20):
+                    raw = next(rows, [])
+                    cleaned = [str(h).strip().lower() if h else '' for h in raw]
+                    if 'goc' in cleaned:
+                        header = cleaned
+                        break
+
+                if not header:
+                    log_event('warning', "Kolom GOC tidak ditemukan dalam 20 baris pertama, sheet dilewati",
+                              stage='reas rafm', file=file_name, sheet=sheet_name)
+                    continue
+                data_start = []
+                for _ in range(3):
+                    peek = next(rows, [])
+                    if any(peek):
+                        data_start = [peek]
+                        break
+                col_index = {}
+                for i, col in enumerate(header):
+                    if col in lower_targets:
+                        col_index[col] = i
+            for row in data_start + list(rows):
+                row_count += 1
+                for col in columns:
+                    idx = col_index.get(col.lower())
+                    if idx is not None and idx < len(row):
+                        raw = row[idx]
+                        parsed_val = parse_numeric_fast(raw)
+                        st = stats[col]
+                        if parsed_val is None:
+                            if raw is not None and raw != '':
+                                st[1] += 1
+                            continue
+                        st[0] += 1
+                        if parsed_val != 0:
+                            total_sums[col] += parsed_val
+                        else:
+                            st[2] += 1
+                        if parsed_val < st[3]:
+                            st[3] = parsed_val
+                        if parsed_val > st[4]:
+                            st[4] = parsed_val
+
+        except Exception as e:
+            log_event('error', f"Sheet gagal diproses: {type(e).__name__}: {e}", stage='reas rafm',
+                      file=file_name, sheet=sheet_name, traceback=traceback.format_exc())
+            continue
+
+    wb.close()
+    log_event('info', "File selesai", stage='reas rafm', file=file_name, rows=row_count)
+    total_sums['File_Name'] = file_name
+    return total_sums, scan_stats('reas rafm', file_name, row_count, stats)
+
+
+def guarded_call(fn, args, token=None):
+    """
+    Wrapper task di worker: error kernel dikembalikan sebagai status, bukan exception,
+    supaya parent bisa membedakan file rusak dari worker yang crash. Dengan token,
+    waktu mulai dikirim ke scheduler (task yang masih antre di pool belum terhitung).
+
+    Returns:
+        (status 'ok' / 'failed', hasil, pesan error, detik)
+    """
+    if token is not None and _started_queue is not None:
+        _started_queue.put((token, os.getpid(), time.time()))
+    t0 = time.perf_counter()
+    try:
+        return 'ok', fn(args), None, time.perf_counter() - t0
+    except Exception as e:
+        return 'failed', None, f"{type(e).__name__}: {e}", time.perf_counter() - t0
+
+
+def failure_result(fn, args):
+    """
+    Hasil pengganti untuk file yang tetap gagal (sama dengan hasil kernel lama saat
+    error), tanpa statistik scan
+    """
+    file_name = args.get('file_name') or source_base_name(args['file_path'])
+    if fn is process_argo_file:
+        return {'File_Name': file_name}, None
+    if fn is process_reas_rafm_file:
+        return {**{col: 0 for col in args['columns']}, 'File_Name': file_name}, None
+    return None, None
@@ -1,26 +1,40 @@
+import glob
 import os
 import pandas as pd
-from xlsxwriter.utility import xl_col_to_name
 import syntax.control_4_trad as trad
 import syntax.control_4_ul as ul
 import syntax.control_4_reas as reas
+from syntax.scheduler import BatchScheduler, TaskLog
+from syntax.run_config import SOURCE_FOLDERS, load_run_config
+from syntax.preflight import PREFLIGHT_MODES, PreflightError, run_preflight
+from syntax.readers import READER_BACKENDS, resolve_backend, source_base_name
+from syntax.prefetch import DEFAULT_MIRROR_MAX_GB, LocalMirror, Prefetcher
+from syntax.result_cache import ResultCache, select_specs
+from syntax.history import HistoryStore
+from syntax.runlog import RunLog, log_event
+from syntax.xlsx_writer import (FORMULA_MODES, checking_summary_block, checking_summary_formulas, style_plan,
+                                 write_workbook)
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
-import xlwings as xw
-from openpyxl import load_workbook
-from openpyxl.styles import Border, Side, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter
 import warnings
 import shutil
 import datetime
-import tempfile
-import subprocess
-import psutil
+import queue
+import threading
+import traceback
 
 # Suppress warnings untuk performa
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
+# Urutan sheet output per jenis (sheet lain di belakang)
+SHEET_ORDER = {
+    'trad': ['Control', 'Code', 'CF ARGO AZTRAD', 'RAFM Output AZTRAD', 'RAFM Output Manual',
+             'RAFM Output AZUL_PI', 'Checking Summary AZTRAD'],
+    'ul': ['Control', 'Code', 'CF ARGO AZUL', 'RAFM Output AZUL', 'RAFM Output Manual', 'Checking Summary AZUL'],
+    'reas': ['Control', 'Code', 'CF ARGO REAS', 'RAFM Output REAS', 'RAFM Output Manual', 'Checking Summary REAS'],
+}
+WRITERS = ('xlwings', 'headless', 'streaming')
+
 cols_to_sum_dict = {
     'trad': trad.cols_to_compare,
     'ul': ul.columns_to_sum_argo,
@@ -28,8 +42,18 @@ cols_to_sum_dict = {
 }
 
 
+def get_column_letter(col_idx):
+    """1-based column index -> huruf kolom Excel (tanpa perlu import openpyxl)"""
+    letters = ''
+    while col_idx > 0:
+        col_idx, rem = divmod(col_idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
 def kill_excel_processes():
     """Force close all Excel processes"""
+    import psutil  # lazy: hanya dibutuhkan di output stage
     try:
         for proc in psutil.process_iter(['pid', 'name']):
             try:
@@ -47,139 +71,32 @@ def kill_excel_processes():
 #  Fungsi styling & helpers
 # ============================
 
-def auto_adjust_column_width_xlwings(ws, df_sheet, sample_size=100):
-    """
-    Set column width based on the longest text in each column (xlwings).
-    No fixed maximum — mengikuti tulisan paling panjang.
-    """
-    if not hasattr(df_sheet, 'columns'):
-        return
-
-    # Determine number of header rows (Control may not have header)
-    header_offset = 0
-    if isinstance(df_sheet, pd.DataFrame) and df_sheet.shape[1] > 0:
-        header_offset = 1  # karena kita menulis header untuk non-Control sebagai baris 1
-
-    # iterate columns
-    for i, col in enumerate(df_sheet.columns):
-        try:
-            # sample header + sample data
-            samples = []
-            samples.append(str(col))
-            sample_vals = df_sheet[col].head(sample_size).astype(str).tolist()
-            samples.extend(sample_vals)
-            max_len = max(len(s) for s in samples)
-            adjusted_width = max(8, max_len + 2)  # minimal 8
-            # xlwings column index for setting width: use cell at first row in that column
-            # set via Range((row, col)).column_width
-            try:
-                ws.range((1, i + 1)).column_width = adjusted_width
-            except Exception:
-                # fallback: try setting via api
-                try:
-                    ws.api.Columns(i + 1).ColumnWidth = adjusted_width
-                except Exception:
-                    pass
-        except Exception:
-            try:
-                ws.range((1, i + 1)).column_width = 12
-            except Exception:
-                pass
-
-
-def apply_number_formats_xlwings(ws, df_sheet):
+def apply_style_plan_xlwings(ws, plan):
     """
-    Apply number formats:
-     - If column name contains 'speed duration' -> text (no number format)
-     - If column name contains 'include year' or 'exclude year' -> integer '0'
-     - Else -> accounting format
-    Uses xlwings Range.number_format
+    Terapkan style_plan (syntax.xlsx_writer) dengan operasi COM seminimal mungkin: satu
+    number format per range kolom berurutan, satu border untuk seluruh tabel, satu lebar
+    per range kolom dengan lebar sama. Tidak ada autofit (lebar sudah eksplisit).
     """
-    if not hasattr(df_sheet, 'columns'):
+    nrows, ncols = plan['rows'], plan['ncols']
+    if ncols < 1:
         return
+    if nrows > 1:
+        for first, last, number_format in plan['format_runs']:
+            ws.range((2, first), (nrows, last)).number_format = number_format
 
-    nrows = len(df_sheet) + 1  # +1 for header row
-    ncols = len(df_sheet.columns)
-
-    for col_idx, col_name in enumerate(df_sheet.columns, start=1):
-        col_letter = get_column_letter(col_idx)
-        col_name_lower = str(col_name).lower()
-
-        if 'speed duration' in col_name_lower:
-            number_format = '@'  # text / no format
-        elif 'include year' in col_name_lower or 'exclude year' in col_name_lower:
-            number_format = '0'  # integer
-        else:
-            number_format = '_-* #,##0_-;_-* (#,##0);_-* "-"_-;_-@_-'
-
-        try:
-            rng = ws.range(f"{col_letter}2:{col_letter}{nrows}")
-            rng.number_format = number_format
-        except Exception:
-            # fallback: try applying to column via api
-            try:
-                rng_api = ws.api.Range(f"{col_letter}2:{col_letter}{nrows}")
-                rng_api.NumberFormat = number_format
-            except Exception:
-                pass
-
-
-def apply_border_xlwings(ws, df_sheet):
-    """
-    Apply thin black border around the used table (A1:lastcol lastrow)
-    """
-    try:
-        nrows = len(df_sheet) + 1
-        ncols = len(df_sheet.columns)
-        if nrows < 1 or ncols < 1:
-            return
-        last_cell = f"{get_column_letter(ncols)}{nrows}"
-        full_range = ws.range(f"A1:{last_cell}")
-        full_range.api.Borders.LineStyle = 1  # xlContinuous
-        full_range.api.Borders.Weight = 2     # xlThin
-    except Exception:
-        try:
-            # alternative: loop cells (slower) - but keep best-effort
-            nrows = len(df_sheet) + 1
-            ncols = len(df_sheet.columns)
-            for r in range(1, nrows + 1):
-                for c in range(1, ncols + 1):
-                    try:
-                        cell = ws.api.Cells(r, c)
-                        cell.Borders.LineStyle = 1
-                        cell.Borders.Weight = 2
-                    except Exception:
-                        pass
-        except Exception:
-            pass
-
+    full_range = ws.range((1, 1), (nrows, ncols))
+    full_range.api.Borders.LineStyle = 1  # xlContinuous
+    full_range.api.Borders.Weight = 2     # xlThin
 
-def apply_accounting_to_all_xlwings(ws, df_sheet):
-    """
-    Apply accounting format to all numeric columns (used for Checking Summary)
-    """
-    if not hasattr(df_sheet, 'columns'):
-        return
-    nrows = len(df_sheet) + 1
-    ncols = len(df_sheet.columns)
-    for col_idx in range(1, ncols + 1):
-        col_letter = get_column_letter(col_idx)
-        try:
-            data_range = ws.range(f'{col_letter}2:{col_letter}{nrows}')
-            data_range.number_format = '_-* #,##0_-;_-* (#,##0);_-* "-"_-;_-@_-'
-        except Exception:
-            try:
-                rng_api = ws.api.Range(f'{col_letter}2:{col_letter}{nrows}')
-                rng_api.NumberFormat = '_-* #,##0_-;_-* (#,##0);_-* "-"_-;_-@_-'
-            except Exception:
-                pass
+    for first, last, width in plan['width_runs']:
+        ws.range((1, first), (1, last)).column_width = width
 
 
 # ======================================
 # Existing logic (preserved) - checking formulas and main flow
 # ======================================
 
-def write_checking_summary_formulas_xlwings(ws, df_sheet, jenis, start_row=2):
+def write_checking_summary_formulas_xlwings(ws, df_sheet, jenis, start_row=2, formula_mode='cell'):
     """
     Tulis formula checking summary menggunakan xlwings
 
@@ -188,97 +105,59 @@ def write_checking_summary_formulas_xlwings(ws, df_sheet, jenis, start_row=2):
         df_sheet: DataFrame checking summary
         jenis: 'trad', 'ul', atau 'reas'
         start_row: Baris mulai data (default=2, karena row 1 = header)
+        formula_mode: 'cell' (formula per sel) atau 'shared' (formula kiri atas di-assign ke
+            seluruh blok sekaligus, Excel menggeser referensi relatif per sel)
     """
-    sheet_names = {
-        'trad': {
-            'cf_argo': 'CF ARGO AZTRAD',
-            'cf_rafm': 'RAFM Output AZTRAD',
-            'rafm_manual': 'RAFM Output Manual',
-            'uvsg': 'RAFM Output AZUL_PI'
-        },
-        'ul': {
-            'cf_argo': 'CF ARGO AZUL',
-            'cf_rafm': 'RAFM Output AZUL',
-            'rafm_manual': 'RAFM Output Manual'
-        },
-        'reas': {
-            'cf_argo': 'CF ARGO REAS',
-            'cf_rafm': 'RAFM Output REAS',
-            'rafm_manual': 'RAFM Output Manual'
-        }
-    }
+    if formula_mode == 'shared':
+        block = checking_summary_block(jenis, len(df_sheet), len(df_sheet.columns), start_row)
+        if block is not None:
+            ws.range(block[1]).formula = block[2]
+        return
+
+    for row_excel, col_idx, formula in checking_summary_formulas(jenis, len(df_sheet), len(df_sheet.columns),
+                                                                 start_row):
+        ws.range(f"{get_column_letter(col_idx)}{row_excel}").formula = formula
+
+
+def prepare_output_file(output_path, output_filename):
+    """
+    Path output: file lama dihapus (force close Excel jika terkunci), atau nama alternatif
+    dengan timestamp jika tetap terkunci
+    """
+    # Create output directory
+    os.makedirs(output_path, exist_ok=True)
+    output_file = os.path.join(output_path, output_filename)
+
+    if os.path.exists(output_file):
+        print(f"  ↳ File sudah ada, mencoba hapus...")
+        try:
+            os.remove(output_file)
+            print(f"  ✓ File lama berhasil dihapus")
+        except PermissionError:
+            print(f"  ⚠️ File sedang digunakan, force close Excel...")
+            kill_excel_processes()
 
-    nrows = len(df_sheet)
-    ncols = len(df_sheet.columns)
-
-    # Tentukan kolom mulai formula dan offset
-    if jenis == 'trad':
-        start_col_idx = 5  # Kolom E
-        cf_argo_col_offset = 3  # Kolom C
-        cf_rafm_col_offset = 7  # Kolom G
-        rafm_manual_col_offset = 7
-        uvsg_col_offset = 7
-    elif jenis == 'ul':
-        start_col_idx = 4  # Kolom D
-        cf_argo_col_offset = 3  # Kolom C
-        cf_rafm_col_offset = 6  # Kolom F
-        rafm_manual_col_offset = 6
-    else:  # reas
-        start_col_idx = 4  # Kolom D
-        cf_argo_col_offset = 3  # Kolom C
-        cf_rafm_col_offset = 3  # Kolom C
-        rafm_manual_col_offset = 3
-
-    # Loop per row
-    for row_idx in range(nrows):
-        row_excel = start_row + row_idx
-
-        # Loop per column
-        for col_idx in range(start_col_idx, ncols + 1):
-            relative_offset = col_idx - start_col_idx
-
-            if jenis == 'trad':
-                cf_argo_col = get_column_letter(cf_argo_col_offset + relative_offset)
-                cf_rafm_col = get_column_letter(cf_rafm_col_offset + relative_offset)
-                rafm_manual_col = get_column_letter(rafm_manual_col_offset + relative_offset)
-                uvsg_col = get_column_letter(uvsg_col_offset + relative_offset)
-
-                formula = (
-                    f"='{sheet_names['trad']['cf_argo']}'!{cf_argo_col}{row_excel}"
-                    f"-'{sheet_names['trad']['cf_rafm']}'!{cf_rafm_col}{row_excel}"
-                    f"+'{sheet_names['trad']['rafm_manual']}'!{rafm_manual_col}{row_excel}"
-                    f"-'{sheet_names['trad']['uvsg']}'!{uvsg_col}{row_excel}"
-                )
-            elif jenis == 'ul':
-                cf_argo_col = get_column_letter(cf_argo_col_offset + relative_offset)
-                cf_rafm_col = get_column_letter(cf_rafm_col_offset + relative_offset)
-                rafm_manual_col = get_column_letter(rafm_manual_col_offset + relative_offset)
-
-                formula = (
-                    f"='{sheet_names['ul']['cf_argo']}'!{cf_argo_col}{row_excel}"
-                    f"-'{sheet_names['ul']['cf_rafm']}'!{cf_rafm_col}{row_excel}"
-                    f"-'{sheet_names['ul']['rafm_manual']}'!{rafm_manual_col}{row_excel}"
-                )
-            else:  # reas
-                cf_argo_col = get_column_letter(cf_argo_col_offset + relative_offset)
-                cf_rafm_col = get_column_letter(cf_rafm_col_offset + relative_offset)
-                rafm_manual_col = get_column_letter(rafm_manual_col_offset + relative_offset)
-
-                formula = (
-                    f"='{sheet_names['reas']['cf_argo']}'!{cf_argo_col}{row_excel}"
-                    f"-'{sheet_names['reas']['cf_rafm']}'!{cf_rafm_col}{row_excel}"
-                    f"+'{sheet_names['reas']['rafm_manual']}'!{rafm_manual_col}{row_excel}"
-                )
-
-            # Write formula using xlwings
-            cell_address = f"{get_column_letter(col_idx)}{row_excel}"
-            ws.range(cell_address).formula = formula
-
-
-def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output_filename, jenis):
+            try:
+                os.remove(output_file)
+                print(f"  ✓ File lama berhasil dihapus setelah force close")
+            except PermissionError:
+                # Use alternative filename with timestamp
+                print(f"  ⚠️ File masih terkunci, menggunakan nama alternatif...")
+                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                base_name = os.path.splitext(output_filename)[0]
+                ext = os.path.splitext(output_filename)[1]
+                output_filename = f"{base_name}_{timestamp}{ext}"
+                output_file = os.path.join(output_path, output_filename)
+                print(f"  ↳ Nama baru: {output_filename}")
+    return output_file
+
+
+def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output_filename, jenis,
+                              formula_mode='cell'):
     """
     🔧 XLWINGS APPROACH: Gunakan Excel COM API untuk 100% compatibility
     Preserves ALL SharePoint links perfectly (no corruption!)
+    formula_mode: 'cell' / 'shared' untuk formula Checking Summary
     """
     app = None
     wb = None
@@ -291,32 +170,8 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
         print(f"\n🚀 Menambahkan sheet ke RAFM Output Manual (XLWINGS MODE)...")
         start_time = time.time()
 
-        # Create output directory
-        os.makedirs(output_path, exist_ok=True)
-        output_file = os.path.join(output_path, output_filename)
-
         # 🔧 STEP 1: Handle existing output file
-        if os.path.exists(output_file):
-            print(f"  ↳ File sudah ada, mencoba hapus...")
-            try:
-                os.remove(output_file)
-                print(f"  ✓ File lama berhasil dihapus")
-            except PermissionError:
-                print(f"  ⚠️ File sedang digunakan, force close Excel...")
-                kill_excel_processes()
-
-                try:
-                    os.remove(output_file)
-                    print(f"  ✓ File lama berhasil dihapus setelah force close")
-                except PermissionError:
-                    # Use alternative filename with timestamp
-                    print(f"  ⚠️ File masih terkunci, menggunakan nama alternatif...")
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                    base_name = os.path.splitext(output_filename)[0]
-                    ext = os.path.splitext(output_filename)[1]
-                    output_filename = f"{base_name}_{timestamp}{ext}"
-                    output_file = os.path.join(output_path, output_filename)
-                    print(f"  ↳ Nama baru: {output_filename}")
+        output_file = prepare_output_file(output_path, output_filename)
 
         # 🔧 STEP 2: Copy original file first (preserves metadata)
         print(f"  ↳ Copying original file...")
@@ -327,6 +182,7 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
 
         # 🔧 STEP 3: Open with xlwings (Excel COM API)
         print(f"  ↳ Starting Excel via COM API...")
+        import xlwings as xw  # lazy: tidak di-load untuk run yang tidak sampai output stage
         app = xw.App(visible=False)
         app.display_alerts = False
         app.screen_updating = False
@@ -343,29 +199,7 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
             print(f"  ↳ Menghapus 'Sheet1' duplikat...")
             wb.sheets['Sheet1'].delete()
 
-        # Order sheets berdasarkan jenis
-        if jenis == 'trad':
-            sheet_order = [
-                'Control', 'Code',
-                'CF ARGO AZTRAD', 'RAFM Output AZTRAD',
-                'RAFM Output Manual',
-                'RAFM Output AZUL_PI',
-                'Checking Summary AZTRAD'
-            ]
-        elif jenis == 'ul':
-            sheet_order = [
-                'Control', 'Code',
-                'CF ARGO AZUL', 'RAFM Output AZUL',
-                'RAFM Output Manual',
-                'Checking Summary AZUL'
-            ]
-        else:  # reas
-            sheet_order = [
-                'Control', 'Code',
-                'CF ARGO REAS', 'RAFM Output REAS',
-                'RAFM Output Manual',
-                'Checking Summary REAS'
-            ]
+        sheet_order = SHEET_ORDER.get(jenis, SHEET_ORDER['reas'])
 
         # 🔧 STEP 4: Add new sheets
         print(f"  ↳ Menambahkan {len(result_dict)} sheet baru...")
@@ -373,10 +207,12 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
         for sheet_name, df in result_dict.items():
             # 🚨 CRITICAL: Skip RAFM Output Manual
             if sheet_name == 'RAFM Output Manual':
-                print(f"    • {sheet_name}: SKIP (preserve existing)")
+                log_event('info', "Sheet dilewati (preserve existing)", stage='write', sheet=sheet_name)
                 continue
 
-            print(f"    • Menambahkan sheet: {sheet_name}")
+            t_sheet = time.time()
+            # Styling dihitung dari frame bertipe (sebelum dibersihkan jadi object)
+            plan = style_plan(sheet_name, df)
 
             # Clean DataFrame
             df = df.copy()
@@ -400,44 +236,21 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
                 data_with_header = [df.columns.tolist()] + df.values.tolist()
                 ws.range('A1').value = data_with_header
 
-            # -------------------------
-            # === Tambahkan formatting sesuai notes.py ===
-            # -------------------------
-            try:
-                apply_number_formats_xlwings(ws, df)
-            except Exception as e:
-                print(f"    ⚠️ Gagal apply_number_formats untuk {sheet_name}: {e}")
-
-            try:
-                apply_border_xlwings(ws, df)
-            except Exception as e:
-                print(f"    ⚠️ Gagal apply_border untuk {sheet_name}: {e}")
-
             try:
-                auto_adjust_column_width_xlwings(ws, df)
+                apply_style_plan_xlwings(ws, plan)
             except Exception as e:
-                print(f"    ⚠️ Gagal auto_adjust_column_width untuk {sheet_name}: {e}")
+                log_event('warning', f"Gagal apply styling: {e}", stage='write', sheet=sheet_name)
 
             # Write formulas for Checking Summary (preserve original logic)
             if sheet_name.startswith("Checking Summary"):
-                print(f"    • Menulis formula checking summary...")
-                try:
-                    write_checking_summary_formulas_xlwings(ws, df, jenis)
-                except Exception as e:
-                    print(f"    ⚠️ Gagal menulis formula checking summary untuk {sheet_name}: {e}")
-
-                # Setelah formula ditulis, pastikan semua angka diformat accounting
                 try:
-                    apply_accounting_to_all_xlwings(ws, df)
+                    write_checking_summary_formulas_xlwings(ws, df, jenis, formula_mode=formula_mode)
                 except Exception as e:
-                    print(f"    ⚠️ Gagal apply_accounting_to_all untuk {sheet_name}: {e}")
+                    log_event('warning', f"Gagal menulis formula checking summary: {e}", stage='write',
+                              sheet=sheet_name)
 
-            # Auto-fit columns (already attempted with auto_adjust, keep original step of autofit if available)
-            try:
-                ws.autofit(axis='columns')
-            except Exception:
-                # ignore if not supported in headless environment
-                pass
+            log_event('info', "Sheet ditulis", stage='write', sheet=sheet_name, rows=len(df),
+                      columns=len(df.columns), seconds=round(time.time() - t_sheet, 3))
 
         # 🔧 STEP 5: Reorder sheets
         print(f"  ↳ Mengurutkan sheets...")
@@ -493,6 +306,7 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
         # Force kill any remaining Excel processes
         time.sleep(1)
         try:
+            import psutil
             for proc in psutil.process_iter(['name']):
                 if proc.info['name'] and 'excel' in proc.info['name'].lower():
                     try:
@@ -503,132 +317,577 @@ def add_sheets_to_rafm_manual(rafm_manual_path, result_dict, output_path, output
             pass
 
 
-def process_input_file(file_path):
-    """Process single input file"""
+def add_sheets_to_rafm_manual_headless(rafm_manual_path, result_dict, output_path, output_filename, jenis,
+                                       scheduler=None, streaming=False, incremental=True, formula_mode='cell'):
+    """
+    Writer tanpa Excel (syntax.xlsx_writer): XML tiap sheet baru di-render paralel di pool
+    scheduler, lalu dirakit sekali dengan part RAFM Manual yang tidak berubah. Styling dan
+    formula sama dengan writer xlwings; formula dihitung Excel saat file dibuka.
+    streaming: sheet di-render baris per baris langsung dari frame ke zip (memori konstan).
+    incremental: output lama di-patch, hanya sheet yang isinya berubah yang ditulis ulang
+    (hash per sheet di sidecar '<output>.sheets.json').
+    formula_mode: 'cell' / 'shared' untuk formula Checking Summary.
+    """
+    if not os.path.exists(rafm_manual_path):
+        print(f"❌ File RAFM Manual tidak ditemukan: {rafm_manual_path}")
+        return None
+
+    print(f"\n🚀 Menambahkan sheet ke RAFM Output Manual ({'STREAMING' if streaming else 'HEADLESS'} MODE)...")
+    start_time = time.time()
+    sheet_order = SHEET_ORDER.get(jenis, SHEET_ORDER['reas'])
+    output_file = os.path.join(output_path, output_filename)
+    previous = output_file if incremental and os.path.exists(output_file) else None
+    try:
+        if streaming:
+            print(f"  ↳ Stream {len(result_dict)} sheet baris per baris ke workbook...")
+        else:
+            print(f"  ↳ Render {len(result_dict)} sheet paralel + rakit workbook...")
+        try:
+            if previous is None:
+                output_file = prepare_output_file(output_path, output_filename)
+            written = write_workbook(rafm_manual_path, result_dict, output_file, jenis, sheet_order,
+                                     scheduler, streaming, previous, formula_mode)
+        except PermissionError:
+            # Output lama terkunci (dibuka di Excel): tulis penuh lewat jalur force close / nama alternatif
+            print(f"  ⚠️ Output lama terkunci, tulis ulang penuh...")
+            output_file = prepare_output_file(output_path, output_filename)
+            written = write_workbook(rafm_manual_path, result_dict, output_file, jenis, sheet_order,
+                                     scheduler, streaming, formula_mode=formula_mode)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        traceback.print_exc()
+        return None
+
+    for sheet_name, df in result_dict.items():
+        if sheet_name in written:
+            log_event('info', "Sheet ditulis", stage='write', sheet=sheet_name, rows=len(df),
+                      columns=len(df.columns))
+    reused = [name for name in result_dict if name != 'RAFM Output Manual' and name not in written]
+    if reused:
+        print(f"  ↳ {len(written)} sheet ditulis ulang, {len(reused)} sheet tidak berubah (dipakai dari output lama)")
+    print(f"✅ Selesai dalam {time.time() - start_time:.2f} detik")
+    print(f"   📁 Output: {output_file}")
+    return output_file
+
+
+JENIS_MODULES = {'trad': trad, 'ul': ul, 'reas': reas}
+
+
+def _select_for(select, file_path):
+    """select bisa satu nilai untuk semua input atau dict per input (--retry-failed)"""
+    return select.get(file_path) if isinstance(select, dict) else select
+
+
+def preflight_inputs(files, mode='error', only=None, select=None):
+    """
+    Preflight header semua source file dari semua input sebelum compute dimulai.
+    Dengan only, hanya source folder yang dibutuhkan target itu yang dicek; dengan
+    select, hanya file baris Code yang terpilih.
+
+    Returns:
+        (layouts_by_input, failures) -- failures: {file_path: pesan error}
+    """
+    layouts_by_input, failures = {}, {}
+    if mode == 'off':
+        return layouts_by_input, failures
+
+    for file_path in files:
+        filename = os.path.basename(file_path)
+        try:
+            config = load_run_config(file_path)
+            print(f"📄 {filename} ({config.jenis.upper()})")
+            module = JENIS_MODULES[config.jenis]
+            specs = module.preflight_specs(config, module.PIPELINE.sources(only))
+            report = run_preflight(select_specs(specs, config.select_rows(_select_for(select, file_path))), mode)
+            layouts_by_input[file_path] = report.layouts
+        except PreflightError as e:
+            failures[file_path] = str(e)
+        except ValueError as e:
+            failures[file_path] = str(e)
+    return layouts_by_input, failures
+
+
+def prefetch_inputs(files, prefetcher, only=None, select=None):
+    """Jadwalkan copy source file semua input, urut sesuai urutan file task (argo, rafm, uvsg)"""
+    for file_path in files:
+        try:
+            config = load_run_config(file_path)
+            needed = JENIS_MODULES[config.jenis].PIPELINE.sources(only)
+            selection = config.select_rows(_select_for(select, file_path))
+        except ValueError:
+            continue
+        for source in SOURCE_FOLDERS[config.jenis]:
+            if source in needed and config.paths.get(source):
+                paths = config.source_files(source)
+                if selection is not None:
+                    paths = [f for f in paths if source_base_name(f).lower() in selection.get(source, ())]
+                prefetcher.start(paths)
+
+
+def compute_input_file(file_path, scheduler=None, layouts=None, prefetcher=None, only=None,
+                       select=None, cache=None, history=None, preflight='error'):
+    """
+    Tahap compute: baca input workbook sekali (RunConfig) lalu jalankan trad/ul/reas main.
+    File task dikirim ke scheduler (global worker budget) jika diberikan; layouts adalah
+    posisi header hasil preflight (None -> preflight dijalankan di dalam main jenis dengan
+    mode preflight yang sama; 'off' -> tidak dijalankan sama sekali).
+    Dengan prefetcher, file task membaca copy lokal source file. only membatasi output
+    sheet yang dihitung (lihat PIPELINE di tiap modul jenis). cache (ResultCache) dipakai
+    ulang untuk file yang tidak berubah; select membatasi file yang di-scan ulang. Dengan
+    history (HistoryStore) frame hasil disimpan per jenis / valuation period. Source file
+    yang tetap gagal setelah retry dicatat di job['failed_files'] (dan di cache untuk
+    --retry-failed); output tetap ditulis dengan nilai fallback untuk file itu.
+
+    Returns:
+        dict job (file_path, filename, jenis, config, result, output_path, output_filename,
+        rafm_manual_path, failed_files) atau None jika input tidak bisa diproses.
+    """
     filename = os.path.basename(file_path).lower()
+    try:
+        config = load_run_config(file_path)
+        JENIS_MODULES[config.jenis].PIPELINE.resolve_outputs(only)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
 
-    # Deteksi jenis
-    if 'trad' in filename:
-        jenis = 'trad'
-        result = trad.main({"input excel": file_path})
-    elif 'ul' in filename:
-        jenis = 'ul'
-        result = ul.main({"input excel": file_path})
-    elif 'reas' in filename:
-        jenis = 'reas'
-        result = reas.main({"input excel": file_path})
-    else:
-        print(f"❌ Jenis file tidak dikenali: {filename}")
-        return
+    jenis = config.jenis
+    missing = config.missing_output_entries()
+    if missing:
+        print(f"⚠️ Missing di File Path sheet: {missing}")
+        return None
+
+    reader = scheduler.reader if scheduler is not None else 'openpyxl'
+    task_log = TaskLog()
+    result = JENIS_MODULES[jenis].main({"input excel": file_path, "config": config,
+                                        "scheduler": scheduler, "layouts": layouts,
+                                        "reader": reader, "prefetcher": prefetcher, "only": only,
+                                        "select": _select_for(select, file_path), "cache": cache,
+                                        "task_log": task_log, "preflight": preflight})
+    failed_files = task_log.failed()
+    if task_log.retried():
+        print(f"🔁 {task_log.retried()} file berhasil setelah retry")
+    if failed_files:
+        print(f"⚠️ {len(failed_files)} source file gagal (nilai fallback di output): {', '.join(failed_files)}")
+    if cache is not None:
+        cache.save_failures(file_path, failed_files)
+    if history is not None:
+        try:
+            history.save(config, result)
+        except Exception as e:
+            print(f"⚠️ History gagal disimpan: {e}")
 
     print(f"\n{'='*60}")
     print(f"📄 PROCESSING: {filename}")
     print(f"   Jenis: {jenis.upper()}")
     print(f"{'='*60}")
 
-    # Baca File Path sheet
-    try:
-        df = pd.read_excel(file_path, sheet_name='File Path')
-    except Exception as e:
-        print(f"⚠️ Tidak bisa membaca sheet 'File Path': {e}")
-        return
-
-    df.columns = df.columns.str.strip()
-    df['Name'] = df['Name'].astype(str).str.strip().str.lower()
-    df['File Path'] = df['File Path'].astype(str).str.strip()
-
-    # Validasi required fields
-    required = ['output_path', 'output_filename', 'rafm manual']
-    missing = [r for r in required if r not in df['Name'].values]
-    if missing:
-        print(f"⚠️ Missing di File Path sheet: {missing}")
-        return
+    return {
+        'file_path': file_path,
+        'filename': filename,
+        'jenis': jenis,
+        'config': config,
+        'result': result,
+        'output_path': config.output_path,
+        'output_filename': config.output_filename,
+        'rafm_manual_path': config.rafm_manual,
+        'failed_files': failed_files,
+    }
 
-    # Get paths
-    output_path = df.loc[df['Name']=='output_path', 'File Path'].values[0]
-    output_filename = df.loc[df['Name']=='output_filename', 'File Path'].values[0]
-    rafm_manual_path = df.loc[df['Name']=='rafm manual', 'File Path'].values[0]
 
-    # Proses: Tambahkan sheets ke RAFM Manual
-    output_file = add_sheets_to_rafm_manual(
-        rafm_manual_path=rafm_manual_path,
-        result_dict=result,
-        output_path=output_path,
-        output_filename=output_filename,
-        jenis=jenis
-    )
+def write_input_result(job, writer='xlwings', scheduler=None, incremental=True, formula_mode='cell'):
+    """
+    Tahap output: tambahkan sheets hasil compute ke RAFM Manual.
+    writer 'xlwings' (serial, Excel COM), 'headless' (render sheet paralel di scheduler) atau
+    'streaming' (baris per baris dari frame, memori konstan). incremental (writer tanpa Excel):
+    hanya sheet yang berubah sejak output terakhir yang ditulis ulang. formula_mode: 'cell' /
+    'shared' untuk formula Checking Summary.
+    """
+    if writer in ('headless', 'streaming'):
+        output_file = add_sheets_to_rafm_manual_headless(
+            rafm_manual_path=job['rafm_manual_path'],
+            result_dict=job['result'],
+            output_path=job['output_path'],
+            output_filename=job['output_filename'],
+            jenis=job['jenis'],
+            scheduler=scheduler,
+            streaming=writer == 'streaming',
+            incremental=incremental,
+            formula_mode=formula_mode
+        )
+    else:
+        output_file = add_sheets_to_rafm_manual(
+            rafm_manual_path=job['rafm_manual_path'],
+            result_dict=job['result'],
+            output_path=job['output_path'],
+            output_filename=job['output_filename'],
+            jenis=job['jenis'],
+            formula_mode=formula_mode
+        )
 
     if output_file:
         print(f"\n🎉 SUCCESS: {os.path.basename(output_file)}")
     else:
-        print(f"\n❌ FAILED: {filename}")
+        print(f"\n❌ FAILED: {job['filename']}")
+    return output_file
 
 
-def main(input_path):
-    """Main entry point - SEQUENTIAL processing for xlwings compatibility"""
-    print("\n" + "="*60)
-    print("🔧 CONTROL 4 - RAFM OUTPUT PROCESSOR (XLWINGS MODE)")
-    print("="*60)
+def process_input_file(file_path, scheduler=None, layouts=None, prefetcher=None, only=None,
+                       select=None, cache=None, history=None, writer='xlwings', incremental=True,
+                       formula_mode='cell', preflight='error'):
+    """
+    Process single input file
 
-    start_time = time.time()
+    Returns:
+        (output_file, failed_files) -- output_file None jika gagal
+    """
+    job = compute_input_file(file_path, scheduler, layouts, prefetcher, only, select, cache, history, preflight)
+    if job is None:
+        return None, []
+    return write_input_result(job, writer, scheduler, incremental, formula_mode), job['failed_files']
 
-    # Deteksi input
+
+def run_pipelined(files, scheduler=None, queue_size=2, compute_concurrency=1, layouts_by_input=None,
+                  prefetcher=None, only=None, select=None, cache=None, history=None, writer='xlwings',
+                  incremental=True, formula_mode='cell', preflight='error'):
+    """
+    Pipelined batch: compute input N+1 di background thread selagi output input N ditulis.
+
+    Writer tetap berjalan di main thread (Excel COM hanya boleh dipakai serial dari satu
+    thread). Kedua tahap dihubungkan dengan queue terbatas supaya hasil compute yang
+    menunggu ditulis tidak menumpuk di memori. Dengan compute_concurrency > 1 beberapa
+    input di-compute bersamaan, tetapi file task semuanya tetap lewat satu scheduler.
+
+    Returns:
+        dict {file_path: {'status', 'output_file', 'error', 'compute_seconds', 'write_seconds',
+        'failed_files'}}
+    """
+    jobs = queue.Queue(maxsize=max(1, queue_size))
+    report = {f: {'status': 'pending', 'output_file': None, 'error': None,
+                  'compute_seconds': 0.0, 'write_seconds': 0.0, 'failed_files': []} for f in files}
+    done = object()
+
+    def compute_one(file_path):
+        t0 = time.time()
+        try:
+            job = compute_input_file(file_path, scheduler, (layouts_by_input or {}).get(file_path),
+                                     prefetcher, only, select, cache, history, preflight)
+            error = None if job is not None else 'compute menghasilkan None'
+        except Exception as e:
+            traceback.print_exc()
+            job, error = None, f"{type(e).__name__}: {e}"
+        report[file_path]['compute_seconds'] = time.time() - t0
+        jobs.put((file_path, job, error))
+
+    def compute_stage():
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, compute_concurrency)) as pool:
+                list(pool.map(compute_one, files))
+        finally:
+            jobs.put(done)
+
+    producer = threading.Thread(target=compute_stage, name='control4-compute', daemon=True)
+    producer.start()
+
+    idx = 0
+    while True:
+        item = jobs.get()
+        if item is done:
+            break
+        file_path, job, error = item
+        idx += 1
+        filename = os.path.basename(file_path)
+        entry = report[file_path]
+
+        if job is None:
+            entry['status'] = 'failed'
+            entry['error'] = error
+            print(f"❌ [{idx}/{len(files)}] Compute gagal: {filename} ({error})")
+            continue
+
+        entry['failed_files'] = job['failed_files']
+        t0 = time.time()
+        try:
+            output_file = write_input_result(job, writer, scheduler, incremental, formula_mode)
+        except Exception as e:
+            traceback.print_exc()
+            output_file = None
+            entry['error'] = f"{type(e).__name__}: {e}"
+        entry['write_seconds'] = time.time() - t0
+        entry['output_file'] = output_file
+        if output_file:
+            entry['status'] = 'success'
+            print(f"✅ [{idx}/{len(files)}] Completed: {filename}")
+        else:
+            entry['status'] = 'failed'
+            entry['error'] = entry['error'] or 'output gagal ditulis'
+            print(f"❌ [{idx}/{len(files)}] Failed: {filename}")
+        # Lepaskan hasil compute secepatnya
+        job['result'] = None
+
+    producer.join()
+    return report
+
+
+def list_input_files(input_path):
+    """List file input .xlsx dari path file atau folder (None jika path tidak valid)"""
     if os.path.isfile(input_path):
-        files = [input_path]
+        return [input_path]
     elif os.path.isdir(input_path):
-        files = [
+        return [
             os.path.join(input_path, fname)
             for fname in os.listdir(input_path)
             if fname.endswith(".xlsx") and not fname.startswith("~$")
         ]
-    else:
+    return None
+
+
+def main(input_path, pipeline=False, max_workers=None, compute_concurrency=1, preflight='error',
+         reader='openpyxl', prefetch=False, mirror_dir=None, mirror_max_gb=DEFAULT_MIRROR_MAX_GB,
+         only=None, select=None, cache=True, scheduler=None, history=True, period=None,
+         retry_failed=False, writer='xlwings', incremental=True, formula_mode='cell'):
+    """
+    Main entry point.
+
+    Default: SEQUENTIAL processing for xlwings compatibility. Dengan pipeline=True,
+    compute input berikutnya overlap dengan penulisan output input sekarang.
+    max_workers adalah worker budget global untuk semua file task di batch ini.
+    preflight: 'error' (default), 'strict' atau 'off' -- input yang gagal preflight
+    tidak di-compute sama sekali.
+    reader: backend pembaca source workbook, 'openpyxl' (default), 'calamine' atau 'auto'
+    (calamine jika terpasang, fallback per file ke openpyxl).
+    prefetch: copy source file dari share ke local mirror (mirror_dir, dibatasi
+    mirror_max_gb) di background; file task mulai begitu file-nya sudah lokal.
+    only: output sheet / alias (mis. 'check-sign', 'RAFM Output AZTRAD', dipisah koma);
+    hanya stage dan source folder yang dibutuhkan yang dijalankan.
+    cache: hasil per source file disimpan (ResultCache) dan dipakai ulang jika file tidak
+    berubah; ResultCache yang diberikan (watch / server) dipakai ulang antar panggilan.
+    select: baris Code (nomor / range / pola nama file, dipisah koma) yang di-scan ulang;
+    baris lain diambil dari hasil run sebelumnya.
+    scheduler: BatchScheduler yang sudah warm (server mode); tidak di-shutdown di sini.
+    Warning / error dari worker dan writer dicatat di run log JSON-lines (syntax.runlog),
+    console hanya menampilkan error dan ringkasan warning.
+    history: simpan frame hasil ke HistoryStore (period dari argumen period, baris 'period' di
+             File Path, atau Val Year berupa tanggal; tahun saja tidak cukup)
+    untuk delta antar quarter (python -m syntax.history delta ...).
+    retry_failed: hanya scan ulang source file yang gagal di run terakhir tiap input
+    (dicatat di cache); hasil file lain diambil dari cache.
+    writer: 'xlwings' (default, Excel COM), 'headless' (tanpa Excel, XML sheet di-render
+    paralel di worker pool lalu di-zip sekali) atau 'streaming' (tanpa Excel, baris per baris
+    dari frame ke zip, memori konstan untuk frame sangat besar).
+    incremental: writer tanpa Excel hanya menulis ulang sheet yang berubah sejak output
+    terakhir (sidecar hash per sheet); False -> output selalu ditulis penuh.
+    formula_mode: 'cell' (default, satu formula per sel) atau 'shared' (blok Checking Summary
+    sebagai satu shared formula / satu assignment range di xlwings).
+
+    Returns:
+        list path output file yang berhasil ditulis
+    """
+    print("\n" + "="*60)
+    print("🔧 CONTROL 4 - RAFM OUTPUT PROCESSOR (XLWINGS MODE)")
+    print("="*60)
+
+    start_time = time.time()
+    own_scheduler = scheduler is None
+    if not own_scheduler:
+        reader = scheduler.reader
+
+    try:
+        print(f"📖 Reader: {reader} -> {resolve_backend(reader)}")
+    except (ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        return []
+    if writer not in WRITERS:
+        print(f"❌ Writer tidak dikenal: {writer} (pilih {', '.join(WRITERS)})")
+        return []
+    if formula_mode not in FORMULA_MODES:
+        print(f"❌ Formula mode tidak dikenal: {formula_mode} (pilih {', '.join(FORMULA_MODES)})")
+        return []
+    if preflight not in PREFLIGHT_MODES:
+        print(f"❌ Preflight mode tidak dikenal: {preflight} (pilih {', '.join(PREFLIGHT_MODES)})")
+        return []
+    print(f"📝 Writer: {writer} (formula Checking Summary: {formula_mode})")
+
+    # Deteksi input
+    files = list_input_files(input_path)
+    if files is None:
         print(f"❌ Path tidak valid: {input_path}")
-        return
+        return []
 
     if not files:
         print("📂 Tidak ada file .xlsx ditemukan")
-        return
+        return []
+
+    result_cache = cache if isinstance(cache, ResultCache) else (ResultCache() if cache else None)
+    if retry_failed:
+        if result_cache is None:
+            print("❌ --retry-failed butuh cache (jangan dipakai bersama --no-cache)")
+            return []
+        failures = {f: result_cache.load_failures(f) for f in files}
+        select = {f: ','.join(glob.escape(name) for name in names) for f, names in failures.items() if names}
+        files = [f for f in files if f in select]
+        if not files:
+            print("✅ Tidak ada source file gagal dari run sebelumnya")
+            return []
+        for f in files:
+            print(f"🔁 Retry {os.path.basename(f)}: {', '.join(failures[f])}")
 
     print(f"📊 Ditemukan {len(files)} file untuk diproses\n")
+    run_log = RunLog().start()
+    try:
 
-    # 🚨 SEQUENTIAL processing for xlwings (COM API tidak support parallel)
-    print(f"📋 Mode: Sequential processing (xlwings compatibility)\n")
-
-    success_count = 0
-    fail_count = 0
+        success_count = 0
+        fail_count = 0
+        output_files = []
+        failed_sources = {}
+
+        # Fail fast: cek header semua source file sebelum full scan
+        if only:
+            print(f"🎯 Target: {only}")
+        if select and not retry_failed:
+            print(f"🎯 Selection: {select}")
+            if not cache:
+                print("⚠️ Selection tanpa cache: semua file tetap di-scan")
+        layouts_by_input, preflight_failures = preflight_inputs(files, preflight, only, select)
+        for file_path, error in preflight_failures.items():
+            fail_count += 1
+            print(f"❌ Preflight gagal, dilewati: {os.path.basename(file_path)} ({error})")
+        files = [f for f in files if f not in preflight_failures]
+        if not files:
+            print("❌ Tidak ada input yang lolos preflight")
+            return []
+
+        if own_scheduler:
+            scheduler = BatchScheduler(max_workers, reader=reader)
+            print(f"🧮 Worker budget: {scheduler.max_workers} proses (shared pool)")
+            scheduler.warm_up()
+        else:
+            print(f"🧮 Worker budget: {scheduler.max_workers} proses (pool server, sudah warm)")
+
+        prefetcher = None
+        if prefetch:
+            prefetcher = Prefetcher(LocalMirror(mirror_dir, mirror_max_gb))
+            print(f"📥 Prefetch ke local mirror: {prefetcher.mirror.root}")
+            prefetch_inputs(files, prefetcher, only, select)
+        history_store = HistoryStore(period=period) if history else None
+        print()
+
+        if pipeline and len(files) > 1:
+            print(f"📋 Mode: Pipelined (compute overlap dengan output, writer tetap serial)\n")
+            try:
+                report = run_pipelined(files, scheduler, compute_concurrency=compute_concurrency,
+                                       layouts_by_input=layouts_by_input, prefetcher=prefetcher, only=only,
+                                       select=select, cache=result_cache, history=history_store,
+                                       writer=writer, incremental=incremental, formula_mode=formula_mode,
+                                       preflight=preflight)
+            finally:
+                if own_scheduler:
+                    scheduler.shutdown()
+                if prefetcher is not None:
+                    prefetcher.shutdown()
+            compute_total = sum(r['compute_seconds'] for r in report.values())
+            write_total = sum(r['write_seconds'] for r in report.values())
+            for file_path, entry in report.items():
+                if entry['failed_files']:
+                    failed_sources[file_path] = entry['failed_files']
+                if entry['status'] == 'success':
+                    success_count += 1
+                    output_files.append(entry['output_file'])
+                else:
+                    fail_count += 1
+                    print(f"   ❌ {os.path.basename(file_path)}: {entry['error']}")
+            print(f"\n⚙️  Compute: {compute_total:.2f} detik | 📝 Write: {write_total:.2f} detik")
+        else:
+            # 🚨 SEQUENTIAL processing for xlwings (COM API tidak support parallel)
+            print(f"📋 Mode: Sequential processing (xlwings compatibility)\n")
 
-    for idx, file_path in enumerate(files, 1):
-        filename = os.path.basename(file_path)
-        print(f"\n[{idx}/{len(files)}] Processing: {filename}")
+            try:
+                for idx, file_path in enumerate(files, 1):
+                    filename = os.path.basename(file_path)
+                    print(f"\n[{idx}/{len(files)}] Processing: {filename}")
 
+                    try:
+                        output_file, failed_files = process_input_file(
+                            file_path, scheduler, layouts_by_input.get(file_path),
+                            prefetcher, only, select, result_cache, history_store, writer, incremental,
+                            formula_mode, preflight)
+                        if failed_files:
+                            failed_sources[file_path] = failed_files
+                        if output_file:
+                            success_count += 1
+                            output_files.append(output_file)
+                            print(f"✅ [{idx}/{len(files)}] Completed: {filename}")
+                        else:
+                            fail_count += 1
+                            print(f"❌ [{idx}/{len(files)}] Failed: {filename}")
+                    except Exception as e:
+                        fail_count += 1
+                        print(f"❌ [{idx}/{len(files)}] Failed: {filename}")
+                        print(f"   Error: {e}")
+                        traceback.print_exc()
+            finally:
+                if own_scheduler:
+                    scheduler.shutdown()
+                if prefetcher is not None:
+                    prefetcher.shutdown()
+
+        # Summary
+        elapsed = time.time() - start_time
+        print("\n" + "="*60)
+        print(f"⏱️  TOTAL WAKTU: {elapsed:.2f} detik")
+        print(f"📊 Total: {len(files) + len(preflight_failures)} file(s)")
+        print(f"✅ Success: {success_count}")
+        print(f"❌ Failed: {fail_count}")
+        if failed_sources:
+            print(f"⚠️ Source file gagal ({sum(map(len, failed_sources.values()))}):")
+            for file_path, names in failed_sources.items():
+                print(f"   {os.path.basename(file_path)}: {', '.join(names)}")
+            if result_cache is not None:
+                print("   Jalankan ulang hanya file ini dengan --retry-failed")
+        if prefetcher is not None:
+            prefetcher.report()
+        if result_cache is not None:
+            result_cache.report()
+        run_log.close()
         try:
-            process_input_file(file_path)
-            success_count += 1
-            print(f"✅ [{idx}/{len(files)}] Completed: {filename}")
-        except Exception as e:
-            fail_count += 1
-            print(f"❌ [{idx}/{len(files)}] Failed: {filename}")
-            print(f"   Error: {e}")
-            import traceback
-            traceback.print_exc()
-
-    # Summary
-    elapsed = time.time() - start_time
-    print("\n" + "="*60)
-    print(f"⏱️  TOTAL WAKTU: {elapsed:.2f} detik")
-    print(f"📊 Total: {len(files)} file(s)")
-    print(f"✅ Success: {success_count}")
-    print(f"❌ Failed: {fail_count}")
-    try:
-        print(f"⚡ Avg: {elapsed/len(files):.2f} detik/file")
-    except Exception:
-        pass
-    print("="*60)
+            print(f"⚡ Avg: {elapsed/(len(files) + len(preflight_failures)):.2f} detik/file")
+        except Exception:
+            pass
+        print("="*60)
+        return output_files
+    finally:
+        # Exception / return lebih awal (server, watch): file log dan listener tetap dilepas
+        run_log.close()
 
 
 if __name__ == '__main__':
     import sys
-    if len(sys.argv) > 1:
-        main(sys.argv[1])
+    argv = sys.argv[1:]
+    # '--only X' sama dengan '--only=X'
+    if '--only' in argv and argv.index('--only') + 1 < len(argv):
+        i = argv.index('--only')
+        argv = argv[:i] + [f"--only={argv[i + 1]}"] + argv[i + 2:]
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    if args:
+        kwargs = dict(pipeline='--pipeline' in argv, reader=options.get('reader', 'openpyxl'),
+                      prefetch='--prefetch' in argv or 'mirror' in options, mirror_dir=options.get('mirror'),
+                      mirror_max_gb=float(options.get('mirror-gb', DEFAULT_MIRROR_MAX_GB)),
+                      only=options.get('only'), select=options.get('select'),
+                      history='--no-history' not in argv, period=options.get('period'),
+                      writer=options.get('writer', 'xlwings'), incremental='--no-incremental' not in argv,
+                      formula_mode=options.get('formulas', 'cell'), preflight=options.get('preflight', 'error'))
+        if '--retry-failed' in argv:
+            kwargs['retry_failed'] = True
+        if '--watch' in argv:
+            from syntax.watch import DEFAULT_DEBOUNCE_SECONDS, DEFAULT_POLL_SECONDS, watch
+            watch(args[0], poll=float(options.get('poll', DEFAULT_POLL_SECONDS)),
+                  debounce=float(options.get('debounce', DEFAULT_DEBOUNCE_SECONDS)), **kwargs)
+        else:
+            main(args[0], cache='--no-cache' not in argv, **kwargs)
     else:
-        print("Usage: python main.py <input_file_or_folder>")
+        print(f"Usage: python main.py <input_file_or_folder> [--pipeline] "
+              f"[--reader={'|'.join(READER_BACKENDS)}] [--prefetch] [--mirror=<dir>] [--mirror-gb=<n>] "
+              f"[--only=<sheet|check-sign|argo|rafm|uvsg>[,...]] [--select=<baris|pola>[,...]] [--no-cache] "
+              f"[--preflight={'|'.join(PREFLIGHT_MODES)}] [--period=<period>] [--no-history] [--retry-failed] "
+              f"[--writer={'|'.join(WRITERS)}] [--no-incremental] [--formulas={'|'.join(FORMULA_MODES)}] "
+              f"[--watch [--poll=<detik>] [--debounce=<detik>]]")
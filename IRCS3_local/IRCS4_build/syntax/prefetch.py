@@ -0,0 +1,181 @@
+"""
+Prefetch source file dari network share ke local mirror.
+
+Semua source file satu batch di-copy dengan thread pool kecil, sesuai urutan file task
+yang akan dikirim ke scheduler. run_file_tasks menunggu per file (bukan per batch), jadi
+worker sudah mulai memproses file yang sudah lokal selagi file berikutnya masih di-copy.
+
+Mirror dipakai ulang antar run: copy lokal valid jika size dan mtime sama dengan file
+di share. Ukuran mirror dibatasi; file yang paling lama tidak dipakai dibuang duluan.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MIRROR_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir(), 'control4_mirror')
+DEFAULT_MIRROR_MAX_GB = 20
+PREFETCH_THREADS = 4
+INDEX_FILE = 'mirror_index.json'
+# Share SMB / FAT menyimpan mtime dengan resolusi 2 detik
+MTIME_TOLERANCE = 2.0
+
+
+class LocalMirror:
+    """Direktori lokal berisi copy source file, dengan index LRU dan batas ukuran"""
+
+    def __init__(self, root=None, max_gb=DEFAULT_MIRROR_MAX_GB):
+        self.root = root or DEFAULT_MIRROR_DIR
+        self.max_bytes = int(max_gb * 1024 ** 3)
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), encoding='utf-8') as fh:
+                index = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return {k: v for k, v in index.items() if os.path.isfile(k)}
+
+    def save_index(self):
+        with self._lock:
+            data = dict(self._index)
+        tmp = os.path.join(self.root, INDEX_FILE + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=1)
+        os.replace(tmp, os.path.join(self.root, INDEX_FILE))
+
+    def local_path(self, source_path):
+        """Nama file tetap sama (base name dipakai untuk match sheet Code), folder per share dir"""
+        source_dir = os.path.dirname(os.path.abspath(source_path))
+        bucket = hashlib.sha1(source_dir.lower().encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.root, bucket, os.path.basename(source_path))
+
+    @staticmethod
+    def is_fresh(source_stat, local_path):
+        try:
+            local = os.stat(local_path)
+        except OSError:
+            return False
+        return (local.st_size == source_stat.st_size
+                and abs(local.st_mtime - source_stat.st_mtime) <= MTIME_TOLERANCE)
+
+    def fetch(self, source_path, protected=()):
+        """
+        Pastikan copy lokal up to date.
+
+        Returns:
+            (local_path, copied_bytes) -- copied_bytes 0 jika copy lama masih valid
+        """
+        source_stat = os.stat(source_path)
+        local = self.local_path(source_path)
+        copied = 0
+        if not self.is_fresh(source_stat, local):
+            os.makedirs(os.path.dirname(local), exist_ok=True)
+            part = f"{local}.{threading.get_ident()}.part"
+            shutil.copy2(source_path, part)
+            os.replace(part, local)
+            copied = source_stat.st_size
+        with self._lock:
+            self._index[local] = {'source': source_path, 'size': source_stat.st_size, 'used': time.time()}
+        if copied:
+            self.evict(protected)
+        return local, copied
+
+    def evict(self, protected=()):
+        """Buang file paling lama tidak dipakai sampai total <= max_bytes (kecuali protected)"""
+        with self._lock:
+            total = sum(e['size'] for e in self._index.values())
+            if total <= self.max_bytes:
+                return
+            for local, entry in sorted(self._index.items(), key=lambda kv: kv[1]['used']):
+                if total <= self.max_bytes:
+                    break
+                if local in protected:
+                    continue
+                try:
+                    os.remove(local)
+                except OSError:
+                    pass
+                total -= entry['size']
+                del self._index[local]
+
+
+class Prefetcher:
+    """
+    Copy source file ke LocalMirror di background.
+
+    start(paths) dipanggil sekali per batch dengan urutan konsumsi; localize(task)
+    menunggu file task itu saja lalu mengganti file_path dengan copy lokal. Jika copy
+    gagal, task tetap jalan dengan path di share.
+    """
+
+    def __init__(self, mirror=None, max_threads=PREFETCH_THREADS):
+        self.mirror = mirror or LocalMirror()
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='control4-prefetch')
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._protected = set()
+        self.stats = {'files': 0, 'reused': 0, 'copied': 0, 'copied_bytes': 0, 'failed': 0,
+                      'wait_seconds': 0.0}
+
+    def _fetch(self, source_path):
+        try:
+            local, copied = self.mirror.fetch(source_path, self._protected)
+        except Exception as e:
+            print(f"⚠️ Prefetch gagal, dibaca langsung dari share: {os.path.basename(source_path)} ({e})")
+            with self._lock:
+                self.stats['failed'] += 1
+            return source_path
+        with self._lock:
+            if copied:
+                self.stats['copied'] += 1
+                self.stats['copied_bytes'] += copied
+            else:
+                self.stats['reused'] += 1
+        return local
+
+    def start(self, paths):
+        """Jadwalkan copy sesuai urutan; path yang sudah dijadwalkan tidak di-copy ulang"""
+        with self._lock:
+            for path in paths:
+                if path in self._futures:
+                    continue
+                self._protected.add(self.mirror.local_path(path))
+                self._futures[path] = self._pool.submit(self._fetch, path)
+                self.stats['files'] += 1
+
+    def local_path(self, source_path):
+        """Tunggu copy file ini selesai; path yang tidak dijadwalkan dikembalikan apa adanya"""
+        with self._lock:
+            future = self._futures.get(source_path)
+        if future is None:
+            return source_path
+        t0 = time.perf_counter()
+        local = future.result()
+        with self._lock:
+            self.stats['wait_seconds'] += time.perf_counter() - t0
+        return local
+
+    def localize(self, task):
+        """Task kernel (dict) dengan file_path diarahkan ke copy lokal"""
+        return {**task, 'file_path': self.local_path(task['file_path'])}
+
+    def report(self):
+        s = self.stats
+        print(f"📥 Prefetch: {s['files']} file ({s['reused']} dari mirror, {s['copied']} di-copy "
+              f"{s['copied_bytes'] / 1024 ** 2:.1f} MB, {s['failed']} gagal), "
+              f"worker menunggu copy {s['wait_seconds']:.2f} detik")
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+        try:
+            self.mirror.save_index()
+        except OSError as e:
+            print(f"⚠️ Index mirror tidak bisa disimpan: {e}")
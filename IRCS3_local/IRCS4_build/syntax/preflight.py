@@ -0,0 +1,177 @@
+"""
+Preflight: cek header semua file ARGO / RAFM / UVSG sebelum full scan.
+
+Hanya manifest workbook dan baris header yang dibaca (xlsx_stream), paralel dengan
+thread, jadi semua masalah (file tidak bisa dibuka, sheet extraction tidak ada, header
+GOC tidak ada, kolom hilang) dilaporkan dalam hitungan detik. Posisi header yang
+ditemukan dikembalikan sebagai layout dan dipakai ulang oleh kernel di full scan.
+Source .csv / .parquet dicek lewat syntax.readers (hanya header yang dibaca).
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from syntax.readers import is_flat_source, match_sheet, open_source
+from syntax.xlsx_stream import XlsxStream
+
+# Mode: 'error' gagal jika ada error, 'strict' gagal juga untuk warning, 'off' dilewati
+PREFLIGHT_MODES = ('error', 'strict', 'off')
+
+
+class PreflightError(Exception):
+    """Preflight menemukan masalah yang akan membuat hasil run salah / nol"""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__(f"Preflight gagal: {len(report.errors)} error, {len(report.warnings)} warning")
+
+
+@dataclass
+class SourceSpec:
+    """
+    Ekspektasi untuk satu source di satu jenis.
+
+    sheets           : sheet yang dicari (case-insensitive, kecuali exact)
+    require_all      : True -> semua sheet wajib ada, False -> minimal satu
+    key_column       : kolom penanda header (mis. 'goc'); None -> header di baris 1
+    header_rows      : batas baris pencarian header jika key_column dipakai
+    columns          : kolom measure yang diharapkan
+    duplicates       : header kembar -> index kolom 'first' atau 'last' (sama dengan kernel)
+    exact            : nama sheet harus sama persis
+    """
+    source: str
+    files: list
+    sheets: list
+    require_all: bool = True
+    key_column: str = None
+    header_rows: int = 1
+    columns: list = field(default_factory=list)
+    duplicates: str = 'first'
+    exact: bool = False
+
+
+@dataclass
+class PreflightReport:
+    layouts: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def header_columns(values, duplicates='first'):
+    """Header row -> {nama kolom lower: index kolom pertama (atau terakhir, duplicates='last')}"""
+    columns = {}
+    for i, h in enumerate(values):
+        if h is None:
+            continue
+        name = str(h).strip().lower()
+        if name and (duplicates == 'last' or name not in columns):
+            columns[name] = i
+    return columns
+
+
+def scan_file_headers(file_path, spec):
+    """
+    Baca manifest + header satu file.
+
+    Returns:
+        (layout, errors, warnings) dengan layout {target sheet: {'sheet', 'header_row', 'columns'}}
+    """
+    name = os.path.basename(file_path)
+    layout, errors, warnings = {}, [], []
+    flat = is_flat_source(file_path)
+    try:
+        with (open_source(file_path) if flat else XlsxStream(file_path)) as wb:
+            if flat:
+                # satu tabel untuk target pertama; target lain memang tidak ada
+                sheet_pairs = dict(wb.sheets_for(spec.sheets))
+                numbered_rows = lambda sheet: enumerate(wb.iter_rows(sheet), 1)
+            else:
+                sheet_pairs = {t: (t if t in wb.sheetnames else None) if spec.exact else match_sheet(wb.sheetnames, t)
+                               for t in spec.sheets}
+                numbered_rows = wb.iter_rows
+
+            found_any = usable_any = False
+            for target in spec.sheets:
+                actual = sheet_pairs.get(target)
+                if actual is None:
+                    if spec.require_all and not flat:
+                        errors.append(f"[{spec.source}] {name}: sheet '{target}' tidak ditemukan")
+                    continue
+                found_any = True
+
+                header_row, columns = None, None
+                for row_number, values in numbered_rows(actual):
+                    if spec.key_column is None:
+                        header_row, columns = row_number, header_columns(values, spec.duplicates)
+                        break
+                    if row_number > spec.header_rows:
+                        break
+                    candidate = header_columns(values, spec.duplicates)
+                    if spec.key_column in candidate:
+                        header_row, columns = row_number, candidate
+                        break
+
+                if header_row is None:
+                    if spec.key_column is None:
+                        warnings.append(f"[{spec.source}] {name}: sheet '{actual}' kosong")
+                    else:
+                        # sheet extraction opsional (IDR / USD): kernel melewati sheet ini
+                        problems = errors if spec.require_all else warnings
+                        problems.append(f"[{spec.source}] {name}: header '{spec.key_column.upper()}' "
+                                        f"tidak ditemukan dalam {spec.header_rows} baris pertama sheet '{actual}'")
+                    continue
+                usable_any = True
+
+                missing = [c for c in spec.columns if c.lower() not in columns]
+                if missing:
+                    warnings.append(f"[{spec.source}] {name}: kolom tidak ditemukan di '{actual}': {missing}")
+                layout[target] = {'sheet': actual, 'header_row': header_row, 'columns': columns}
+
+            if not spec.require_all and not found_any:
+                errors.append(f"[{spec.source}] {name}: tidak ada sheet extraction ({', '.join(spec.sheets)})")
+            elif not spec.require_all and not usable_any:
+                errors.append(f"[{spec.source}] {name}: tidak ada sheet extraction dengan header "
+                              f"'{spec.key_column.upper()}' ({', '.join(spec.sheets)})")
+    except Exception as e:
+        errors.append(f"[{spec.source}] {name}: tidak bisa dibuka ({type(e).__name__}: {e})")
+    return layout, errors, warnings
+
+
+def run_preflight(specs, mode='error', max_threads=16):
+    """
+    Jalankan preflight untuk semua SourceSpec, paralel per file.
+
+    Returns:
+        PreflightReport; raise PreflightError sesuai mode.
+    """
+    report = PreflightReport()
+    if mode == 'off':
+        return report
+
+    start = time.time()
+    tasks = [(f, spec) for spec in specs for f in spec.files]
+    if tasks:
+        with ThreadPoolExecutor(max_workers=min(max_threads, len(tasks))) as pool:
+            results = list(pool.map(lambda t: scan_file_headers(*t), tasks))
+        for (file_path, _), (layout, errors, warnings) in zip(tasks, results):
+            report.layouts[file_path] = layout
+            report.errors.extend(errors)
+            report.warnings.extend(warnings)
+    report.seconds = time.time() - start
+
+    print(f"🔎 Preflight: {len(tasks)} file dicek dalam {report.seconds:.2f} detik "
+          f"({len(report.errors)} error, {len(report.warnings)} warning)")
+    for msg in report.errors:
+        print(f"   ❌ {msg}")
+    for msg in report.warnings:
+        print(f"   ⚠️ {msg}")
+
+    if report.errors or (mode == 'strict' and report.warnings):
+        raise PreflightError(report)
+    return report
@@ -0,0 +1,376 @@
+"""
+Query layer: data extraction per file dan hasil run bisa di-query dengan SQL lewat
+DuckDB (embedded, langsung di atas Parquet lokal), tanpa membuka workbook lagi.
+
+Extract menyalin baris sheet extraction (RAFM / UVSG) apa adanya, tanpa filter Speed /
+GOC, ke Parquet: satu file per source file, kolom measure float64 (parse sama seperti
+kernel, nilai yang tidak bisa di-parse jadi null), period int64, goc string. File yang
+size dan mtime-nya tidak berubah sejak extract sebelumnya dilewati.
+
+Layout:  <root>/jenis=<jenis>/source=<rafm|uvsg>/<file>.parquet  (+ _files.json manifest)
+
+View yang tersedia:
+  extraction          semua baris extraction (kolom jenis, source, file, sheet, goc, period, measure)
+  result_<sheet>      frame output dari HistoryStore per sheet, semua period (kolom jenis, period)
+
+Usage: python -m syntax.query extract <input_file> [--jenis=trad|ul|reas] [--reader=calamine]
+       python -m syntax.query sum <measure>[,...] [--by=goc[,period|file|sheet]] [--file=<nama|pola*>]
+                              [--period=<range>] [--goc=<filter>] [--exclude=<filter>]
+                              [--jenis=...] [--source=...] [--sheet=...]
+       python -m syntax.query files | tables
+       python -m syntax.query sql "<SELECT ...>"
+       opsi umum: [--root=<dir>] [--history-root=<dir>] [--top=<n>] [--out=file.csv]
+
+Contoh: sum lrc_cl_ins --by=goc --period=>12 --file=RAFM_PROD-A
+        (--goc / --exclude memakai ekspresi filter GOC yang sama dengan sheet Filter,
+         lihat syntax.goc_filter; --period: 1-12, >=13, 5)
+"""
+import datetime
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from syntax.goc_filter import compile_filter
+from syntax.history import DEFAULT_HISTORY_DIR, MANIFEST_FILE
+from syntax.kernels import parse_numeric_fast
+from syntax.readers import open_source, source_base_name
+
+DEFAULT_QUERY_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir(), 'control4_query')
+FILES_MANIFEST = '_files.json'
+# Source yang punya sheet extraction per jenis (ARGO sudah berupa total per file)
+EXTRACTION_SOURCES = {
+    'trad': ['rafm', 'uvsg'],
+    'ul': ['rafm'],
+    'reas': ['rafm'],
+}
+TEXT_COLUMNS = {'goc'}
+INTEGER_COLUMNS = {'period'}
+HEADER_ROWS = 20
+GROUP_COLUMNS = ('goc', 'period', 'file', 'sheet', 'source', 'jenis')
+
+
+def _slug(text):
+    return re.sub(r'[^0-9A-Za-z._-]+', '_', str(text)).strip('_')
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("duckdb tidak terpasang (pip install duckdb)") from None
+    return duckdb
+
+
+def extraction_sheets(jenis):
+    """Nama sheet extraction yang dibaca kernel untuk jenis ini"""
+    import syntax.control_4_reas as reas
+    import syntax.control_4_trad as trad
+    import syntax.control_4_ul as ul
+    return {'trad': trad, 'ul': ul, 'reas': reas}[jenis].target_sheets
+
+
+def _typed_columns(header, rows):
+    """
+    Kolom mentah -> array bertipe, sama seperti kernel: measure float64 lewat
+    parse_numeric_fast (nilai yang tidak bisa di-parse jadi null), period int64,
+    hanya TEXT_COLUMNS (goc) yang tetap string.
+    """
+    import pyarrow as pa
+    arrays = {}
+    for name, idx in header.items():
+        raw = [row[idx] if idx < len(row) else None for row in rows]
+        if name in TEXT_COLUMNS:
+            arrays[name] = pa.array([None if v is None or v == '' else str(v) for v in raw], type=pa.string())
+            continue
+        parsed = [parse_numeric_fast(v) for v in raw]
+        if name in INTEGER_COLUMNS:
+            arrays[name] = pa.array([None if p is None else int(p) for p in parsed], type=pa.int64())
+        else:
+            arrays[name] = pa.array(parsed, type=pa.float64())
+    return arrays
+
+
+def extract_file(file_path, sheets, reader='openpyxl'):
+    """
+    Baca semua baris sheet extraction satu file (header: baris pertama dengan kolom GOC
+    dalam HEADER_ROWS baris pertama).
+
+    Returns:
+        pyarrow.Table (kolom file, sheet, lalu kolom sheet) atau None jika tidak ada sheet
+    """
+    import pyarrow as pa
+    file_name = source_base_name(file_path)
+    tables = []
+    with open_source(file_path, reader) as wb:
+        for target, actual in wb.sheets_for(sheets):
+            rows = iter(wb.iter_rows(actual))
+            header = None
+            for _, values in zip(range(HEADER_ROWS), rows):
+                names = [str(v).strip().lower() if v is not None else '' for v in values]
+                if 'goc' in names:
+                    header = {}
+                    for i, name in enumerate(names):
+                        if name and name not in header:
+                            header[name] = i
+                    break
+            if header is None:
+                print(f"⚠️ {file_name} / {actual}: kolom GOC tidak ditemukan, sheet dilewati")
+                continue
+            data = [row for row in rows if any(v is not None and v != '' for v in row)]
+            arrays = {'file': pa.array([file_name] * len(data), type=pa.string()),
+                      'sheet': pa.array([target] * len(data), type=pa.string())}
+            arrays.update(_typed_columns(header, data))
+            tables.append(pa.table(arrays))
+    if not tables:
+        return None
+    return pa.concat_tables(tables, promote_options='permissive')
+
+
+class QueryStore:
+    """root: Parquet extraction, history_root: HistoryStore (hasil run)"""
+
+    def __init__(self, root=None, history_root=None):
+        self.root = root or DEFAULT_QUERY_DIR
+        self.history_root = history_root or DEFAULT_HISTORY_DIR
+
+    def partition(self, jenis, source):
+        return os.path.join(self.root, f"jenis={jenis}", f"source={source}")
+
+    @staticmethod
+    def _manifest(folder):
+        try:
+            with open(os.path.join(folder, FILES_MANIFEST), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def extract(self, config, reader='openpyxl'):
+        """
+        Export sheet extraction semua source file di sheet Code. File yang size / mtime
+        sama dengan manifest tidak dibaca ulang.
+
+        Returns:
+            (jumlah file di-extract, jumlah file dilewati)
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("⚠️ Extract dilewati: pyarrow tidak terpasang (pip install pyarrow)")
+            return 0, 0
+
+        sheets = extraction_sheets(config.jenis)
+        extracted = skipped = 0
+        for source in EXTRACTION_SOURCES[config.jenis]:
+            folder = self.partition(config.jenis, source)
+            os.makedirs(folder, exist_ok=True)
+            manifest = self._manifest(folder)
+            for file_path in config.source_files(source):
+                stat = os.stat(file_path)
+                name = source_base_name(file_path)
+                entry = manifest.get(name)
+                target = os.path.join(folder, f"{_slug(name)}.parquet")
+                if (entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns
+                        and os.path.exists(target)):
+                    skipped += 1
+                    continue
+                try:
+                    table = extract_file(file_path, sheets, reader)
+                except Exception as e:
+                    print(f"❌ {os.path.basename(file_path)}: tidak bisa di-extract ({type(e).__name__}: {e})")
+                    continue
+                if table is None:
+                    print(f"⚠️ {os.path.basename(file_path)}: tidak ada sheet extraction ({', '.join(sheets)})")
+                    continue
+                import pyarrow.parquet as pq
+                pq.write_table(table, f"{target}.tmp")
+                os.replace(f"{target}.tmp", target)
+                manifest[name] = {'path': os.path.abspath(file_path), 'size': stat.st_size,
+                                  'mtime_ns': stat.st_mtime_ns, 'rows': table.num_rows,
+                                  'extracted_at': datetime.datetime.now().isoformat(timespec='seconds')}
+                extracted += 1
+            with open(os.path.join(folder, f"{FILES_MANIFEST}.tmp"), 'w', encoding='utf-8') as fh:
+                json.dump(manifest, fh, indent=1)
+            os.replace(os.path.join(folder, f"{FILES_MANIFEST}.tmp"), os.path.join(folder, FILES_MANIFEST))
+        print(f"🗃️ Extract {config.jenis.upper()}: {extracted} file di-extract, {skipped} file tidak berubah "
+              f"-> {self.root}")
+        return extracted, skipped
+
+    def files(self):
+        """Frame jenis, source, file, rows, extracted_at dari semua manifest"""
+        rows = []
+        for jenis in EXTRACTION_SOURCES:
+            for source in EXTRACTION_SOURCES[jenis]:
+                for name, entry in self._manifest(self.partition(jenis, source)).items():
+                    rows.append({'jenis': jenis, 'source': source, 'file': name, 'rows': entry['rows'],
+                                 'extracted_at': entry['extracted_at']})
+        return pd.DataFrame(rows, columns=['jenis', 'source', 'file', 'rows', 'extracted_at'])
+
+    def _result_sheets(self):
+        """{slug: nama sheet} dari manifest semua partisi history"""
+        sheets = {}
+        if not os.path.isdir(self.history_root):
+            return sheets
+        for jenis in sorted(os.listdir(self.history_root)):
+            base = os.path.join(self.history_root, jenis)
+            for period in sorted(os.listdir(base)) if os.path.isdir(base) else []:
+                try:
+                    with open(os.path.join(base, period, MANIFEST_FILE), encoding='utf-8') as fh:
+                        sheets.update(json.load(fh).get('sheets', {}))
+                except (OSError, ValueError):
+                    continue
+        return sheets
+
+    def connect(self):
+        """
+        Koneksi DuckDB in-memory dengan view extraction dan result_<sheet>. Data tidak
+        di-load: DuckDB membaca Parquet langsung (hanya kolom dan row group yang dipakai).
+        """
+        duckdb = _require_duckdb()
+        con = duckdb.connect()
+        options = "hive_partitioning = true, hive_types_autocast = false, union_by_name = true"
+        pattern = os.path.join(self.root, 'jenis=*', 'source=*', '*.parquet').replace('\\', '/').replace("'", "''")
+        if not self.files().empty:
+            con.execute(f"CREATE VIEW extraction AS SELECT * FROM read_parquet('{pattern}', {options})")
+        for slug in self._result_sheets():
+            pattern = os.path.join(self.history_root, 'jenis=*', 'period=*', f"{slug}.parquet")
+            pattern = pattern.replace('\\', '/').replace("'", "''")
+            view = 'result_' + re.sub(r'[^0-9a-z]+', '_', slug.lower()).strip('_')
+            con.execute(f"CREATE VIEW {view} AS SELECT * FROM read_parquet('{pattern}', {options})")
+        return con
+
+    def sql(self, query, params=None):
+        con = self.connect()
+        try:
+            return con.execute(query, params or []).df()
+        finally:
+            con.close()
+
+    def totals(self, measures, by=('goc',), file=None, period=None, goc='-', exclude='-',
+               jenis=None, source=None, sheet=None):
+        """
+        Jumlah measure per kolom grup dari view extraction.
+
+        file   : nama file (case-insensitive) atau pola dengan '*'
+        period : range period ('>12', '1-12', '5')
+        goc / exclude : ekspresi filter GOC (syntax.goc_filter), termasuk term period:
+
+        Returns:
+            DataFrame kolom grup + measure, urut kolom grup
+        """
+        unknown = [c for c in by if c not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Kolom grup tidak dikenal: {unknown} (pilihan: {', '.join(GROUP_COLUMNS)})")
+        goc_filter = compile_filter(goc, exclude)
+        include_periods = list(goc_filter.include_periods)
+        if period:
+            include_periods += compile_filter(f"period:{period}").include_periods
+
+        where, params = [], []
+        for column, value in (('jenis', jenis), ('source', source), ('sheet', sheet), ('file', file)):
+            if value:
+                if '*' in value:
+                    where.append(f"{column} ILIKE ?")
+                    params.append(value.replace('%', r'\%').replace('*', '%'))
+                else:
+                    where.append(f"lower({column}) = lower(?)")
+                    params.append(value)
+        for ranges, negate in ((include_periods, ''), (goc_filter.exclude_periods, 'NOT ')):
+            if ranges:
+                terms = []
+                for low, high in ranges:
+                    bounds = [f"period {op} {int(v)}" for op, v in (('>=', low), ('<=', high)) if v is not None]
+                    terms.append(' AND '.join(bounds) or 'TRUE')
+                where.append(f"{negate}({' OR '.join(f'({t})' for t in terms)})")
+
+        con = self.connect()
+        try:
+            if goc_filter.include or goc_filter.exclude:
+                # keputusan GOC per nilai unik dengan filter yang sama seperti kernel
+                gocs = [g for (g,) in con.execute("SELECT DISTINCT goc FROM extraction WHERE goc IS NOT NULL").fetchall()]
+                where.append("list_contains(?, goc)")
+                params.append([g for g in gocs if goc_filter.allows_goc(g)])
+            group = ', '.join(_quote(c) for c in by)
+            sums = ', '.join(f"sum({_quote(m)}) AS {_quote(m)}" for m in measures)
+            query = (f"SELECT {group}, {sums} FROM extraction "
+                     f"{'WHERE ' + ' AND '.join(where) if where else ''} GROUP BY {group} ORDER BY {group}")
+            return con.execute(query, params).df()
+        finally:
+            con.close()
+
+
+def _print_frame(df, options, label, elapsed):
+    print(f"🔎 {label}: {len(df)} baris ({elapsed:.3f} detik)")
+    with pd.option_context('display.width', 200, 'display.max_columns', 12):
+        print(df.head(int(options.get('top', 50))).to_string(index=False))
+    if 'out' in options:
+        df.to_csv(options['out'], index=False)
+        print(f"💾 Hasil lengkap: {options['out']}")
+
+
+def _main(argv):
+    args = [a for a in argv if not a.startswith('--')]
+    options = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+    store = QueryStore(options.get('root'), options.get('history-root'))
+    command = args[0] if args else None
+
+    if command == 'extract' and len(args) == 2:
+        from syntax.main import list_input_files
+        from syntax.run_config import load_run_config
+        files = list_input_files(args[1])
+        if not files:
+            print(f"❌ Path tidak valid: {args[1]}")
+            return 1
+        for input_file in files:
+            try:
+                config = load_run_config(input_file, options.get('jenis'))
+            except ValueError as e:
+                print(f"⚠️ {os.path.basename(input_file)} dilewati: {e}")
+                continue
+            store.extract(config, options.get('reader', 'openpyxl'))
+        return 0
+    if command == 'files' and len(args) == 1:
+        files = store.files()
+        print(files.to_string(index=False) if not files.empty else f"Belum ada extraction di {store.root}")
+        return 0
+    if command not in ('tables', 'sql', 'sum') or (command == 'tables') != (len(args) == 1):
+        print(__doc__)
+        return 1
+
+    t0 = time.perf_counter()
+    try:
+        if command == 'tables':
+            df = store.sql("SELECT table_name AS view, count(*) AS columns FROM information_schema.columns "
+                           "GROUP BY table_name ORDER BY table_name")
+            label = 'View'
+        elif command == 'sql':
+            df = store.sql(' '.join(args[1:]))
+            label = 'SQL'
+        else:
+            measures = [m.strip().lower() for m in ' '.join(args[1:]).split(',') if m.strip()]
+            by = [c.strip().lower() for c in options.get('by', 'goc').split(',') if c.strip()]
+            df = store.totals(measures, by, file=options.get('file'), period=options.get('period'),
+                              goc=options.get('goc', '-'), exclude=options.get('exclude', '-'),
+                              jenis=options.get('jenis'), source=options.get('source'), sheet=options.get('sheet'))
+            label = f"Sum {', '.join(measures)} per {', '.join(by)}"
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    except Exception as e:
+        # error DuckDB (kolom / view tidak ada, SQL tidak valid)
+        print(f"❌ {type(e).__name__}: {e}")
+        return 1
+    _print_frame(df, options, label, time.perf_counter() - t0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
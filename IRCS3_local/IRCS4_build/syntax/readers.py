@@ -0,0 +1,369 @@
+"""
+Reader backend untuk source file, dipakai oleh semua kernel process_*_file.
+
+Interface (WorkbookReader):
+  - sheetnames
+  - sheets_for(targets, exact=False)      -> [(target, nama sheet aktual)] yang ada
+  - iter_rows(sheet, min_row=1, columns=None)
+                                          -> nilai per baris (kolom absolut, A = 0); columns
+                                             (set index) boleh dipakai reader untuk projection
+  - column_arrays(sheet, columns, min_row=1) -> {index kolom: list nilai} (projection)
+  - close()
+
+Backend xlsx:
+  - 'openpyxl' : load_workbook read-only (default lama)
+  - 'calamine' : python-calamine (Rust), jauh lebih cepat untuk sheet extraction besar
+  - 'stream'   : syntax.xlsx_stream (stdlib) dengan read-ahead: inflate zip di background
+                 thread overlap dengan parse XML; waktu per fase dikumpulkan di phase_totals()
+  - 'auto'     : calamine jika terpasang, fallback ke openpyxl
+
+Source .csv / .csv.gz / .parquet (export ARGO / RAFM) selalu dibaca dengan reader flat
+file, apa pun backend xlsx yang dipilih. Flat file berisi satu tabel dengan header di
+baris 1; tabel itu dianggap sebagai sheet target pertama (Sheet1 / extraction_IDR),
+jadi satu export gabungan IDR + USD menghasilkan sum yang sama dengan workbook-nya.
+
+Seperti kernels, modul ini hanya memakai stdlib di top-level; library reader
+di-import saat backend pertama kali dipakai.
+"""
+import csv
+import gzip
+import os
+
+from syntax.runlog import log_event
+
+READER_BACKENDS = ('auto', 'openpyxl', 'calamine', 'stream')
+
+# Urutan preferensi jika satu base name ada dalam beberapa format di folder yang sama
+SOURCE_EXTENSIONS = ('.parquet', '.csv.gz', '.csv', '.xlsx')
+FLAT_TABLE = 'table'
+PARQUET_BATCH_ROWS = 65536
+CSV_DELIMITERS = ',;\t|'
+
+_calamine_available = None
+# Total waktu per fase reader 'stream' di proses ini (inflate / parse / wait)
+_phase_totals = {'files': 0, 'inflate': 0.0, 'parse': 0.0, 'wait': 0.0}
+
+
+def calamine_available():
+    global _calamine_available
+    if _calamine_available is None:
+        try:
+            import python_calamine  # noqa: F401
+            _calamine_available = True
+        except ImportError:
+            _calamine_available = False
+    return _calamine_available
+
+
+def resolve_backend(backend):
+    """'auto' -> backend tercepat yang terpasang"""
+    backend = (backend or 'openpyxl').lower()
+    if backend not in READER_BACKENDS:
+        raise ValueError(f"Reader backend tidak dikenal: {backend} (pilihan: {', '.join(READER_BACKENDS)})")
+    if backend == 'auto':
+        return 'calamine' if calamine_available() else 'openpyxl'
+    if backend == 'calamine' and not calamine_available():
+        raise ImportError("python-calamine tidak terpasang (pip install python-calamine)")
+    return backend
+
+
+def source_extension(path):
+    """Ekstensi source yang dikenali ('.csv.gz', '.xlsx', ...) atau None"""
+    name = os.path.basename(path).lower()
+    for ext in SOURCE_EXTENSIONS:
+        if name.endswith(ext):
+            return ext
+    return None
+
+
+def source_base_name(path):
+    """'ARGO_A.csv.gz' -> 'ARGO_A' (nama yang dicocokkan dengan sheet Code)"""
+    name = os.path.basename(path)
+    ext = source_extension(name)
+    return name[:-len(ext)] if ext else os.path.splitext(name)[0]
+
+
+def is_flat_source(path):
+    return source_extension(path) in ('.csv', '.csv.gz', '.parquet')
+
+
+def match_sheet(sheetnames, target):
+    target = target.lower().strip()
+    for s in sheetnames:
+        if s.lower().strip() == target:
+            return s
+    return None
+
+
+class WorkbookReader:
+    backend = None
+
+    @property
+    def sheetnames(self):
+        raise NotImplementedError
+
+    def sheets_for(self, targets, exact=False):
+        """Pasangan (target, sheet aktual) untuk target yang ada di workbook"""
+        found = []
+        for target in targets:
+            if exact:
+                actual = target if target in self.sheetnames else None
+            else:
+                actual = match_sheet(self.sheetnames, target)
+            if actual is not None:
+                found.append((target, actual))
+        return found
+
+    def iter_rows(self, sheet_name, min_row=1, columns=None):
+        raise NotImplementedError
+
+    def column_arrays(self, sheet_name, columns, min_row=1):
+        """Projection: hanya kolom yang diminta, sebagai list per kolom"""
+        arrays = {idx: [] for idx in columns}
+        for row in self.iter_rows(sheet_name, min_row, columns=set(columns)):
+            n = len(row)
+            for idx, values in arrays.items():
+                values.append(row[idx] if idx < n else None)
+        return arrays
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class OpenpyxlReader(WorkbookReader):
+    backend = 'openpyxl'
+
+    def __init__(self, path):
+        from openpyxl import load_workbook
+        self._wb = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+    @property
+    def sheetnames(self):
+        return self._wb.sheetnames
+
+    def iter_rows(self, sheet_name, min_row=1, columns=None):
+        return self._wb[sheet_name].iter_rows(min_row=min_row, values_only=True)
+
+    def close(self):
+        self._wb.close()
+
+
+class CalamineReader(WorkbookReader):
+    """
+    python-calamine. Sel kosong dikembalikan sebagai '' (bukan None) dan angka bulat
+    sebagai float; keduanya sudah ditangani parse_numeric_fast.
+    """
+    backend = 'calamine'
+
+    def __init__(self, path):
+        from python_calamine import CalamineWorkbook
+        self._wb = CalamineWorkbook.from_path(path)
+
+    @property
+    def sheetnames(self):
+        return self._wb.sheet_names
+
+    def iter_rows(self, sheet_name, min_row=1, columns=None):
+        sheet = self._wb.get_sheet_by_name(sheet_name)
+        start = sheet.start or (0, 0)
+        first_row, first_col = start[0] + 1, start[1]
+        pad = (None,) * first_col
+
+        row_number = 1
+        while row_number < first_row:
+            if row_number >= min_row:
+                yield ()
+            row_number += 1
+        for row in sheet.iter_rows():
+            if row_number >= min_row:
+                yield pad + tuple(row) if first_col else row
+            row_number += 1
+
+    def close(self):
+        close = getattr(self._wb, 'close', None)
+        if close is not None:
+            close()
+
+
+class FlatFileReader(WorkbookReader):
+    """Satu tabel, header di baris 1; nama sheet diabaikan"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def sheetnames(self):
+        return [FLAT_TABLE]
+
+    def sheets_for(self, targets, exact=False):
+        return [(targets[0], FLAT_TABLE)] if targets else []
+
+
+class CsvReader(FlatFileReader):
+    """.csv / .csv.gz, streaming baris per baris (nilai berupa string, di-parse kernel)"""
+    backend = 'csv'
+
+    def _open(self):
+        if self.path.lower().endswith('.gz'):
+            return gzip.open(self.path, 'rt', newline='', encoding='utf-8-sig')
+        return open(self.path, newline='', encoding='utf-8-sig')
+
+    def _dialect(self, fh):
+        sample = fh.read(16384)
+        fh.seek(0)
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        except csv.Error:
+            return csv.excel
+
+    def iter_rows(self, sheet_name=None, min_row=1, columns=None):
+        with self._open() as fh:
+            for row_number, row in enumerate(csv.reader(fh, self._dialect(fh)), 1):
+                if row_number >= min_row:
+                    yield row
+
+
+class ParquetReader(FlatFileReader):
+    """
+    .parquet lewat pyarrow, dibaca per batch. Jika columns diberikan hanya kolom itu
+    yang di-decode; posisi kolom lain berisi None.
+    """
+    backend = 'parquet'
+
+    def __init__(self, path):
+        import pyarrow.parquet as pq
+        super().__init__(path)
+        self._file = pq.ParquetFile(path)
+        self._names = list(self._file.schema_arrow.names)
+
+    def iter_rows(self, sheet_name=None, min_row=1, columns=None):
+        if min_row <= 1:
+            yield tuple(self._names)
+        if columns is None:
+            wanted = list(range(len(self._names)))
+        else:
+            wanted = sorted(i for i in columns if i < len(self._names))
+        if not wanted:
+            return
+        width = wanted[-1] + 1
+
+        row_number = 1
+        for batch in self._file.iter_batches(batch_size=PARQUET_BATCH_ROWS,
+                                             columns=[self._names[i] for i in wanted]):
+            if row_number + batch.num_rows < min_row:
+                row_number += batch.num_rows
+                continue
+            arrays = [column.to_pylist() for column in batch.columns]
+            for values in zip(*arrays):
+                row_number += 1
+                if row_number < min_row:
+                    continue
+                row = [None] * width
+                for idx, v in zip(wanted, values):
+                    row[idx] = v
+                yield row
+
+    def close(self):
+        close = getattr(self._file, 'close', None)
+        if close is not None:
+            close()
+
+
+class StreamReader(WorkbookReader):
+    """
+    XlsxStream dengan read-ahead. Baris kosong yang tidak ditulis di XML diisi tuple
+    kosong supaya nomor baris sama dengan openpyxl.
+    """
+    backend = 'stream'
+
+    def __init__(self, path):
+        from syntax.xlsx_stream import XlsxStream
+        self._wb = XlsxStream(path, read_ahead=True)
+
+    @property
+    def sheetnames(self):
+        return self._wb.sheetnames
+
+    def iter_rows(self, sheet_name, min_row=1, columns=None):
+        expected = 1
+        for row_number, values in self._wb.iter_rows(sheet_name, columns=columns):
+            while expected < row_number:
+                if expected >= min_row:
+                    yield ()
+                expected += 1
+            if row_number >= min_row:
+                yield values
+            expected = row_number + 1
+
+    def phases(self):
+        return self._wb.phases()
+
+    def close(self):
+        self._wb.close()
+        _phase_totals['files'] += 1
+        for phase, seconds in self._wb.phases().items():
+            _phase_totals[phase] += seconds
+
+
+def phase_totals(reset=False):
+    """Total waktu per fase reader 'stream' sejak reset terakhir"""
+    totals = dict(_phase_totals)
+    if reset:
+        _phase_totals.update({'files': 0, 'inflate': 0.0, 'parse': 0.0, 'wait': 0.0})
+    return totals
+
+
+_FLAT_CLASSES = {
+    '.csv': CsvReader,
+    '.csv.gz': CsvReader,
+    '.parquet': ParquetReader,
+}
+
+_BACKEND_CLASSES = {
+    'openpyxl': OpenpyxlReader,
+    'calamine': CalamineReader,
+    'stream': StreamReader,
+}
+
+
+def open_workbook(path, backend='openpyxl'):
+    """
+    Buka workbook dengan backend yang dipilih. Untuk 'auto', jika calamine gagal membuka
+    file tertentu, otomatis fallback ke openpyxl.
+    """
+    requested = (backend or 'openpyxl').lower()
+    resolved = resolve_backend(requested)
+    try:
+        return _BACKEND_CLASSES[resolved](path)
+    except Exception as e:
+        if requested != 'auto' or resolved == 'openpyxl':
+            raise
+        log_event('warning', f"calamine gagal membuka file ({type(e).__name__}), fallback ke openpyxl",
+                  stage='reader', file=os.path.basename(path), error=str(e))
+        return OpenpyxlReader(path)
+
+
+def open_source(path, backend='openpyxl'):
+    """Buka source file: flat file sesuai ekstensi, xlsx dengan backend yang dipilih"""
+    ext = source_extension(path)
+    if ext in _FLAT_CLASSES:
+        return _FLAT_CLASSES[ext](path)
+    return open_workbook(path, backend)
+
+
+def warm_backend(backend):
+    """Import library reader di worker (dipanggil dari pool initializer)"""
+    resolved = resolve_backend(backend)
+    if resolved == 'calamine':
+        import python_calamine  # noqa: F401
+    elif resolved == 'stream':
+        import syntax.xlsx_stream  # noqa: F401
+    else:
+        import openpyxl  # noqa: F401
+    return resolved
@@ -0,0 +1,177 @@
+"""
+Cache hasil kernel per source file, dipakai ulang antar run.
+
+Key: nama kernel + folder source + base name file + hash parameter task (kolom, filter,
+groups, sheets). Hasil dianggap fresh jika size dan mtime file source sama dengan saat
+hasil disimpan. Task bertanda 'reuse' (baris Code di luar selection) memakai hasil run
+sebelumnya tanpa stat / scan file sama sekali.
+
+Hasil disimpan di memori dan di disk (satu pickle per entry), jadi proses yang tetap
+hidup (watch / server) tidak perlu membaca disk lagi. Entry berisi (hasil, statistik
+scan) dari kernel, jadi statistik file yang dipakai ulang tetap tersedia.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+from syntax.readers import source_base_name
+
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir(), 'control4_cache')
+CACHE_VERSION = 2
+MTIME_TOLERANCE = 2.0
+# Bagian task yang tidak mempengaruhi hasil
+_VOLATILE_KEYS = ('file_path', 'layout', 'reader', 'reuse', 'stage')
+
+MISS = object()
+
+
+def _task_hash(task):
+    stable = {k: v for k, v in task.items() if k not in _VOLATILE_KEYS}
+    return hashlib.sha1(repr(sorted(stable.items())).encode('utf-8')).hexdigest()[:16]
+
+
+def _is_complete(result):
+    """Hasil kernel gagal (None / hanya File_Name) tidak di-cache"""
+    result, _ = result
+    if result is None:
+        return False
+    if isinstance(result, dict) and set(result) <= {'File_Name'}:
+        return False
+    return True
+
+
+class ResultCache:
+
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_CACHE_DIR
+        os.makedirs(self.root, exist_ok=True)
+        self._memory = {}
+        self._lock = threading.Lock()
+        self.stats = {'fresh': 0, 'reused': 0, 'scanned': 0}
+
+    def key(self, fn, task):
+        folder = os.path.normcase(os.path.abspath(os.path.dirname(task['file_path'])))
+        name = task.get('file_name') or source_base_name(task['file_path'])
+        raw = f"{CACHE_VERSION}|{fn.__name__}|{folder}|{name.lower()}|{_task_hash(task)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.pkl")
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is not None:
+            return entry
+        try:
+            with open(self._entry_path(key), 'rb') as fh:
+                entry = pickle.load(fh)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def lookup(self, fn, task):
+        """Hasil cache untuk task (MISS jika tidak ada / file sudah berubah)"""
+        entry = self._load(self.key(fn, task))
+        if entry is None:
+            return MISS
+        if task.get('reuse'):
+            with self._lock:
+                self.stats['reused'] += 1
+            return entry['result']
+        try:
+            st = os.stat(task['file_path'])
+        except OSError:
+            return MISS
+        if st.st_size != entry['size'] or abs(st.st_mtime - entry['mtime']) > MTIME_TOLERANCE:
+            return MISS
+        with self._lock:
+            self.stats['fresh'] += 1
+        return entry['result']
+
+    def store(self, fn, task, result):
+        with self._lock:
+            self.stats['scanned'] += 1
+        if not _is_complete(result):
+            return
+        try:
+            st = os.stat(task['file_path'])
+        except OSError:
+            return
+        key = self.key(fn, task)
+        entry = {'source': task['file_path'], 'size': st.st_size, 'mtime': st.st_mtime, 'result': result}
+        with self._lock:
+            self._memory[key] = entry
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as fh:
+            pickle.dump(entry, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def invalidate(self, source_path):
+        """Lupakan hasil di memori untuk file source ini (file di disk tetap dicek mtime)"""
+        with self._lock:
+            for key in [k for k, e in self._memory.items() if e['source'] == source_path]:
+                del self._memory[key]
+
+    def report(self):
+        """Print statistik run ini lalu reset (cache yang sama bisa dipakai beberapa run)"""
+        with self._lock:
+            s, self.stats = self.stats, {'fresh': 0, 'reused': 0, 'scanned': 0}
+        print(f"💾 Result cache: {s['fresh']} file tidak berubah, {s['reused']} dari run sebelumnya "
+              f"(di luar selection), {s['scanned']} file di-scan")
+
+
+    def _failures_path(self, input_file):
+        digest = hashlib.sha1(os.path.normcase(os.path.abspath(input_file)).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'failures', f"{digest}.json")
+
+    def save_failures(self, input_file, names):
+        """Simpan nama file source yang gagal di run terakhir input ini (kosong = hapus)"""
+        path = self._failures_path(input_file)
+        if not names:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as fh:
+            json.dump({'input': input_file, 'files': sorted(names)}, fh, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    def load_failures(self, input_file):
+        try:
+            with open(self._failures_path(input_file), encoding='utf-8') as fh:
+                return json.load(fh)['files']
+        except (OSError, ValueError, KeyError):
+            return []
+
+
+def mark_reuse(items, selection, source):
+    """
+    Tandai task source di luar selection ({source: set nama file lower-case}, None = semua
+    di-scan) supaya memakai hasil run sebelumnya.
+    """
+    if selection is None:
+        return items
+    selected = selection.get(source, set())
+    marked = []
+    for item in items:
+        name = (item.get('file_name') or source_base_name(item['file_path'])).lower()
+        marked.append({**item, 'reuse': name not in selected})
+    return marked
+
+
+def select_specs(specs, selection):
+    """Preflight hanya untuk file yang masuk selection"""
+    if selection is None:
+        return specs
+    for spec in specs:
+        selected = selection.get(spec.source, set())
+        spec.files = [f for f in spec.files if source_base_name(f).lower() in selected]
+    return specs
@@ -0,0 +1,275 @@
+import fnmatch
+import glob
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from syntax.readers import SOURCE_EXTENSIONS, source_base_name, source_extension
+
+# Sheet yang wajib ada di input workbook per jenis
+REQUIRED_SHEETS = {
+    'trad': ['Code', 'Sign Logic', 'Control', 'File Path', 'Filter RAFM', 'Filter UVSG'],
+    'ul': ['Code', 'Sign Logic', 'Control', 'File Path', 'Filter RAFM'],
+    'reas': ['Code', 'Sign Logic', 'Control', 'File Path'],
+}
+
+# Folder source yang dipakai per jenis (nama di sheet File Path)
+SOURCE_FOLDERS = {
+    'trad': ['argo', 'rafm', 'uvsg'],
+    'ul': ['argo', 'rafm'],
+    'reas': ['argo', 'rafm'],
+}
+
+# Kolom di sheet Code yang berisi nama file per source
+SOURCE_CODE_COLUMNS = {
+    'argo': 'ARGO File Name',
+    'rafm': 'RAFM File Name',
+    'uvsg': 'UVSG File Name',
+}
+
+OUTPUT_ENTRIES = ['output_path', 'output_filename', 'rafm manual']
+FILE_NAME_COLUMNS = ['ARGO File Name', 'RAFM File Name', 'UVSG File Name', 'File Name']
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def detect_jenis_from_name(file_path):
+    """Deteksi jenis (trad / ul / reas) dari nama file input"""
+    filename = os.path.basename(file_path).lower()
+    if 'trad' in filename:
+        return 'trad'
+    elif 'ul' in filename:
+        return 'ul'
+    elif 'reas' in filename:
+        return 'reas'
+    return None
+
+
+def _strip_value(val):
+    return val.strip() if isinstance(val, str) else val
+
+
+def _normalize_frame(df):
+    """Strip nama kolom dan isi kolom nama file (tanpa mengubah NaN jadi 'nan')"""
+    df = df.copy()
+    df.columns = [c.strip() if isinstance(c, str) else c for c in df.columns]
+    for col in FILE_NAME_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].map(_strip_value)
+    return df
+
+
+@dataclass
+class RunConfig:
+    """
+    Isi input control workbook, dibaca sekali dan dipakai bersama oleh compute dan output.
+
+    Frame di sini diperlakukan read-only (bisa di-share antar job lewat cache);
+    consumer yang mau memodifikasi harus .copy() dulu.
+    """
+    input_excel: str
+    jenis: str
+    code: pd.DataFrame
+    sign_logic: pd.DataFrame
+    control: pd.DataFrame
+    file_path: pd.DataFrame
+    filter_rafm: pd.DataFrame = None
+    filter_uvsg: pd.DataFrame = None
+    paths: dict = field(default_factory=dict)
+    problems: list = field(default_factory=list)
+
+    def path(self, name, default=''):
+        value = self.paths.get(name)
+        return default if value is None else value
+
+    @property
+    def argo_dir(self):
+        return self.path('argo')
+
+    @property
+    def rafm_dir(self):
+        return self.path('rafm')
+
+    @property
+    def uvsg_dir(self):
+        return self.path('uvsg')
+
+    @property
+    def output_path(self):
+        return self.path('output_path', None)
+
+    @property
+    def output_filename(self):
+        return self.path('output_filename', None)
+
+    @property
+    def rafm_manual(self):
+        return self.path('rafm manual', None)
+
+    def missing_output_entries(self):
+        return [name for name in OUTPUT_ENTRIES if not self.paths.get(name)]
+
+    def select_rows(self, select):
+        """
+        Product-subset: resolve selection ke nama file per source yang di-scan ulang.
+
+        select: string dipisah koma atau list, tiap item salah satu dari
+          '3' / '3-7'      nomor baris Code (1 = baris data pertama, sama dengan kolom No)
+          'ARGO_PROD*'     pola nama file (fnmatch, case-insensitive) di kolom File Name
+          'SUM_PROD'       grup SUM_ (baris SUM_ cocok dengan pola juga diperlakukan begini)
+        Baris SUM_ yang terpilih otomatis menyertakan baris produk yang di-roll-up.
+
+        Returns:
+            None jika select kosong, else {source: set nama file lower-case}
+        """
+        if not select:
+            return None
+        if isinstance(select, str):
+            select = select.split(',')
+
+        code = self.code.reset_index(drop=True)
+        name_cols = [c for c in SOURCE_CODE_COLUMNS.values() if c in code.columns]
+        names = code[name_cols].astype(str).apply(lambda col: col.str.strip())
+
+        chosen = set()
+        for item in (s.strip() for s in select):
+            if not item:
+                continue
+            if re.fullmatch(r'\d+(-\d+)?', item):
+                lo, _, hi = item.partition('-')
+                chosen.update(i - 1 for i in range(int(lo), int(hi or lo) + 1) if 0 < i <= len(code))
+                continue
+            matched = names.apply(lambda col: col.map(
+                lambda v: fnmatch.fnmatch(v.lower(), item.lower()))).any(axis=1)
+            chosen.update(matched[matched].index)
+
+        # roll-up SUM_: sama dengan pencarian produk di rafm_totals
+        for idx in list(chosen):
+            for col in name_cols:
+                value = names.at[idx, col]
+                if 'SUM_' in value and 'ARGO File Name' in names.columns:
+                    pattern = re.escape(value.split('SUM_')[-1]).replace("-", "[-_]?")
+                    members = names['ARGO File Name'].str.contains(pattern, case=False, regex=True, na=False)
+                    chosen.update(members[members].index)
+
+        return {
+            source: {names.at[i, col].lower() for i in chosen}
+            for source, col in SOURCE_CODE_COLUMNS.items() if col in names.columns
+        }
+
+    def source_files(self, source):
+        """
+        Source file (.xlsx / .csv / .csv.gz / .parquet) di folder source yang base name-nya
+        tercantum di sheet Code. Jika satu base name ada dalam beberapa format, dipilih
+        format pertama di SOURCE_EXTENSIONS (parquet > csv.gz > csv > xlsx).
+        """
+        names = set(self.code[SOURCE_CODE_COLUMNS[source]].astype(str).str.strip().str.lower())
+        chosen = {}
+        for f in sorted(glob.glob(os.path.join(self.path(source), '*'))):
+            ext = source_extension(f)
+            base = source_base_name(f).lower()
+            if ext is None or base not in names or os.path.basename(f).startswith('~$'):
+                continue
+            if base not in chosen or SOURCE_EXTENSIONS.index(ext) < SOURCE_EXTENSIONS.index(source_extension(chosen[base])):
+                chosen[base] = f
+        return sorted(chosen.values())
+
+
+def _validate(config):
+    problems = []
+    for name in SOURCE_FOLDERS.get(config.jenis, []):
+        folder = config.paths.get(name)
+        if not folder:
+            problems.append(f"File Path '{name}' kosong")
+        elif not os.path.isdir(folder):
+            problems.append(f"Folder '{name}' tidak ditemukan: {folder}")
+    manual = config.paths.get('rafm manual')
+    if manual and not os.path.isfile(manual):
+        problems.append(f"File RAFM manual tidak ditemukan: {manual}")
+    return problems
+
+
+def _normalize_file_path(df):
+    df = df.copy()
+    df.columns = df.columns.str.strip()
+    df['Name'] = df['Name'].astype(str).str.strip().str.lower()
+    df['File Path'] = df['File Path'].map(_strip_value)
+    return df
+
+
+def read_run_config(input_excel, jenis=None):
+    """
+    Baca semua sheet input workbook dalam satu kali buka file.
+
+    Jenis: argumen jenis > baris 'jenis' di sheet File Path > nama file.
+    """
+    with pd.ExcelFile(input_excel) as excel_file:
+        if 'File Path' not in excel_file.sheet_names:
+            raise ValueError(f"Sheet 'File Path' tidak ditemukan di {os.path.basename(input_excel)}")
+        file_path_df = _normalize_file_path(pd.read_excel(excel_file, sheet_name='File Path'))
+
+        paths = {}
+        for name, value in zip(file_path_df['Name'], file_path_df['File Path']):
+            if name not in paths:
+                paths[name] = None if pd.isna(value) else str(value)
+
+        if jenis is None and paths.get('jenis') and paths['jenis'].lower() in REQUIRED_SHEETS:
+            jenis = paths['jenis'].lower()
+        if jenis is None:
+            jenis = detect_jenis_from_name(input_excel)
+        if jenis not in REQUIRED_SHEETS:
+            raise ValueError(f"Jenis file tidak dikenali: {os.path.basename(input_excel)}")
+
+        missing = [s for s in REQUIRED_SHEETS[jenis] if s not in excel_file.sheet_names]
+        if missing:
+            raise ValueError(f"Sheet tidak ditemukan di {os.path.basename(input_excel)}: {missing}")
+
+        sheets = {s: pd.read_excel(excel_file, sheet_name=s)
+                  for s in REQUIRED_SHEETS[jenis] if s != 'File Path'}
+
+    config = RunConfig(
+        input_excel=input_excel,
+        jenis=jenis,
+        code=_normalize_frame(sheets['Code']),
+        sign_logic=sheets['Sign Logic'],
+        control=sheets['Control'],
+        file_path=file_path_df,
+        filter_rafm=_normalize_frame(sheets['Filter RAFM']) if 'Filter RAFM' in sheets else None,
+        filter_uvsg=_normalize_frame(sheets['Filter UVSG']) if 'Filter UVSG' in sheets else None,
+        paths=paths,
+    )
+    config.problems = _validate(config)
+    return config
+
+
+def load_run_config(input_excel, jenis=None, use_cache=True):
+    """
+    RunConfig untuk input workbook, di-cache di memori per (path, mtime, size) supaya
+    batch job yang memakai workbook yang sama tidak mem-parse ulang.
+    """
+    key = os.path.abspath(input_excel)
+    stat = os.stat(input_excel)
+    stamp = (stat.st_mtime, stat.st_size, jenis)
+
+    if use_cache:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    config = read_run_config(input_excel, jenis)
+    for problem in config.problems:
+        print(f"⚠️ {os.path.basename(input_excel)}: {problem}")
+
+    with _cache_lock:
+        _cache[key] = (stamp, config)
+    return config
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,177 @@
+"""
+Structured run log: record dari pool worker dan parent dikirim lewat satu queue ke
+listener di parent, ditulis ke file JSON-lines per run dan diringkas di console.
+
+Worker tidak pernah print: kernel memanggil log_event(level, pesan, file=..., sheet=...,
+stage=..., counter lain), QueueHandler mengirim record ke parent. Di console hanya error
+yang langsung tampil; warning dikelompokkan per stage + pesan dan di-print di akhir run
+(RunLog.close). Tanpa RunLog aktif (standalone trad / ul / reas main) warning dan error
+langsung di-print seperti sebelumnya, info dibuang.
+
+Modul ini hanya memakai stdlib (di-import kernel di worker).
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import Counter, defaultdict
+
+DEFAULT_LOG_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or tempfile.gettempdir(), 'control4_logs')
+LOGGER_NAME = 'control4'
+LEVELS = {'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+LEVEL_ICONS = {logging.WARNING: '⚠️', logging.ERROR: '❌'}
+# Contoh file per grup warning di ringkasan console
+SUMMARY_EXAMPLES = 3
+
+_logger = logging.getLogger(LOGGER_NAME)
+_logger.propagate = False
+_logger.setLevel(logging.INFO)
+# Penanda akhir run: RunLog.close menunggu record ini lewat listener
+_FLUSH = '__flush__'
+
+_queue = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def log_event(level, message, **fields):
+    """Record terstruktur: fields umum file, sheet, stage, plus counter (rows, skipped, ...)"""
+    _logger.log(LEVELS[level], message, extra={'fields': fields})
+
+
+def attach_worker(log_queue):
+    """Dipanggil pool initializer: semua record worker dikirim ke queue parent"""
+    if log_queue is None:
+        _logger.handlers[:] = [_ConsoleFallback()]
+    else:
+        _logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+
+
+def format_record(record):
+    """Satu baris console: '⚠️ [argo] ARGO_PROD_A / Sheet1: pesan'"""
+    fields = getattr(record, 'fields', {})
+    where = ' / '.join(str(fields[k]) for k in ('file', 'sheet') if fields.get(k))
+    stage = f"[{fields['stage']}] " if fields.get('stage') else ''
+    icon = LEVEL_ICONS.get(record.levelno, 'ℹ️')
+    detail = f" ({', '.join(map(str, fields['columns']))})" if fields.get('columns') else ''
+    return f"{icon} {stage}{where + ': ' if where else ''}{record.getMessage()}{detail}"
+
+
+class _ConsoleFallback(logging.Handler):
+    """Tanpa RunLog aktif: warning / error langsung ke console"""
+
+    def emit(self, record):
+        if record.levelno >= logging.WARNING:
+            print(format_record(record))
+
+
+class _Dispatch(logging.Handler):
+    """Handler listener: teruskan record ke RunLog yang aktif, atau fallback console"""
+
+    def __init__(self):
+        super().__init__()
+        self.run = None
+        self.fallback = _ConsoleFallback()
+
+    def handle(self, record):
+        run = self.run
+        if run is not None:
+            run.handle(record)
+        else:
+            self.fallback.handle(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+
+_dispatch = _Dispatch()
+_logger.addHandler(_dispatch.fallback)
+
+
+def worker_queue():
+    """Queue bersama untuk semua pool (dibuat sekali per proses parent, listener ikut start)"""
+    global _queue, _listener
+    with _setup_lock:
+        if _queue is None:
+            _queue = multiprocessing.Queue()
+            _listener = logging.handlers.QueueListener(_queue, _dispatch, respect_handler_level=False)
+            _listener.start()
+            atexit.register(_listener.stop)
+            # record dari parent ikut lewat queue yang sama, jadi hanya listener yang menulis
+            attach_worker(_queue)
+        return _queue
+
+
+class RunLog:
+    """
+    Satu run main: file JSON-lines + ringkasan console.
+
+    Record JSON: ts, level, pid, message, lalu fields (file, sheet, stage, counter).
+    """
+
+    def __init__(self, root=None, name=None):
+        self.root = root or DEFAULT_LOG_DIR
+        os.makedirs(self.root, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(self.root, f"{name or 'run'}_{stamp}_{os.getpid()}.jsonl")
+        self._fh = open(self.path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.levels = Counter()
+        self.warnings = defaultdict(list)
+        self._flushed = threading.Event()
+
+    def start(self):
+        worker_queue()
+        _dispatch.run = self
+        return self
+
+    def handle(self, record):
+        fields = getattr(record, 'fields', {})
+        if record.getMessage() == _FLUSH:
+            if fields.get('run') == self.path:
+                self._flushed.set()
+            return
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'pid': record.process,
+            'message': record.getMessage(),
+            **fields,
+        }
+        with self._lock:
+            self._fh.write(json.dumps(entry, default=str, ensure_ascii=False) + '\n')
+            self.levels[record.levelno] += 1
+            if record.levelno == logging.WARNING:
+                self.warnings[(fields.get('stage'), record.getMessage())].append(fields.get('file'))
+        if record.levelno >= logging.ERROR:
+            print(format_record(record))
+
+    def close(self):
+        """Tunggu record yang masih di queue, lepas dari listener, print ringkasan warning"""
+        if self._fh.closed:
+            return
+        if _dispatch.run is self:
+            log_event('info', _FLUSH, run=self.path)
+            self._flushed.wait(timeout=10)
+            _dispatch.run = None
+        with self._lock:
+            self._fh.close()
+        for (stage, message), files in sorted(self.warnings.items(), key=lambda kv: -len(kv[1])):
+            names = sorted({f for f in files if f})
+            examples = ', '.join(names[:SUMMARY_EXAMPLES]) + (', ...' if len(names) > SUMMARY_EXAMPLES else '')
+            print(f"⚠️ {len(files)}x {f'[{stage}] ' if stage else ''}{message}"
+                  f"{f' ({examples})' if examples else ''}")
+        print(f"📒 Run log: {self.levels[logging.INFO]} info, {self.levels[logging.WARNING]} warning, "
+              f"{self.levels[logging.ERROR]} error -> {self.path}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
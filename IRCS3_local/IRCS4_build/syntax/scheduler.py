@@ -0,0 +1,387 @@
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from queue import Empty
+
+from syntax.kernels import failure_result, guarded_call, init_worker, worker_info
+from syntax.readers import source_base_name
+from syntax.result_cache import MISS
+from syntax.runlog import log_event, worker_queue
+
+# Target worker siap (spawn + import kernel) dalam hitungan detik
+WORKER_READY_TARGET_SECONDS = 1.0
+# Batas waktu satu file task sejak masuk worker, dan jumlah retry per file
+TASK_TIMEOUT_SECONDS = 30 * 60
+TASK_RETRIES = 1
+POLL_SECONDS = 1.0
+
+
+class TaskLog:
+    """Status per file task (ok / failed / timeout / crashed) untuk satu input workbook"""
+
+    def __init__(self):
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, item, status, attempts, seconds=0.0, error=None):
+        name = item.get('file_name') or source_base_name(item['file_path'])
+        with self._lock:
+            self.entries[item['file_path']] = {'file': name, 'status': status, 'attempts': attempts,
+                                               'seconds': seconds, 'error': error}
+        log_event('info', "Task selesai", stage='task', file=name, status=status, attempts=attempts,
+                  seconds=round(seconds, 3))
+
+    def failed(self):
+        """Nama file (base name) yang tetap gagal setelah retry"""
+        with self._lock:
+            return sorted({e['file'] for e in self.entries.values() if e['status'] != 'ok'})
+
+    def retried(self):
+        with self._lock:
+            return sum(1 for e in self.entries.values() if e['status'] == 'ok' and e['attempts'] > 1)
+
+
+class BatchScheduler:
+    """
+    Pemilik satu-satunya worker budget untuk satu batch.
+
+    Semua file task (ARGO / RAFM / UVSG) dari semua input workbook dikirim ke satu
+    ProcessPoolExecutor bersama, jadi tidak ada pool bersarang (cores x cores proses)
+    dan concurrency tetap terbatas, mau memproses 1 input atau 20 input sekaligus.
+    Library untuk reader backend (openpyxl / calamine) di-warm di setiap worker.
+
+    Failure domain per pemanggil run_tasks: task yang terdampak crash / timeout diulang
+    di pool privat milik pemanggil itu. Pool bersama tidak pernah di-terminate selama
+    masih ada task pemanggil lain (atau writer) yang jalan di dalamnya.
+    """
+
+    def __init__(self, max_workers=None, reader='openpyxl'):
+        self.max_workers = max(1, int(max_workers or os.cpu_count() or 4))
+        self.reader = reader
+        self._executor = None
+        self._lock = threading.Lock()
+        self._created_at = None
+        self._started_queue = multiprocessing.Queue()
+        self._started = {}
+        self._tokens = itertools.count()
+        self._inflight = {}
+        self._reapers = []
+
+    def _new_executor(self, workers):
+        return ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(self.reader, worker_queue(), self._started_queue))
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._created_at = time.time()
+                self._executor = self._new_executor(self.max_workers)
+                self._inflight[self._executor] = set()
+            return self._executor
+
+    def warm_up(self):
+        """
+        Start semua worker sekarang dan ukur kesiapannya.
+
+        Returns:
+            dict {'workers', 'ready_seconds', 'max_import_seconds'}
+        """
+        executor = self._get_executor()
+        probes = [executor.submit(worker_info) for _ in range(self.max_workers)]
+        infos = [p.result() for p in probes]
+        ready_seconds = max(i['ready_at'] for i in infos) - self._created_at
+        report = {
+            'workers': len({i['pid'] for i in infos}),
+            'ready_seconds': max(ready_seconds, 0.0),
+            'max_import_seconds': max(i['import_seconds'] for i in infos),
+        }
+        flag = '✅' if report['ready_seconds'] <= WORKER_READY_TARGET_SECONDS else '⚠️'
+        print(f"{flag} Worker siap ({infos[0]['reader']}): {report['workers']} proses dalam {report['ready_seconds']:.2f} detik "
+              f"(import kernel maks {report['max_import_seconds']:.3f} detik, "
+              f"target < {WORKER_READY_TARGET_SECONDS:.0f} detik)")
+        return report
+
+    def submit(self, fn, *args):
+        return self._submit_to(self._get_executor(), fn, *args)
+
+    def _submit_to(self, executor, fn, *args):
+        future = executor.submit(fn, *args)
+        with self._lock:
+            inflight = self._inflight.get(executor)
+            if inflight is not None:
+                inflight.add(future)
+        if inflight is not None:
+            future.add_done_callback(lambda f: self._forget(executor, f))
+        return future
+
+    def _forget(self, executor, future):
+        with self._lock:
+            self._inflight.get(executor, set()).discard(future)
+
+    def map(self, fn, items):
+        """Submit semua item ke pool bersama, hasil dikembalikan sesuai urutan input"""
+        items = list(items)
+        if not items:
+            return []
+        futures = [self.submit(fn, item) for item in items]
+        return [f.result() for f in futures]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            reapers, self._reapers = self._reapers, []
+            self._inflight.pop(executor, None)
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if wait:
+            for reaper in reapers:
+                reaper.join()
+
+    def _started_at(self, tokens):
+        """{token: timestamp mulai di worker} untuk task yang sudah diambil worker"""
+        with self._lock:
+            while True:
+                try:
+                    token, _, started = self._started_queue.get_nowait()
+                except (Empty, OSError, ValueError):
+                    break
+                self._started[token] = started
+            return {t: self._started[t] for t in tokens if t in self._started}
+
+    def _detach(self, executor):
+        """Pool bersama yang rusak tidak dipakai lagi; submit berikutnya membuat pool baru"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+    def _retire(self, executor, abandoned):
+        """
+        Pool bersama dengan worker macet: submit berikutnya ke pool baru, pool lama
+        di-terminate setelah semua task lain di dalamnya selesai (abandoned: future
+        milik pemanggil yang sudah diulang di tempat lain).
+        """
+        self._detach(executor)
+
+        def reap():
+            while True:
+                with self._lock:
+                    others = self._inflight.get(executor, set()) - abandoned
+                if not others:
+                    break
+                wait(others)
+            with self._lock:
+                self._inflight.pop(executor, None)
+            _terminate(executor)
+
+        reaper = threading.Thread(target=reap, name='pool-reaper', daemon=True)
+        with self._lock:
+            self._reapers.append(reaper)
+        reaper.start()
+
+    def _run_round(self, fn, items, indices, prefetcher, timeout, private=False):
+        """
+        Satu putaran submit + tunggu, di pool bersama atau di pool privat baru (private).
+
+        Timer timeout dihitung sejak task benar-benar diambil worker (sinyal dari
+        guarded_call), jadi task yang timeout selalu bisa dipastikan. Crash tidak bisa
+        dipastikan milik task mana: di pool bersama semua task yang belum selesai jadi
+        'collateral'; di pool privat task yang sedang jalan saat crash jadi 'suspect'.
+
+        Returns:
+            {index: (status, hasil, error, detik)} -- status 'ok', 'failed', 'timeout',
+            'crashed' (worker mati saat task jalan sendiri), 'suspect' (sedang jalan
+            saat pool privat crash) atau 'collateral' (terbuang karena crash / timeout
+            task lain); suspect dan collateral tidak dihitung sebagai percobaan
+        """
+        executor = self._new_executor(min(self.max_workers, len(indices))) if private else self._get_executor()
+        futures = {}
+        for i in indices:
+            item = prefetcher.localize(items[i]) if prefetcher is not None else items[i]
+            token = next(self._tokens)
+            futures[self._submit_to(executor, guarded_call, fn, item, token)] = (i, token)
+
+        isolated = private and len(futures) == 1
+        outcome, pending, broken, late = {}, set(futures), False, set()
+        while pending and not broken and not late:
+            done, pending = wait(pending, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for f in done:
+                i = futures[f][0]
+                try:
+                    outcome[i] = f.result()
+                except BrokenProcessPool:
+                    broken = True
+                except Exception as e:
+                    outcome[i] = ('failed', None, f"{type(e).__name__}: {e}", 0.0)
+            started = self._started_at([futures[f][1] for f in pending])
+            now = time.time()
+            late = {f for f in pending if now - started.get(futures[f][1], now) > timeout}
+
+        unfinished = [f for f in futures if futures[f][0] not in outcome]
+        started = self._started_at([futures[f][1] for f in unfinished])
+        running = {f for f in unfinished if futures[f][1] in started}
+        if private and broken and not running:
+            # Sinyal mulai bisa hilang bersama worker yang crash: anggap semua tersangka
+            running = set(unfinished)
+        for f in unfinished:
+            i = futures[f][0]
+            if f in late:
+                outcome[i] = ('timeout', None, f"timeout {timeout:.0f} detik", timeout)
+            elif broken and isolated:
+                outcome[i] = ('crashed', None, 'worker crash', 0.0)
+            elif broken and private and f in running:
+                outcome[i] = ('suspect', None, 'worker crash', 0.0)
+            else:
+                outcome[i] = ('collateral', None, 'worker crash' if broken else 'pool diganti', 0.0)
+        with self._lock:
+            for _, token in futures.values():
+                self._started.pop(token, None)
+
+        if private:
+            if broken or late:
+                _terminate(executor)
+            else:
+                executor.shutdown(wait=True)
+        elif broken:
+            self._detach(executor)
+            with self._lock:
+                self._inflight.pop(executor, None)
+            executor.shutdown(wait=False)
+            print(f"💥 Worker crash, {len(unfinished)} task diulang di pool baru")
+        elif late:
+            for f in unfinished:
+                f.cancel()
+            self._retire(executor, set(unfinished))
+            print(f"⏱️ {len(late)} task melewati {timeout:.0f} detik, pool bersama diganti setelah "
+                  f"task lain selesai; {len(unfinished) - len(late)} task lain diulang di pool baru")
+        return outcome
+
+    def run_tasks(self, fn, items, prefetcher=None, log=None, timeout=TASK_TIMEOUT_SECONDS,
+                  retries=TASK_RETRIES):
+        """
+        Jalankan file task dengan status per file.
+
+        Error kernel di-retry bersama task lain (maks retries kali). Task yang terbuang
+        karena crash / timeout task lain diulang bersama dalam satu putaran paralel di pool
+        privat baru; jika pool itu crash lagi, hanya task yang sedang jalan saat crash yang
+        diulang satu per satu. Task yang timeout di-retry sendiri. Task yang sudah selesai
+        tidak diulang.
+
+        Returns:
+            (list hasil sesuai urutan items, set index yang tetap gagal -- hasilnya
+            failure_result kernel)
+        """
+        results = [None] * len(items)
+        attempts = [0] * len(items)
+        failed = set()
+        queue, recover, isolate = list(range(len(items))), [], []
+        while queue or recover or isolate:
+            if queue:
+                batch, queue, private = queue, [], False
+            elif recover:
+                batch, recover, private = recover, [], True
+            else:
+                batch, private = [isolate.pop(0)], True
+            for i, (status, value, error, seconds) in self._run_round(fn, items, batch, prefetcher,
+                                                                        timeout, private).items():
+                if status == 'collateral':
+                    recover.append(i)
+                    continue
+                if status == 'suspect':
+                    isolate.append(i)
+                    continue
+                attempts[i] += 1
+                if status == 'ok':
+                    results[i] = value
+                    if log is not None:
+                        log.record(items[i], status, attempts[i], seconds)
+                    continue
+                name = items[i].get('file_name') or source_base_name(items[i]['file_path'])
+                if attempts[i] <= retries:
+                    log_event('warning', f"Task {status}, dicoba lagi", stage='task', file=name, error=error)
+                    (queue if status == 'failed' else isolate).append(i)
+                    continue
+                log_event('error', f"Task {status} setelah {attempts[i]} percobaan ({error})",
+                          stage='task', file=name)
+                results[i] = failure_result(fn, items[i])
+                failed.add(i)
+                if log is not None:
+                    log.record(items[i], status, attempts[i], seconds, error)
+        return results, failed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+def _terminate(executor):
+    """Terminate semua proses pool (hanya untuk pool yang tidak dipakai pemanggil lain)"""
+    for proc in list((getattr(executor, '_processes', None) or {}).values()):
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_file_tasks(params, fn, items):
+    """
+    Jalankan file task lewat scheduler bersama di params['scheduler'] jika ada,
+    kalau tidak pakai pool sementara (standalone trad/ul/reas main).
+    Dengan params['prefetcher'] tiap task dibaca dari copy lokal hasil prefetch.
+    Dengan params['cache'] (ResultCache) hanya file yang berubah / belum ada di cache
+    yang di-scan; hasil lain diambil dari cache sesuai urutan input. Status per file
+    dicatat di params['task_log'] (TaskLog); file yang gagal tidak masuk cache.
+    Statistik scan kernel (juga dari cache) ditambahkan ke list params['scan_stats'] jika ada.
+
+    Returns:
+        list hasil kernel sesuai urutan items (tanpa statistik scan)
+    """
+    items = list(items)
+    cache = params.get('cache')
+    if cache is None:
+        return _split_stats(params, _run_tasks(params, fn, items)[0])
+
+    results, pending = [None] * len(items), []
+    for i, item in enumerate(items):
+        hit = cache.lookup(fn, item)
+        if hit is MISS:
+            pending.append(i)
+        else:
+            results[i] = hit
+    computed, failed = _run_tasks(params, fn, [items[i] for i in pending])
+    for pos, (i, result) in enumerate(zip(pending, computed)):
+        if pos not in failed:
+            cache.store(fn, items[i], result)
+        results[i] = result
+    return _split_stats(params, results)
+
+
+def _split_stats(params, results):
+    collected = params.get('scan_stats')
+    values = []
+    for value, stats in results:
+        if stats is not None and collected is not None:
+            collected.append(stats)
+        values.append(value)
+    return values
+
+
+def _run_tasks(params, fn, items):
+    if not items:
+        return [], set()
+    options = {'prefetcher': params.get('prefetcher'), 'log': params.get('task_log'),
+               'timeout': params.get('task_timeout', TASK_TIMEOUT_SECONDS),
+               'retries': params.get('task_retries', TASK_RETRIES)}
+    scheduler = params.get('scheduler')
+    if scheduler is not None:
+        return scheduler.run_tasks(fn, items, **options)
+
+    workers = min(os.cpu_count() or 4, len(items))
+    with BatchScheduler(workers, reader=params.get('reader', 'openpyxl')) as local:
+        return local.run_tasks(fn, items, **options)
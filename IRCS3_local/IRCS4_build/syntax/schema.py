@@ -0,0 +1,126 @@
+"""
+Schema frame intermediate trad / ul / reas.
+
+Hasil kernel per file (list dict) dibangun langsung jadi frame bertipe: measure float64,
+nama file categorical. Kolom No di sheet output int64, kecuali CF ARGO yang punya label
+'check sign'. Post-processing tidak perlu round-trip lewat string lagi karena dtype-nya
+sudah pasti.
+
+Perbedaan dengan schema yang dideklarasikan (kolom measure tidak ada di source, kolom
+tidak dikenal, nilai bukan angka) dilaporkan sebagai schema drift, bukan error.
+
+Statistik scan per file dari kernel dibangun jadi frame 'Scan Statistics' (satu baris per
+file x measure) untuk menjelaskan total yang mencurigakan tanpa scan ulang.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+MEASURE_DTYPE = np.float64
+KERNEL_KEY = 'File_Name'
+SCAN_STATS_SHEET = 'Scan Statistics'
+SCAN_STATS_COUNTS = ['Rows Scanned', 'Dropped GOC Filter', 'Dropped No Period', 'Dropped Period Filter',
+                     'Dropped Threshold', 'Rows Used', 'Parsed', 'Unparseable', 'Zero']
+
+
+@dataclass(frozen=True)
+class FrameSchema:
+    name: str
+    measures: tuple
+
+
+def _as_float(value):
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def totals_frame(rows, schema):
+    """
+    List dict hasil kernel -> DataFrame bertipe (File_Name categorical, measure float64).
+
+    Kolom mengikuti urutan kemunculan di rows seperti pd.DataFrame(rows); measure yang
+    dideklarasikan tapi tidak ada di source tidak ditambahkan, hanya dilaporkan.
+    """
+    rows = [row for row in rows if row]
+    columns = list(dict.fromkeys(col for row in rows for col in row))
+    drift = []
+    missing = [col for col in schema.measures if col not in columns]
+    if rows and missing:
+        drift.append(f"tidak ada di source: {missing}")
+    unknown = [col for col in columns if col != KERNEL_KEY and col not in schema.measures]
+    if unknown:
+        drift.append(f"kolom tidak dikenal: {unknown}")
+
+    data = {}
+    for col in columns:
+        if col == KERNEL_KEY:
+            data[col] = pd.Categorical([row.get(col) for row in rows])
+            continue
+        values = [_as_float(row.get(col)) for row in rows]
+        bad = sum(v is None for v in values)
+        if bad:
+            drift.append(f"{col}: {bad} nilai bukan angka")
+        data[col] = np.fromiter((np.nan if v is None else v for v in values), dtype=MEASURE_DTYPE, count=len(values))
+
+    if drift:
+        print(f"⚠️ Schema drift {schema.name}: {'; '.join(drift)}")
+    return pd.DataFrame(data, columns=columns)
+
+
+def empty_totals(schema):
+    """Frame totals tanpa baris (tidak ada source file) dengan dtype schema"""
+    data = {KERNEL_KEY: pd.Categorical([])}
+    data.update({col: np.array([], dtype=MEASURE_DTYPE) for col in dict.fromkeys(schema.measures)})
+    return pd.DataFrame(data)
+
+
+def fill_totals(merged, totals, key, value=0.0):
+    """
+    Setelah merge Code + totals: fillna hanya di kolom measure yang berasal dari totals
+    (termasuk kolom turunan seperti dac / nattr_exp); kolom nama file dan parameter
+    dari sheet Code tetap apa adanya, jadi dtype-nya tidak berubah jadi object.
+    """
+    cols = [col for col in totals.columns if col != key and col in merged.columns]
+    merged[cols] = merged[cols].fillna(value).astype(MEASURE_DTYPE)
+    return merged
+
+
+def scan_statistics_frame(stats):
+    """
+    List statistik scan kernel -> frame Scan Statistics: funnel baris (scan, dibuang per
+    filter, dipakai) dan kualitas parse per measure (parsed, tidak bisa di-parse, nol,
+    min, max). Counter int64, min / max float64.
+    """
+    rows = []
+    for record in stats:
+        dropped = record['dropped']
+        common = dropped.get('goc_filter', 0) + dropped.get('no_period', 0) + dropped.get('period_filter', 0)
+        for measure, m in record['measures'].items():
+            rows.append({
+                'Stage': record['stage'].upper(),
+                'File Name': record['file'],
+                'Measure': measure,
+                'Rows Scanned': record['rows'],
+                'Dropped GOC Filter': dropped.get('goc_filter', 0),
+                'Dropped No Period': dropped.get('no_period', 0),
+                'Dropped Period Filter': dropped.get('period_filter', 0),
+                'Threshold': m['threshold'] or '-',
+                'Dropped Threshold': m['dropped_threshold'],
+                'Rows Used': record['rows'] - common - m['dropped_threshold'],
+                'Parsed': m['parsed'],
+                'Unparseable': m['unparseable'],
+                'Zero': m['zero'],
+                'Min': m['min'],
+                'Max': m['max'],
+            })
+    columns = ['Stage', 'File Name', 'Measure', 'Rows Scanned', 'Dropped GOC Filter', 'Dropped No Period',
+               'Dropped Period Filter', 'Threshold', 'Dropped Threshold', 'Rows Used', 'Parsed', 'Unparseable', 'Zero', 'Min', 'Max']
+    df = pd.DataFrame(rows, columns=columns)
+    df[SCAN_STATS_COUNTS] = df[SCAN_STATS_COUNTS].astype(np.int64)
+    df[['Min', 'Max']] = df[['Min', 'Max']].astype(MEASURE_DTYPE)
+    return df
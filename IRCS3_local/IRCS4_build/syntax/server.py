@@ -0,0 +1,184 @@
+"""
+Server lokal yang menjaga pool worker, ResultCache dan cache RunConfig tetap hidup.
+
+Run lewat script langsung membayar start interpreter, import pandas / openpyxl di parent
+dan di setiap worker, pembuatan pool, dan cache yang dingin. Server membayar itu sekali;
+job berikutnya (lewat syntax/client.py) langsung memakai worker yang sudah warm dan
+hasil per file yang masih ada di memori.
+
+Protocol (HTTP, hanya 127.0.0.1):
+  POST /run       body JSON {"input": path, opsi main...}; respons stream JSON per baris:
+                  {"event": "log", "line": ...} lalu {"event": "done", "outputs", "seconds", "error"}
+  GET  /status    status server (worker, job, cache)
+  POST /shutdown  hentikan server
+Job dijalankan satu per satu: output xlwings harus serial dan pool dipakai bersama.
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from syntax.client import DEFAULT_HOST, DEFAULT_PORT
+from syntax.main import main
+from syntax.result_cache import ResultCache
+from syntax.scheduler import BatchScheduler
+
+# Argumen main yang boleh dikirim client (reader / worker budget milik server)
+JOB_OPTIONS = ('pipeline', 'compute_concurrency', 'preflight', 'prefetch', 'mirror_dir', 'mirror_max_gb',
+               'only', 'select', 'period', 'history', 'retry_failed', 'writer', 'incremental',
+               'formula_mode')
+
+
+class _LineStream(io.TextIOBase):
+    """stdout pengganti selama job: tiap baris di-echo ke console server dan dikirim ke client"""
+
+    def __init__(self, emit):
+        self._emit = emit
+        self._buffer = ''
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer += text
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            self._emit(line)
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            line, self._buffer = self._buffer, ''
+            self._emit(line)
+
+
+class JobServer:
+    """State yang hidup selama server berjalan"""
+
+    def __init__(self, max_workers=None, reader='openpyxl'):
+        self.scheduler = BatchScheduler(max_workers, reader=reader)
+        self.cache = ResultCache()
+        self.started_at = time.time()
+        self.jobs = 0
+        self.current = None
+        self._job_lock = threading.Lock()
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'reader': self.scheduler.reader,
+            'workers': self.scheduler.max_workers,
+            'jobs_done': self.jobs,
+            'current_job': self.current,
+            'cache': dict(self.cache.stats),
+        }
+
+    def run(self, job, send):
+        """Jalankan satu job; send(event dict) dipanggil untuk setiap baris output"""
+        kwargs = {k: job[k] for k in JOB_OPTIONS if k in job}
+
+        def emit(line):
+            sys.__stdout__.write(line + '\n')
+            send({'event': 'log', 'line': line})
+
+        if not self._job_lock.acquire(blocking=False):
+            emit(f"⏳ Menunggu job lain selesai: {self.current}")
+            self._job_lock.acquire()
+        t0 = time.time()
+        outputs, error = [], None
+        try:
+            self.current = job['input']
+            stream = _LineStream(emit)
+            with contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+                try:
+                    outputs = main(job['input'], scheduler=self.scheduler, cache=self.cache, **kwargs) or []
+                except Exception as e:
+                    traceback.print_exc()
+                    error = f"{type(e).__name__}: {e}"
+            stream.flush()
+        finally:
+            self.current = None
+            self.jobs += 1
+            self._job_lock.release()
+        send({'event': 'done', 'outputs': outputs, 'seconds': time.time() - t0, 'error': error})
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    server_version = 'control4'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_event(self, event):
+        """Client yang sudah disconnect tidak menghentikan job"""
+        if self._disconnected:
+            return
+        try:
+            self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+            self.wfile.flush()
+        except OSError:
+            self._disconnected = True
+
+    def do_GET(self):
+        if self.path == '/status':
+            self._json(200, self.server.state.status())
+        else:
+            self._json(404, {'error': f"path tidak dikenal: {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            job = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._json(400, {'error': f"body bukan JSON: {e}"})
+            return
+
+        if self.path == '/shutdown':
+            self._json(200, {'status': 'stopping'})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if self.path != '/run':
+            self._json(404, {'error': f"path tidak dikenal: {self.path}"})
+            return
+        if not job.get('input') or not os.path.exists(job['input']):
+            self._json(400, {'error': f"input tidak ditemukan: {job.get('input')}"})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        self._disconnected = False
+        self.server.state.run(job, self._send_event)
+
+
+def serve(port=DEFAULT_PORT, max_workers=None, reader='openpyxl'):
+    """Start server (blocking sampai Ctrl+C atau POST /shutdown)"""
+    state = JobServer(max_workers, reader)
+    print(f"🧮 Worker budget: {state.scheduler.max_workers} proses, reader {reader}")
+    state.scheduler.warm_up()
+
+    httpd = ThreadingHTTPServer((DEFAULT_HOST, port), JobHandler)
+    httpd.state = state
+    print(f"🚀 Server siap di http://{DEFAULT_HOST}:{port} (Ctrl+C untuk berhenti)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        state.scheduler.shutdown()
+        print(f"👋 Server berhenti setelah {state.jobs} job")
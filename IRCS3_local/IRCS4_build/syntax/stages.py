@@ -0,0 +1,107 @@
+"""
+Pipeline trad / ul / reas sebagai graph stage yang dijalankan lazy dari output.
+
+Setiap jenis mendaftarkan stage (fungsi + dependency + source folder yang dibaca) dan
+output sheet yang dihasilkan stage tertentu. Caller menyebut output yang diminta
+(nama sheet atau alias seperti 'check-sign'); hanya stage upstream output itu yang
+dijalankan, dan hanya source folder yang dibutuhkan yang di-preflight / di-scan.
+"""
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: object
+    deps: tuple = ()
+    sources: tuple = ()
+
+
+class StageGraph:
+
+    def __init__(self, jenis):
+        self.jenis = jenis
+        self.stages = {}
+        self.outputs = {}
+        self.aliases = {}
+
+    def stage(self, name, deps=(), sources=()):
+        """Decorator: fn(ctx, *hasil deps) -> hasil stage"""
+        def register(fn):
+            self.stages[name] = Stage(name, fn, tuple(deps), tuple(sources))
+            return fn
+        return register
+
+    def output(self, sheet, stage):
+        self.outputs[sheet] = stage
+
+    def alias(self, alias, *sheets):
+        self.aliases[alias.lower()] = list(sheets)
+
+    def resolve_outputs(self, only=None):
+        """
+        only: None (semua), nama sheet / alias, atau list keduanya (case-insensitive).
+
+        Returns:
+            list output sheet sesuai urutan deklarasi; ValueError untuk target tidak dikenal
+        """
+        if not only:
+            return list(self.outputs)
+        if isinstance(only, str):
+            only = [t for t in only.split(',')]
+        by_name = {sheet.lower(): sheet for sheet in self.outputs}
+        wanted = set()
+        for target in only:
+            key = target.strip().lower()
+            if key in self.aliases:
+                wanted.update(self.aliases[key])
+            elif key in by_name:
+                wanted.add(by_name[key])
+            else:
+                options = list(self.outputs) + sorted(self.aliases)
+                raise ValueError(f"Target '{target}' tidak dikenal untuk {self.jenis.upper()} "
+                                 f"(pilihan: {', '.join(options)})")
+        return [sheet for sheet in self.outputs if sheet in wanted]
+
+    def plan(self, outputs):
+        """Urutan stage (dependency dulu) yang dibutuhkan untuk output sheet"""
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for sheet in outputs:
+            visit(self.outputs[sheet])
+        return order
+
+    def sources(self, only=None):
+        """Source folder yang dibaca untuk target only"""
+        needed = set()
+        for name in self.plan(self.resolve_outputs(only)):
+            needed.update(self.stages[name].sources)
+        return needed
+
+    def run(self, ctx, only=None):
+        """
+        Jalankan stage yang dibutuhkan (masing-masing sekali).
+
+        Returns:
+            dict {output sheet: DataFrame} untuk output yang diminta, urut deklarasi
+        """
+        outputs = self.resolve_outputs(only)
+        values, timings = {}, []
+        for name in self.plan(outputs):
+            stage = self.stages[name]
+            t0 = time.time()
+            values[name] = stage.fn(ctx, *[values[d] for d in stage.deps])
+            timings.append(f"{name} {time.time() - t0:.2f}s")
+        if only:
+            print(f"🧩 Target: {', '.join(outputs)}")
+        print(f"🧩 Stage {self.jenis.upper()}: {', '.join(timings)}")
+        return {sheet: values[self.outputs[sheet]] for sheet in outputs}
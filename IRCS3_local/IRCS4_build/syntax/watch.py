@@ -0,0 +1,96 @@
+"""
+Watch mode: pantau folder source (argo / rafm / uvsg) dari sheet File Path semua input
+workbook, dan jalankan ulang main untuk input yang source file-nya baru / berubah.
+
+Folder di-poll (os.stat per source file yang tercantum di sheet Code); share SMB tidak
+mengirim event inotify, jadi polling dipakai di semua platform. Perubahan dikumpulkan
+sampai folder tenang selama debounce detik (file yang masih di-copy ikut ditunggu),
+baru satu run dijalankan. ResultCache tetap hidup antar run, jadi hanya file yang
+berubah yang di-scan ulang; file lain diambil dari cache. Pool worker juga dibuat dan
+di-warm sekali untuk semua run (seperti server), bukan per update.
+"""
+import os
+import time
+
+from syntax.main import list_input_files, main
+from syntax.result_cache import ResultCache
+from syntax.scheduler import BatchScheduler
+from syntax.run_config import SOURCE_FOLDERS, load_run_config
+
+DEFAULT_POLL_SECONDS = 30
+DEFAULT_DEBOUNCE_SECONDS = 60
+
+
+def source_snapshot(input_file):
+    """{path: (size, mtime)} untuk input workbook dan semua source file-nya"""
+    snapshot = {}
+    paths = [input_file]
+    try:
+        config = load_run_config(input_file)
+        for source in SOURCE_FOLDERS[config.jenis]:
+            if config.paths.get(source):
+                paths.extend(config.source_files(source))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ {os.path.basename(input_file)}: {e}")
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        snapshot[path] = (st.st_size, st.st_mtime)
+    return snapshot
+
+
+def changed_paths(old, new):
+    """File baru, berubah atau hilang antara dua snapshot"""
+    return sorted(p for p in set(old) | set(new) if old.get(p) != new.get(p))
+
+
+def watch(input_path, poll=DEFAULT_POLL_SECONDS, debounce=DEFAULT_DEBOUNCE_SECONDS, **main_kwargs):
+    """
+    Run penuh sekali, lalu loop: poll source folder, tunggu debounce, run ulang input
+    yang terdampak. main_kwargs diteruskan ke main (reader, only, prefetch, ...).
+    Berhenti dengan Ctrl+C.
+    """
+    cache = ResultCache()
+    scheduler = BatchScheduler(main_kwargs.pop('max_workers', None), reader=main_kwargs.pop('reader', 'openpyxl'))
+    main_kwargs.update(cache=cache, scheduler=scheduler)
+
+    print(f"👀 Watch mode: poll {poll} detik, debounce {debounce} detik (Ctrl+C untuk berhenti)")
+    print(f"🧮 Worker budget: {scheduler.max_workers} proses, reader {scheduler.reader}")
+    pending = {}
+    last_change = None
+    try:
+        scheduler.warm_up()
+        main(input_path, **main_kwargs)
+        snapshots = {f: source_snapshot(f) for f in list_input_files(input_path) or []}
+
+        while True:
+            time.sleep(poll)
+            for input_file in list_input_files(input_path) or []:
+                current = source_snapshot(input_file)
+                changed = changed_paths(snapshots.get(input_file, {}), current)
+                snapshots[input_file] = current
+                if changed:
+                    pending.setdefault(input_file, set()).update(changed)
+                    last_change = time.time()
+                    print(f"📂 {os.path.basename(input_file)}: {len(changed)} file baru / berubah "
+                          f"({', '.join(os.path.basename(p) for p in changed[:5])}"
+                          f"{', ...' if len(changed) > 5 else ''})")
+
+            if not pending or time.time() - last_change < debounce:
+                continue
+
+            for input_file, changed in sorted(pending.items()):
+                for path in changed:
+                    cache.invalidate(path)
+                print(f"\n🔁 Update {os.path.basename(input_file)} ({len(changed)} file berubah)")
+                try:
+                    main(input_file, **main_kwargs)
+                except Exception as e:
+                    print(f"❌ Update gagal, dicoba lagi pada perubahan berikutnya: {e}")
+            pending.clear()
+    except KeyboardInterrupt:
+        print("\n👋 Watch mode dihentikan")
+    finally:
+        scheduler.shutdown()
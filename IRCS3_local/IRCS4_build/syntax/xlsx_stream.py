@@ -0,0 +1,296 @@
+"""
+Reader xlsx minimal berbasis stdlib (zipfile + ElementTree iterparse).
+
+Dipakai untuk membaca manifest workbook (daftar sheet) dan baris-baris awal sheet
+tanpa memuat seluruh sharedStrings atau seluruh sheet, misalnya untuk preflight
+header. Nomor baris dan index kolom absolut (baris 1 = 1, kolom A = 0), sama dengan
+yang dihasilkan openpyxl read-only lewat sheet.values / iter_rows.
+
+Dengan read_ahead=True, part XML (worksheet dan sharedStrings) di-inflate di background
+thread ke ring buffer terbatas sementara parser mengkonsumsi chunk sebelumnya; zlib
+melepas GIL, jadi decompress dan parse XML berjalan overlap. Waktu per fase dicatat di
+phase_seconds ('inflate', 'parse', 'wait').
+"""
+import posixpath
+import queue
+import re
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+_ROW = f'{{{NS_MAIN}}}row'
+_CELL = f'{{{NS_MAIN}}}c'
+_VALUE = f'{{{NS_MAIN}}}v'
+_INLINE = f'{{{NS_MAIN}}}is'
+_TEXT = f'{{{NS_MAIN}}}t'
+_SI = f'{{{NS_MAIN}}}si'
+_COL_RE = re.compile(r'([A-Z]+)')
+
+READ_AHEAD_CHUNK = 1 << 20
+READ_AHEAD_RING = 4
+
+
+def column_index(ref):
+    """'C12' -> 2 (0-based)"""
+    m = _COL_RE.match(ref)
+    idx = 0
+    for ch in m.group(1):
+        idx = idx * 26 + (ord(ch) - 64)
+    return idx - 1
+
+
+def _text_of(elem):
+    """Gabungkan semua <t> di dalam <si> / <is> (termasuk rich text run)"""
+    return ''.join(t.text or '' for t in elem.iter(_TEXT))
+
+
+class ReadAheadStream:
+    """
+    File-like read() di atas part zip yang di-inflate oleh background thread.
+
+    Thread membaca chunk terdekompresi ke queue berukuran ring_size (bounded, jadi
+    memori maksimal ring_size x chunk_size); read() mengambil dari queue.
+    """
+
+    def __init__(self, source, phases, chunk_size=READ_AHEAD_CHUNK, ring_size=READ_AHEAD_RING):
+        self._ring = queue.Queue(maxsize=ring_size)
+        self._phases = phases
+        self._chunk_size = chunk_size
+        self._buffer = b''
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._inflate, args=(source,), daemon=True,
+                                        name='xlsx-read-ahead')
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._ring.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _inflate(self, source):
+        try:
+            with source:
+                while not self._stop.is_set():
+                    t0 = time.perf_counter()
+                    chunk = source.read(self._chunk_size)
+                    self._phases['inflate'] += time.perf_counter() - t0
+                    if not self._put(chunk) or not chunk:
+                        return
+        except Exception as e:
+            self._put(e)
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            t0 = time.perf_counter()
+            item = self._ring.get()
+            self._phases['wait'] += time.perf_counter() - t0
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self._eof = True
+                break
+            self._buffer += item
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self):
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self._ring.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.05)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SharedStrings:
+    """sharedStrings.xml yang di-parse bertahap sampai index yang dibutuhkan saja"""
+
+    def __init__(self, archive, part, opener=None):
+        self._values = []
+        self._iter = None
+        if part is not None and part in archive.namelist():
+            self._source = opener(part) if opener is not None else archive.open(part)
+            self._iter = ET.iterparse(self._source, events=('end',))
+
+    def __getitem__(self, idx):
+        while idx >= len(self._values) and self._iter is not None:
+            try:
+                _, elem = next(self._iter)
+            except StopIteration:
+                self._iter = None
+                self._source.close()
+                break
+            if elem.tag == _SI:
+                self._values.append(_text_of(elem))
+                elem.clear()
+        return self._values[idx] if idx < len(self._values) else None
+
+    def close(self):
+        if self._iter is not None:
+            self._iter = None
+            self._source.close()
+
+
+def convert_cell(cell_type, raw, shared):
+    if raw is None:
+        return None
+    if cell_type == 's':
+        return shared[int(raw)]
+    if cell_type in ('str', 'inlineStr', 'e'):
+        return raw
+    if cell_type == 'b':
+        return raw == '1'
+    try:
+        if '.' in raw or 'E' in raw or 'e' in raw:
+            return float(raw)
+        return int(raw)
+    except ValueError:
+        return raw
+
+
+def parse_row(row_elem, shared, columns=None):
+    """
+    Elemen <row> -> (nomor baris, tuple nilai dengan kolom absolut). Jika columns (set
+    index) diberikan, sel lain tidak dikonversi (dan shared string-nya tidak di-resolve).
+    """
+    cells = {}
+    next_col = 0
+    for c in row_elem.iter(_CELL):
+        ref = c.get('r')
+        col = column_index(ref) if ref else next_col
+        next_col = col + 1
+        if columns is not None and col not in columns:
+            continue
+        cell_type = c.get('t')
+        if cell_type == 'inlineStr':
+            inline = c.find(_INLINE)
+            raw = _text_of(inline) if inline is not None else None
+        else:
+            v = c.find(_VALUE)
+            raw = v.text if v is not None else None
+        cells[col] = convert_cell(cell_type, raw, shared)
+    width = max(cells) + 1 if cells else 0
+    return int(row_elem.get('r', 0)), tuple(cells.get(i) for i in range(width))
+
+
+class XlsxStream:
+    """Akses read-only ke workbook xlsx: manifest sheet + iterasi baris streaming"""
+
+    def __init__(self, path, read_ahead=False):
+        self.path = path
+        self.read_ahead = read_ahead
+        self.phase_seconds = {'inflate': 0.0, 'parse': 0.0, 'wait': 0.0}
+        self._archive = zipfile.ZipFile(path)
+        self._sheet_parts = self._read_manifest()
+        self._shared = None
+        self._streams = []
+
+    def _read_manifest(self):
+        rels = ET.fromstring(self._archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {}
+        for rel in rels.iter(f'{{{NS_PKG_REL}}}Relationship'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[rel.get('Id')] = target
+
+        workbook = ET.fromstring(self._archive.read('xl/workbook.xml'))
+        parts = {}
+        for sheet in workbook.iter(f'{{{NS_MAIN}}}sheet'):
+            rid = sheet.get(f'{{{NS_REL}}}id')
+            if rid in targets:
+                parts[sheet.get('name')] = targets[rid]
+
+        self._shared_part = None
+        for target in targets.values():
+            if target.endswith('sharedStrings.xml'):
+                self._shared_part = target
+        return parts
+
+    @property
+    def sheetnames(self):
+        return list(self._sheet_parts)
+
+    def _open(self, part):
+        if not self.read_ahead:
+            return self._archive.open(part)
+        stream = ReadAheadStream(self._archive.open(part), self.phase_seconds)
+        self._streams.append(stream)
+        return stream
+
+    def shared_strings(self):
+        if self._shared is None:
+            self._shared = SharedStrings(self._archive, self._shared_part, self._open)
+        return self._shared
+
+    def open_part(self, sheet_name):
+        return self._open(self._sheet_parts[sheet_name])
+
+    def iter_rows(self, sheet_name, max_rows=None, columns=None):
+        """
+        Yield (nomor baris, tuple nilai) untuk baris yang ada di XML (baris kosong yang
+        tidak ditulis Excel dilewati). Berhenti setelah max_rows baris jika diberikan.
+        """
+        shared = self.shared_strings()
+        count = 0
+        last_row = 0
+        t0 = time.perf_counter()
+        try:
+            with self.open_part(sheet_name) as source:
+                for _, elem in ET.iterparse(source, events=('end',)):
+                    if elem.tag != _ROW:
+                        continue
+                    row_number, values = parse_row(elem, shared, columns)
+                    last_row = row_number = row_number or last_row + 1
+                    elem.clear()
+                    self.phase_seconds['parse'] += time.perf_counter() - t0
+                    t0 = None
+                    yield row_number, values
+                    t0 = time.perf_counter()
+                    count += 1
+                    if max_rows is not None and count >= max_rows:
+                        return
+        finally:
+            if t0 is not None:
+                self.phase_seconds['parse'] += time.perf_counter() - t0
+
+    def phases(self):
+        """phase_seconds dengan 'parse' bersih (tanpa waktu menunggu read-ahead)"""
+        phases = dict(self.phase_seconds)
+        phases['parse'] = max(0.0, phases['parse'] - phases['wait'])
+        return phases
+
+    def close(self):
+        if self._shared is not None:
+            self._shared.close()
+        for stream in self._streams:
+            stream.close()
+        self._archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
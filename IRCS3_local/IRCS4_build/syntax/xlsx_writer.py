@@ -0,0 +1,899 @@
+"""
+Headless writer output workbook: sheet hasil compute ditambahkan ke copy RAFM Manual
+tanpa Excel / xlwings.
+
+Alur:
+  1. Parent membaca styles.xml RAFM Manual dan menambahkan style output (border + number
+     format per kolom) sekali di awal, jadi setiap sheet cukup memakai index xf.
+  2. XML worksheet tiap sheet baru di-render dan di-deflate di proses terpisah (pool
+     scheduler jika ada), paralel antar sheet. Job berisi kolom nilai Python biasa
+     (plain_columns), bukan DataFrame, jadi worker tidak import pandas.
+  3. Zip akhir dirakit sekali: part RAFM Manual yang tidak berubah disalin apa adanya
+     (data terkompresi tidak di-decompress), lalu part hasil worker, workbook.xml,
+     relationships dan content types yang sudah diperbarui.
+Waktu output mengikuti sheet terbesar, bukan jumlah semua sheet.
+
+Mode streaming (write_workbook(streaming=True)): tanpa worker, setiap sheet di-render baris
+per baris langsung dari frame bertipe (itertuples, NA jadi sel kosong saat render) dan
+di-deflate langsung ke zip output, jadi memori puncak sekitar satu baris per sheet.
+
+Update incremental (write_workbook(previous=output lama)): hash isi tiap sheet yang ditulis
+disimpan di sidecar '<output>.sheets.json' bersama CRC part-nya. Saat run ulang, sheet yang
+hash-nya sama dan part-nya tidak diubah sejak ditulis disalin apa adanya dari output lama
+(byte-identical); hanya sheet yang berubah di-render ulang. Jika RAFM Manual berubah,
+styles.xml output sudah diubah (mis. disimpan ulang di Excel) atau sidecar tidak ada, output
+ditulis penuh dari RAFM Manual.
+
+Styling dari style_plan (dipakai juga writer xlwings di syntax.main): border tipis di
+A1:lastcol(n+1), number format per range kolom berurutan mulai baris 2, accounting di semua
+kolom Checking Summary, lebar kolom dari teks tampilan terpanjang (kolom numerik dari nilai
+absolut terbesar sesuai format, kolom teks dari kategori / 100 baris pertama). Tanggal ditulis
+sebagai serial number Excel dengan format DATE_FORMAT / DATETIME_FORMAT. Formula Checking Summary ditulis tanpa cached value;
+workbook di-set fullCalcOnLoad supaya Excel menghitung saat dibuka. Dengan formula_mode
+'shared' seluruh blok formula Checking Summary ditulis sebagai satu shared formula (formula
+lengkap hanya di sel kiri atas), XML sheet jauh lebih kecil dengan hasil per sel yang sama.
+
+Modul ini hanya memakai stdlib (render_sheet_part dijalankan di pool worker).
+"""
+import datetime
+import hashlib
+import itertools
+import json
+import math
+import numbers
+import os
+import posixpath
+import re
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.sax.saxutils import escape, unescape
+
+ACCOUNTING_FORMAT = '_-* #,##0_-;_-* (#,##0);_-* "-"_-;_-@_-'
+# Sel tanggal ditulis sebagai serial number Excel dengan format ini (bukan teks ISO)
+DATE_FORMAT = 'yyyy-mm-dd'
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+DATE_FORMATS = (DATE_FORMAT, DATETIME_FORMAT)
+EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+# numFmtId bawaan Excel
+BUILTIN_FORMATS = {'General': 0, '0': 1, '@': 49}
+MIN_COLUMN_WIDTH = 8
+WIDTH_SAMPLE_ROWS = 100
+ZIP_LIMIT = 0xFFFFFFFF
+# Sidecar hash per sheet di samping output (update incremental)
+SIDECAR_SUFFIX = '.sheets.json'
+SIDECAR_VERSION = 1
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+REL_WORKSHEET = NS_REL + '/worksheet'
+REL_STYLES = NS_REL + '/styles'
+REL_CALC_CHAIN = NS_REL + '/calcChain'
+CT_WORKSHEET = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+CT_STYLES = 'application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml'
+
+CHECKING_SUMMARY_SHEETS = {
+    'trad': {'cf_argo': 'CF ARGO AZTRAD', 'cf_rafm': 'RAFM Output AZTRAD',
+             'rafm_manual': 'RAFM Output Manual', 'uvsg': 'RAFM Output AZUL_PI'},
+    'ul': {'cf_argo': 'CF ARGO AZUL', 'cf_rafm': 'RAFM Output AZUL', 'rafm_manual': 'RAFM Output Manual'},
+    'reas': {'cf_argo': 'CF ARGO REAS', 'cf_rafm': 'RAFM Output REAS', 'rafm_manual': 'RAFM Output Manual'},
+}
+# (kolom formula pertama, kolom CF ARGO, kolom RAFM, kolom RAFM Manual, kolom UVSG), 1-based
+# 'cell': satu formula per sel; 'shared': satu shared formula per blok Checking Summary
+FORMULA_MODES = ('cell', 'shared')
+CHECKING_SUMMARY_OFFSETS = {'trad': (5, 3, 7, 7, 7), 'ul': (4, 3, 6, 6, None), 'reas': (4, 3, 3, 3, None)}
+
+# NA pandas (pd.NA / pd.NaT) dikenali dari nama tipe supaya modul tetap stdlib
+_MISSING_TYPES = ('NAType', 'NaTType')
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_ATTR = re.compile(r'([\w:]+)="([^"]*)"')
+
+
+def column_letter(col_idx):
+    """1-based column index -> huruf kolom Excel"""
+    letters = ''
+    while col_idx > 0:
+        col_idx, rem = divmod(col_idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def checking_summary_row(jenis, row_excel, ncols):
+    """
+    Formula Checking Summary satu baris (logika sama dengan writer xlwings).
+
+    Yields:
+        (kolom 1-based, formula diawali '=')
+    """
+    names = CHECKING_SUMMARY_SHEETS.get(jenis, CHECKING_SUMMARY_SHEETS['reas'])
+    start_col, argo_col, rafm_col, manual_col, uvsg_col = CHECKING_SUMMARY_OFFSETS.get(
+        jenis, CHECKING_SUMMARY_OFFSETS['reas'])
+    manual_sign = '-' if jenis == 'ul' else '+'
+    for col_idx in range(start_col, ncols + 1):
+        offset = col_idx - start_col
+        formula = (f"='{names['cf_argo']}'!{column_letter(argo_col + offset)}{row_excel}"
+                   f"-'{names['cf_rafm']}'!{column_letter(rafm_col + offset)}{row_excel}"
+                   f"{manual_sign}'{names['rafm_manual']}'!{column_letter(manual_col + offset)}{row_excel}")
+        if uvsg_col is not None:
+            formula += f"-'{names['uvsg']}'!{column_letter(uvsg_col + offset)}{row_excel}"
+        yield col_idx, formula
+
+
+def checking_summary_formulas(jenis, nrows, ncols, start_row=2):
+    """
+    Formula Checking Summary semua baris data.
+
+    Yields:
+        (baris Excel, kolom 1-based, formula diawali '=')
+    """
+    for row_excel in range(start_row, start_row + nrows):
+        for col_idx, formula in checking_summary_row(jenis, row_excel, ncols):
+            yield row_excel, col_idx, formula
+
+
+def checking_summary_block(jenis, nrows, ncols, start_row=2):
+    """
+    Formula Checking Summary sebagai satu blok: formula sel kiri atas berlaku untuk seluruh
+    range, referensi relatif bergeser per baris / kolom seperti fill di Excel, jadi hasilnya
+    sama dengan checking_summary_formulas sel per sel.
+
+    Returns:
+        (kolom pertama 1-based, range 'E2:X10', formula kiri atas diawali '=') atau None
+        jika tidak ada sel formula
+    """
+    first = next(checking_summary_row(jenis, start_row, ncols), None)
+    if first is None or nrows < 1:
+        return None
+    start_col, formula = first
+    return start_col, f"{column_letter(start_col)}{start_row}:{column_letter(ncols)}{start_row + nrows - 1}", formula
+
+
+def column_number_format(sheet_name, col_name):
+    """Number format data kolom (baris 2 dst): text untuk speed duration, integer untuk include /
+    exclude year, accounting untuk kolom lain dan semua kolom Checking Summary"""
+    if sheet_name.startswith('Checking Summary'):
+        return ACCOUNTING_FORMAT
+    name = str(col_name).lower()
+    if 'speed duration' in name:
+        return '@'
+    if 'include year' in name or 'exclude year' in name:
+        return '0'
+    return ACCOUNTING_FORMAT
+
+
+def _runs(values):
+    """Kolom berurutan dengan nilai sama -> [(kolom awal, kolom akhir, nilai)] (1-based, inklusif)"""
+    runs = []
+    for col_idx, value in enumerate(values, start=1):
+        if runs and runs[-1][2] == value:
+            runs[-1] = (runs[-1][0], col_idx, value)
+        else:
+            runs.append((col_idx, col_idx, value))
+    return runs
+
+
+def _date_format(series, sample_size):
+    """DATE_FORMAT / DATETIME_FORMAT untuk kolom tanggal (datetime64 atau object berisi date), None jika bukan"""
+    if series.dtype.kind == 'M':
+        values = series.dropna()
+        return DATETIME_FORMAT if (values != values.dt.normalize()).any() else DATE_FORMAT
+    if series.dtype != object:
+        return None
+    sample = series.head(sample_size).dropna().tolist()
+    if not sample or not all(isinstance(v, datetime.date) for v in sample):
+        return None
+    timed = any(isinstance(v, datetime.datetime) and v.time() != datetime.time() for v in sample)
+    return DATETIME_FORMAT if timed else DATE_FORMAT
+
+
+def _display_length(series, number_format, sample_size):
+    """Panjang teks terpanjang yang ditampilkan Excel untuk satu kolom"""
+    if number_format in DATE_FORMATS:
+        return len(number_format)
+    numeric = number_format != '@'
+    if series.dtype.kind in 'iuf' and numeric:
+        # numerik: dari nilai terkecil / terbesar seluruh kolom (vektor)
+        return max(_number_length(series.min(), number_format), _number_length(series.max(), number_format))
+    categories = getattr(series.dtype, 'categories', None)
+    if categories is not None:
+        return max((len(str(c)) for c in categories), default=0)
+    # object (mis. kolom measure CF ARGO dengan label check sign): sample per nilai
+    return max((_number_length(v, number_format) if numeric and isinstance(v, (int, float)) else len(str(v))
+                for v in series.head(sample_size).tolist()), default=0)
+
+
+def _number_length(value, number_format):
+    """Panjang angka sesuai format tampilan (accounting: pemisah ribuan + padding / kurung)"""
+    if not math.isfinite(value):
+        return 0
+    peak = round(abs(value))
+    if number_format == ACCOUNTING_FORMAT:
+        return len(f"{peak:,}") + 2
+    return len(str(peak)) + (value < 0)
+
+
+def style_plan(sheet_name, df, sample_size=WIDTH_SAMPLE_ROWS):
+    """
+    Rencana styling satu sheet, dihitung sekali dari frame bertipe dan dipakai semua writer.
+
+    Returns:
+        dict rows / ncols (border A1:lastcol rows, header + data), formats (number format
+        per kolom, baris 2 dst), format_runs [(kolom awal, kolom akhir, format)], widths
+        (lebar per kolom, minimal MIN_COLUMN_WIDTH) dan width_runs [(awal, akhir, lebar)]
+    """
+    formats = [_date_format(df.iloc[:, i], sample_size) or column_number_format(sheet_name, col)
+               for i, col in enumerate(df.columns)]
+    widths = []
+    for i, col in enumerate(df.columns):
+        longest = max(len(str(col)), _display_length(df.iloc[:, i], formats[i], sample_size))
+        widths.append(max(MIN_COLUMN_WIDTH, longest + 2))
+    return {
+        'rows': len(df) + 1,
+        'ncols': len(df.columns),
+        'formats': formats,
+        'format_runs': _runs(formats),
+        'widths': widths,
+        'width_runs': _runs(widths),
+    }
+
+
+# ============================
+#  Styles
+# ============================
+
+def _block(xml, tag):
+    """(start, end, inner) elemen <tag ...>...</tag> atau <tag .../>; None jika tidak ada"""
+    match = re.search(rf'<{tag}\b[^>]*?(/>|>(.*?)</{tag}>)', xml, re.S)
+    if match is None:
+        return None
+    return match.start(), match.end(), match.group(2) or ''
+
+
+def _append_items(xml, tag, item_tag, items, insert_after=None):
+    """
+    Tambahkan elemen ke list <tag count=..> (dibuat jika belum ada).
+
+    Returns:
+        (xml baru, index elemen pertama yang ditambahkan)
+    """
+    found = _block(xml, tag)
+    if found is None:
+        anchor = re.search(rf'<{insert_after}\b[^>]*?(/>|>.*?</{insert_after}>)', xml, re.S) if insert_after else None
+        pos = anchor.end() if anchor else re.search(r'<styleSheet\b[^>]*>', xml).end()
+        xml = xml[:pos] + f'<{tag} count="0"/>' + xml[pos:]
+        found = _block(xml, tag)
+    start, end, inner = found
+    existing = len(re.findall(rf'<{item_tag}[\s>/]', inner))
+    total = existing + len(items)
+    block = f'<{tag} count="{total}">{inner}{"".join(items)}</{tag}>'
+    return xml[:start] + block + xml[end:], existing
+
+
+def extend_styles(styles_xml, formats):
+    """
+    Tambahkan style output ke styles.xml RAFM Manual.
+
+    formats: number format yang dipakai (selain header)
+    Returns:
+        (styles xml baru, {number format / 'header': index cellXfs})
+    """
+    numfmt_ids = {}
+    custom = [f for f in formats if f not in BUILTIN_FORMATS]
+    if custom:
+        block = _block(styles_xml, 'numFmts')
+        existing = {unescape(code, {'&quot;': '"'}): int(fid) for fid, code in re.findall(
+            r'<numFmt\b[^>]*numFmtId="(\d+)"[^>]*formatCode="([^"]*)"', block[2] if block else '')}
+        next_id = max([163] + list(existing.values())) + 1
+        items = []
+        for fmt in custom:
+            if fmt in existing:
+                numfmt_ids[fmt] = existing[fmt]
+                continue
+            numfmt_ids[fmt] = next_id
+            items.append(f'<numFmt numFmtId="{next_id}" formatCode="{escape(fmt, {chr(34): "&quot;"})}"/>')
+            next_id += 1
+        if items:
+            styles_xml, _ = _append_items(styles_xml, 'numFmts', 'numFmt', items)
+    numfmt_ids.update({f: BUILTIN_FORMATS[f] for f in formats if f in BUILTIN_FORMATS})
+
+    side = '<{0} style="thin"><color rgb="FF000000"/></{0}>'
+    border = f"<border>{''.join(side.format(s) for s in ('left', 'right', 'top', 'bottom'))}<diagonal/></border>"
+    styles_xml, border_id = _append_items(styles_xml, 'borders', 'border', [border], insert_after='fills')
+
+    keys = ['header'] + list(formats)
+    xfs = []
+    for key in keys:
+        fmt_id = 0 if key == 'header' else numfmt_ids[key]
+        apply_fmt = ' applyNumberFormat="1"' if fmt_id else ''
+        xfs.append(f'<xf numFmtId="{fmt_id}" fontId="0" fillId="0" borderId="{border_id}" xfId="0"'
+                   f'{apply_fmt} applyBorder="1"/>')
+    styles_xml, first_xf = _append_items(styles_xml, 'cellXfs', 'xf', xfs, insert_after='cellStyleXfs')
+    return styles_xml, {key: first_xf + i for i, key in enumerate(keys)}
+
+
+MINIMAL_STYLES = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<styleSheet xmlns="{NS_MAIN}">'
+                  '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+                  '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+                  '<fill><patternFill patternType="gray125"/></fill></fills>'
+                  '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                  '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                  '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+                  '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                  '</styleSheet>')
+
+
+# ============================
+#  Render worksheet (worker)
+# ============================
+
+def _date_cell(ref, value, style, date_xfs):
+    """Sel tanggal: serial number Excel + style date (style kolom dipakai jika sudah format tanggal)"""
+    if isinstance(value, datetime.datetime):
+        serial = (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+        timed = value.time() != datetime.time()
+    else:
+        serial = (value - EXCEL_EPOCH.date()).days
+        timed = False
+    if date_xfs and style not in date_xfs:
+        style = date_xfs[timed]
+    s = f' s="{style}"' if style else ''
+    return f'<c r="{ref}"{s}><v>{serial!r}</v></c>'
+
+
+def _cell_xml(ref, value, style, date_xfs=None):
+    s = f' s="{style}"' if style else ''
+    kind = type(value)
+    # float / int / str dicek dengan type() dulu: isinstance ke ABC numbers lambat per sel
+    if kind is not float and kind is not int and kind is not str:
+        if value is None or kind.__name__ in _MISSING_TYPES:
+            return f'<c r="{ref}"{s}/>' if style else ''
+        if kind.__name__ in ('bool', 'bool_'):
+            return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, numbers.Integral):
+            value, kind = int(value), int
+        elif isinstance(value, numbers.Real):
+            value, kind = float(value), float
+    if kind is int:
+        return f'<c r="{ref}"{s}><v>{value}</v></c>'
+    if kind is float:
+        if math.isnan(value) or math.isinf(value):
+            return f'<c r="{ref}"{s}/>' if style else ''
+        return f'<c r="{ref}"{s}><v>{value!r}</v></c>'
+    if isinstance(value, datetime.date):
+        return _date_cell(ref, value, style, date_xfs)
+    text = _ILLEGAL_XML.sub('', str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def sheet_rows(df, header=True):
+    """
+    Baris sheet langsung dari frame bertipe (tanpa copy / tolist seluruh frame): header,
+    lalu itertuples. NA / NaT / NaN jadi sel kosong saat render.
+    """
+    if header:
+        yield [str(c) for c in df.columns]
+    yield from df.itertuples(index=False, name=None)
+
+
+def plain_columns(df):
+    """
+    Kolom frame sebagai list nilai Python biasa untuk job worker (Timestamp -> datetime,
+    NA / NaT -> None, scalar numpy -> Python), jadi worker tidak perlu import pandas /
+    numpy untuk unpickle job. Kolom numerik tanpa NA cukup tolist().
+    """
+    columns = []
+    for i in range(df.shape[1]):
+        series = df.iloc[:, i]
+        if series.dtype.kind == 'M':
+            # datetime64[us].tolist() langsung memberi datetime (NaT -> None), tanpa Timestamp
+            if series.dt.tz is not None:
+                series = series.dt.tz_localize(None)
+            columns.append(series.to_numpy(dtype='datetime64[us]').tolist())
+            continue
+        values = series.tolist()
+        if series.dtype.kind not in 'iuf' or series.hasnans:
+            values = [_plain_value(v) for v in values]
+        columns.append(values)
+    return columns
+
+
+def _plain_value(value):
+    kind = type(value)
+    if kind is float or kind is int or kind is str or value is None:
+        return value
+    if kind.__name__ in _MISSING_TYPES:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.to_pydatetime() if hasattr(value, 'to_pydatetime') else value
+    if kind.__module__ == 'numpy' and hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def plain_rows(header, columns):
+    """Baris sheet dari plain_columns: header (list nama kolom atau None), lalu baris data"""
+    if header is not None:
+        yield header
+    yield from zip(*columns)
+
+
+def render_sheet(layout, rows):
+    """
+    XML worksheet per potongan teks (satu baris sheet per potongan).
+
+    layout: dict hasil sheet_layout (tanpa data)
+      rows        : jumlah baris yang ditulis (termasuk header)
+      style_rows  : jumlah baris yang diberi style (border / number format)
+      ncols       : jumlah kolom
+      header_xf   : index xf baris 1, data_xfs: index xf per kolom untuk baris 2 dst
+      date_xfs    : (index xf DATE_FORMAT, DATETIME_FORMAT) untuk sel tanggal di kolom non-tanggal
+      width_runs  : [(kolom awal, kolom akhir, lebar)] dari style_plan
+      formulas    : jenis untuk formula Checking Summary (baris 2 dst), None jika tanpa formula
+      formula_mode: 'cell' (formula per sel) atau 'shared' (satu shared formula per blok)
+    rows: iterable baris (nilai python / numpy) mulai dari baris 1
+    """
+    ncols, style_rows = layout['ncols'], layout['style_rows']
+    header_xf, data_xfs, formulas = layout['header_xf'], layout['data_xfs'], layout['formulas']
+    date_xfs = layout.get('date_xfs')
+    shared = None
+    if formulas and layout['formula_mode'] == 'shared':
+        shared = checking_summary_block(formulas, layout['rows'] - 1, ncols)
+    letters = [column_letter(i) for i in range(1, ncols + 1)]
+    last_row = max(layout['rows'], style_rows)
+
+    cols = ''.join(f'<col min="{first}" max="{last}" width="{w}" customWidth="1"/>'
+                   for first, last, w in layout['width_runs'])
+    dimension = f"A1:{letters[-1]}{max(last_row, 1)}" if ncols else 'A1'
+    yield ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           f'<worksheet xmlns="{NS_MAIN}" xmlns:r="{NS_REL}"><dimension ref="{dimension}"/>'
+           '<sheetViews><sheetView workbookViewId="0"/></sheetViews><sheetFormatPr defaultRowHeight="15"/>'
+           f'{"<cols>" + cols + "</cols>" if cols else ""}<sheetData>')
+
+    rows = iter(rows)
+    for r in range(1, last_row + 1):
+        values = next(rows, ())
+        styled = r <= style_rows
+        row_formulas = {}
+        if shared is not None:
+            # '' = sel anggota shared formula, formula lengkap hanya di sel kiri atas
+            if 1 < r <= layout['rows']:
+                row_formulas = dict.fromkeys(range(shared[0], ncols + 1), '')
+            if r == 2:
+                row_formulas[shared[0]] = shared[2]
+        elif formulas and r > 1:
+            row_formulas = dict(checking_summary_row(formulas, r, ncols))
+        cells = []
+        for c in range(1, max(len(values), ncols if styled else 0) + 1):
+            style = 0
+            if styled and c <= ncols:
+                style = header_xf if r == 1 else data_xfs[c - 1]
+            ref = f"{letters[c - 1]}{r}"
+            formula = row_formulas.get(c)
+            if formula is not None:
+                s = f' s="{style}"' if style else ''
+                if shared is None:
+                    f = f'<f>{escape(formula.lstrip("="))}</f>'
+                elif formula:
+                    f = f'<f t="shared" ref="{shared[1]}" si="0">{escape(formula.lstrip("="))}</f>'
+                else:
+                    f = '<f t="shared" si="0"/>'
+                cells.append(f'<c r="{ref}"{s}>{f}</c>')
+            else:
+                cells.append(_cell_xml(ref, values[c - 1] if c <= len(values) else None, style, date_xfs))
+        yield f'<row r="{r}">{"".join(cells)}</row>'
+    yield ('</sheetData><pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" header="0.3" footer="0.3"/>'
+           '</worksheet>')
+
+
+def _deflate(texts, write):
+    """Encode + deflate (raw) potongan teks ke write(bytes); returns (crc32, ukuran asli)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    crc, size = 0, 0
+    for text in texts:
+        data = text.encode('utf-8')
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+        packed = compressor.compress(data)
+        if packed:
+            write(packed)
+    write(compressor.flush())
+    return crc, size
+
+
+def render_sheet_part(job):
+    """
+    Worker: render + deflate XML worksheet satu sheet.
+
+    job: {'layout': sheet_layout, 'header': nama kolom atau None, 'columns': plain_columns}
+    (tanpa object pandas, worker cukup stdlib)
+    Returns:
+        (data deflate, crc32, ukuran asli)
+    """
+    parts = []
+    crc, size = _deflate(render_sheet(job['layout'], plain_rows(job['header'], job['columns'])), parts.append)
+    return b''.join(parts), crc, size
+
+
+# ============================
+#  Zip assembly
+# ============================
+
+def _dos_time(date_time):
+    y, mo, d, h, mi, s = date_time
+    return (h << 11) | (mi << 5) | (s // 2), ((max(y, 1980) - 1980) << 9) | (mo << 5) | d
+
+
+class _ZipAssembler:
+    """Writer zip minimal yang menerima data yang sudah terkompresi (tanpa ZIP64)"""
+
+    def __init__(self, path):
+        self.fh = open(path, 'wb')
+        self.entries = []
+        self.now = time.localtime()[:6]
+
+    def _header(self, name, method, date_time, crc, csize, size):
+        encoded = name.encode('utf-8')
+        flags = 0x800 if not encoded.isascii() else 0
+        dtime, ddate = _dos_time(date_time or self.now)
+        offset = self.fh.tell()
+        self.fh.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, flags, method, dtime, ddate,
+                                  crc, csize, size, len(encoded), 0))
+        self.fh.write(encoded)
+        return [encoded, flags, method, dtime, ddate, crc, csize, size, offset]
+
+    def add_raw(self, name, data, crc, size, method=zipfile.ZIP_DEFLATED, date_time=None):
+        if len(data) > ZIP_LIMIT or size > ZIP_LIMIT:
+            raise ValueError(f"Part {name} lebih dari 4 GB, gunakan writer xlwings")
+        entry = self._header(name, method, date_time, crc, len(data), size)
+        self.fh.write(data)
+        self.entries.append(entry)
+
+    def add_stream(self, name, texts):
+        """Deflate potongan teks langsung ke file; crc / ukuran di local header diisi setelahnya"""
+        entry = self._header(name, zipfile.ZIP_DEFLATED, None, 0, 0, 0)
+        start = self.fh.tell()
+        crc, size = _deflate(texts, self.fh.write)
+        end = self.fh.tell()
+        if end - start > ZIP_LIMIT or size > ZIP_LIMIT:
+            raise ValueError(f"Part {name} lebih dari 4 GB, gunakan writer xlwings")
+        self.fh.seek(entry[-1] + 14)
+        self.fh.write(struct.pack('<III', crc, end - start, size))
+        self.fh.seek(end)
+        entry[5:8] = crc, end - start, size
+        self.entries.append(entry)
+        return crc, size
+
+    def add_bytes(self, name, data):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        packed = compressor.compress(data) + compressor.flush()
+        self.add_raw(name, packed, zlib.crc32(data), len(data))
+
+    def close(self):
+        start = self.fh.tell()
+        for encoded, flags, method, dtime, ddate, crc, csize, size, offset in self.entries:
+            self.fh.write(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 20, 20, flags, method, dtime, ddate,
+                                      crc, csize, size, len(encoded), 0, 0, 0, 0, 0, offset))
+            self.fh.write(encoded)
+        end = self.fh.tell()
+        self.fh.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(self.entries), len(self.entries),
+                                  end - start, start, 0))
+        self.fh.close()
+
+
+def _raw_member(fh, info):
+    """Data terkompresi member zip sumber, tanpa decompress"""
+    fh.seek(info.header_offset)
+    header = fh.read(30)
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    fh.seek(info.header_offset + 30 + name_len + extra_len)
+    return fh.read(info.compress_size)
+
+
+# ============================
+#  Workbook parts
+# ============================
+
+def _rels(xml):
+    """{Id: (Type, Target)} dari file .rels"""
+    rels = {}
+    for match in re.finditer(r'<Relationship\b[^>]*/?>', xml):
+        attrs = dict(_ATTR.findall(match.group(0)))
+        rels[attrs['Id']] = (attrs['Type'], attrs['Target'])
+    return rels
+
+
+def _resolve(base_dir, target):
+    return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def _rels_path(part):
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, '_rels', f"{name}.rels")
+
+
+def _drop_relationships(xml, ids):
+    return re.sub(r'<Relationship\b[^>]*/?>', lambda m: '' if dict(_ATTR.findall(m.group(0)))['Id'] in ids
+                  else m.group(0), xml)
+
+
+def _drop_overrides(xml, parts):
+    return re.sub(r'<Override\b[^>]*/?>', lambda m: '' if dict(_ATTR.findall(m.group(0)))['PartName'].lstrip('/')
+                  in parts else m.group(0), xml)
+
+
+def _sheet_names(path):
+    """Nama sheet di workbook.xml (part sheet tidak dibaca)"""
+    with zipfile.ZipFile(path) as zf:
+        root_rels = _rels(zf.read('_rels/.rels').decode('utf-8'))
+        wb_part = next(_resolve('', t) for typ, t in root_rels.values() if typ.endswith('/officeDocument'))
+        wb_xml = zf.read(wb_part).decode('utf-8')
+    return {unescape(dict(_ATTR.findall(m.group(0)))['name'], {'&quot;': '"'})
+            for m in re.finditer(r'<sheet\b[^>]*/>', wb_xml)}
+
+
+def _workbook_calc_on_load(xml):
+    """Pastikan formula tanpa cached value dihitung saat workbook dibuka"""
+    calc = re.search(r'<calcPr\b[^>]*?/?>', xml)
+    if calc:
+        tag = re.sub(r'\sfullCalcOnLoad="[^"]*"', '', calc.group(0))
+        tag = tag[:-2].rstrip() + ' fullCalcOnLoad="1"/>' if tag.endswith('/>') else tag[:-1] + ' fullCalcOnLoad="1">'
+        return xml[:calc.start()] + tag + xml[calc.end():]
+    for anchor in ('definedNames', 'externalReferences', 'sheets'):
+        match = re.search(rf'<{anchor}\b[^>]*?(/>|>.*?</{anchor}>)', xml, re.S)
+        if match:
+            return xml[:match.end()] + '<calcPr fullCalcOnLoad="1"/>' + xml[match.end():]
+    return xml
+
+
+def sheet_layout(sheet_name, df, jenis, styles, plan, formula_mode='cell'):
+    """Style index (dari style_plan), lebar kolom dan formula satu sheet (tanpa data)"""
+    header = sheet_name != 'Control'
+    ncols = plan['ncols']
+    return {
+        'rows': len(df) + header,
+        'ncols': ncols,
+        'style_rows': plan['rows'] if ncols else 0,
+        'header_xf': styles['header'],
+        'data_xfs': [styles[fmt] for fmt in plan['formats']],
+        'date_xfs': [styles[fmt] for fmt in DATE_FORMATS],
+        'width_runs': plan['width_runs'],
+        'formulas': jenis if sheet_name.startswith('Checking Summary') else None,
+        'formula_mode': formula_mode,
+    }
+
+
+def sheet_digest(df, layout):
+    """Hash isi sheet: layout (style, lebar, formula) + nama kolom, dtype dan nilai frame"""
+    from pandas.util import hash_pandas_object  # lazy: hanya dipakai di parent
+
+    digest = hashlib.sha1(json.dumps(layout, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode('utf-8'))
+    digest.update(hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_sidecar(output_file):
+    """Manifest hash sheet output (None jika tidak ada / rusak / versi lain)"""
+    try:
+        with open(output_file + SIDECAR_SUFFIX, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == SIDECAR_VERSION else None
+
+
+def _save_sidecar(output_file, manifest):
+    path = output_file + SIDECAR_SUFFIX
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_workbook(rafm_manual_path, result_dict, output_file, jenis, sheet_order, scheduler=None,
+                   streaming=False, previous=None, formula_mode='cell'):
+    """
+    Tulis output: copy RAFM Manual + sheet result_dict (sheet dengan nama sama diganti),
+    urut sesuai sheet_order lalu sheet lain. 'Sheet1' di-rename jadi 'RAFM Output Manual'
+    seperti writer xlwings. XML sheet di-render paralel di pool scheduler (atau pool
+    sementara).
+
+    streaming: render di proses ini baris per baris langsung dari frame bertipe ke zip
+    output (serial, memori puncak sekitar satu baris per sheet, tanpa copy frame).
+    previous: output lama (biasanya sama dengan output_file) untuk update incremental;
+    hanya sheet yang berubah yang ditulis ulang. Sheet hasil run lama yang tidak ada lagi di
+    result_dict dibuang, jadi isi output sama dengan tulis penuh dari RAFM Manual.
+    formula_mode: 'cell' atau 'shared' untuk formula Checking Summary (FORMULA_MODES).
+
+    Returns:
+        list nama sheet yang di-render (kosong jika output lama tidak perlu diubah)
+    """
+    frames = {name: df for name, df in result_dict.items() if name != 'RAFM Output Manual'}
+    plans = {name: style_plan(name, df) for name, df in frames.items()}
+    formats = list(dict.fromkeys([fmt for plan in plans.values() for fmt in plan['formats']] + list(DATE_FORMATS)))
+    manual_signature = _file_signature(rafm_manual_path)
+
+    # --- update incremental: output lama jadi sumber jika sidecar masih cocok
+    source, styles, sheets_meta, styles_meta, stale = rafm_manual_path, None, {}, None, set()
+    manifest = load_sidecar(previous) if previous and os.path.exists(previous) else None
+    if manifest and manifest['manual'] == manual_signature and all(f in manifest['styles'] for f in formats):
+        with zipfile.ZipFile(previous) as old:
+            crcs = {info.filename: info.CRC for info in old.infolist()}
+        # sheet run lama yang tidak ada di result_dict; jika namanya juga sheet RAFM Manual,
+        # versi manual harus kembali, jadi tulis penuh dari RAFM Manual
+        stale = set(manifest['sheets']) - set(frames)
+        if (crcs.get(manifest['styles_part']) == manifest['styles_crc']
+                and not stale & _sheet_names(rafm_manual_path)):
+            source, styles = previous, manifest['styles']
+            styles_meta = (manifest['styles_part'], manifest['styles_crc'])
+        else:
+            stale = set()
+
+    with zipfile.ZipFile(source) as src:
+        infos = {info.filename: info for info in src.infolist()}
+        root_rels = _rels(src.read('_rels/.rels').decode('utf-8'))
+        wb_part = next(_resolve('', t) for typ, t in root_rels.values() if typ.endswith('/officeDocument'))
+        wb_dir = posixpath.dirname(wb_part)
+        wb_rels_part = _rels_path(wb_part)
+        wb_xml = src.read(wb_part).decode('utf-8')
+        wb_rels_xml = src.read(wb_rels_part).decode('utf-8')
+        content_types = src.read('[Content_Types].xml').decode('utf-8')
+        wb_rels = _rels(wb_rels_xml)
+
+        styles_part = next((_resolve(wb_dir, t) for typ, t in wb_rels.values() if typ == REL_STYLES), None)
+        styles_xml = src.read(styles_part).decode('utf-8') if styles_part else MINIMAL_STYLES
+
+    rewritten_styles = styles is None
+    if rewritten_styles:
+        styles_xml, styles = extend_styles(styles_xml, formats)
+
+    layouts = {name: sheet_layout(name, df, jenis, styles, plans[name], formula_mode) for name, df in frames.items()}
+    digests = {name: sheet_digest(df, layouts[name]) for name, df in frames.items()}
+    if source == previous:
+        for name in list(frames):
+            meta = manifest['sheets'].get(name)
+            if meta and meta['hash'] == digests[name] and crcs.get(meta['part']) == meta['crc']:
+                sheets_meta[name] = meta
+                del frames[name]
+        if not frames and not stale:
+            return []
+
+    futures, local_pool = {}, None
+    if not streaming:
+        # Submit render dulu supaya worker jalan selagi parent merakit part workbook
+        jobs = {name: {'layout': layouts[name], 'columns': plain_columns(df),
+                       'header': [str(c) for c in df.columns] if name != 'Control' else None}
+                for name, df in frames.items()}
+        if scheduler is not None:
+            futures = {name: scheduler.submit(render_sheet_part, job) for name, job in jobs.items()}
+        else:
+            local_pool = ProcessPoolExecutor(max_workers=max(1, min(len(jobs), os.cpu_count() or 1)))
+            futures = {name: local_pool.submit(render_sheet_part, job) for name, job in jobs.items()}
+
+    try:
+        # --- workbook.xml: sheet lama, sheet yang diganti, sheet baru
+        sheets_block = re.search(r'<sheets\b[^>]*>(.*?)</sheets>', wb_xml, re.S)
+        existing = []
+        for match in re.finditer(r'<sheet\b[^>]*/>', sheets_block.group(1)):
+            attrs = dict(_ATTR.findall(match.group(0)))
+            rid = next(v for k, v in attrs.items() if k.endswith(':id'))
+            existing.append({'name': unescape(attrs['name'], {'&quot;': '"'}), 'xml': match.group(0), 'rid': rid,
+                             'sheet_id': int(attrs['sheetId'])})
+        names = [s['name'] for s in existing]
+        if 'Sheet1' in names and 'RAFM Output Manual' not in names:
+            sheet1 = existing[names.index('Sheet1')]
+            sheet1['name'] = 'RAFM Output Manual'
+            sheet1['xml'] = sheet1['xml'].replace('name="Sheet1"', 'name="RAFM Output Manual"')
+        elif 'Sheet1' in names and 'RAFM Output Manual' in names:
+            frames.setdefault('Sheet1', None)
+
+        removed = [s for s in existing if s['name'] in frames or s['name'] in stale]
+        kept = [s for s in existing if s['name'] not in frames and s['name'] not in stale]
+        removed_parts, removed_ids = set(), set()
+        for sheet in removed:
+            part = _resolve(wb_dir, wb_rels[sheet['rid']][1])
+            removed_parts.update({part, _rels_path(part)})
+            removed_ids.add(sheet['rid'])
+        frames = {k: v for k, v in frames.items() if v is not None}
+        calc_chain = {rid: _resolve(wb_dir, t) for rid, (typ, t) in wb_rels.items() if typ == REL_CALC_CHAIN}
+        removed_parts.update(calc_chain.values())
+        removed_ids.update(calc_chain)
+
+        next_sheet_id = max([s['sheet_id'] for s in existing] + [0]) + 1
+        part_numbers = [int(n) for n in re.findall(r'worksheets/sheet(\d+)\.xml$', '\n'.join(infos), re.M)]
+        next_part = max(part_numbers + [0]) + 1
+        new_sheets, new_rels, new_overrides, new_parts = [], [], [], {}
+        free_rids = (f"rIdC4{n}" for n in itertools.count(1) if f"rIdC4{n}" not in wb_rels)
+        for i, name in enumerate(frames):
+            rid = next(free_rids)
+            part = posixpath.join(wb_dir, 'worksheets', f"sheet{next_part + i}.xml")
+            new_sheets.append({'name': name, 'rid': rid, 'sheet_id': next_sheet_id + i,
+                               'xml': f'<sheet name="{escape(name, {chr(34): "&quot;"})}" '
+                                      f'sheetId="{next_sheet_id + i}" r:id="{rid}"/>'})
+            new_rels.append(f'<Relationship Id="{rid}" Type="{REL_WORKSHEET}" '
+                            f'Target="{posixpath.relpath(part, wb_dir)}"/>')
+            new_overrides.append(f'<Override PartName="/{part}" ContentType="{CT_WORKSHEET}"/>')
+            new_parts[name] = part
+
+        # --- urutan sheet: sheet_order dulu, sisanya sesuai urutan lama / hasil
+        all_sheets = kept + new_sheets
+        rank = {name: i for i, name in enumerate(sheet_order)}
+        ordered = sorted(all_sheets, key=lambda s: (0, rank[s['name']]) if s['name'] in rank
+                         else (1, all_sheets.index(s)))
+        old_index = {id(s): i for i, s in enumerate(existing)}
+        new_index = {old_index[id(s)]: i for i, s in enumerate(ordered) if id(s) in old_index}
+
+        def remap_local(match):
+            idx = new_index.get(int(match.group(1)))
+            return f'localSheetId="{idx}"' if idx is not None else match.group(0)
+
+        def drop_orphan_names(match):
+            local = re.search(r'localSheetId="(\d+)"', match.group(0))
+            if local and int(local.group(1)) not in new_index:
+                return ''
+            return re.sub(r'localSheetId="(\d+)"', remap_local, match.group(0))
+
+        wb_xml = (wb_xml[:sheets_block.start(1)] + ''.join(s['xml'] for s in ordered) + wb_xml[sheets_block.end(1):])
+        wb_xml = re.sub(r'<definedName\b[^>]*>.*?</definedName>', drop_orphan_names, wb_xml, flags=re.S)
+        wb_xml = re.sub(r'(<workbookView\b[^>]*?)\s(?:activeTab|firstSheet)="\d+"', r'\1', wb_xml)
+        wb_xml = re.sub(r'(<workbookView\b[^>]*?)\s(?:activeTab|firstSheet)="\d+"', r'\1', wb_xml)
+        wb_xml = _workbook_calc_on_load(wb_xml)
+
+        wb_rels_xml = _drop_relationships(wb_rels_xml, removed_ids)
+        if styles_part is None:
+            styles_part = posixpath.join(wb_dir, 'styles.xml')
+            new_rels.append(f'<Relationship Id="rIdC4Styles" Type="{REL_STYLES}" '
+                            f'Target="{posixpath.relpath(styles_part, wb_dir)}"/>')
+            new_overrides.append(f'<Override PartName="/{styles_part}" ContentType="{CT_STYLES}"/>')
+        wb_rels_xml = wb_rels_xml.replace('</Relationships>', ''.join(new_rels) + '</Relationships>')
+        content_types = _drop_overrides(content_types, removed_parts)
+        content_types = content_types.replace('</Types>', ''.join(new_overrides) + '</Types>')
+
+        # --- rakit zip: part lama (raw), part yang diubah, lalu sheet hasil worker
+        rewritten = {wb_part: wb_xml, wb_rels_part: wb_rels_xml, '[Content_Types].xml': content_types}
+        if rewritten_styles:
+            rewritten[styles_part] = styles_xml
+            styles_meta = (styles_part, zlib.crc32(styles_xml.encode('utf-8')))
+        tmp = f"{output_file}.tmp"
+        out = _ZipAssembler(tmp)
+        try:
+            with open(source, 'rb') as fh:
+                for name, info in infos.items():
+                    if name in removed_parts or name in rewritten or name.endswith('/'):
+                        continue
+                    out.add_raw(name, _raw_member(fh, info), info.CRC, info.file_size,
+                                info.compress_type, info.date_time)
+            for name, text in rewritten.items():
+                out.add_bytes(name, text.encode('utf-8'))
+            for name, df in frames.items():
+                if streaming:
+                    crc, _ = out.add_stream(new_parts[name],
+                                            render_sheet(layouts[name], sheet_rows(df, name != 'Control')))
+                else:
+                    try:
+                        data, crc, size = futures[name].result()
+                    except BrokenProcessPool:
+                        # Pool bersama rusak karena crash file task lain: render di parent
+                        data, crc, size = render_sheet_part(jobs[name])
+                    out.add_raw(new_parts[name], data, crc, size)
+                sheets_meta[name] = {'hash': digests[name], 'part': new_parts[name], 'crc': crc}
+        finally:
+            out.close()
+        os.replace(tmp, output_file)
+    finally:
+        if local_pool is not None:
+            local_pool.shutdown()
+
+    if source == previous:
+        sheets_meta = {**{k: v for k, v in manifest['sheets'].items() if k not in stale}, **sheets_meta}
+    _save_sidecar(output_file, {'version': SIDECAR_VERSION, 'manual': manual_signature, 'styles': styles,
+                                'styles_part': styles_meta[0], 'styles_crc': styles_meta[1], 'sheets': sheets_meta})
+    return list(frames)
@@ -0,0 +1,60 @@
+import pytest
+
+from syntax.goc_filter import compile_filter
+
+GOCS = ['AZTRAD_IDR_2019', 'AZTRAD_USD_2020', 'AZUL_IDR_2020', 'REAS_2021']
+
+
+def _allowed(goc_filter):
+    return [goc for goc in GOCS if goc_filter.allows_goc(goc)]
+
+
+@pytest.mark.parametrize('include, expected', [
+    ('-', GOCS),
+    ('', GOCS),
+    ('2020', ['AZTRAD_USD_2020', 'AZUL_IDR_2020']),
+    ('pre:AZTRAD', ['AZTRAD_IDR_2019', 'AZTRAD_USD_2020']),
+    ('suf:_2021', ['REAS_2021']),
+    (r're:_20(19|21)$', ['AZTRAD_IDR_2019', 'REAS_2021']),
+    (' pre:AZUL ; suf:2019 ', ['AZTRAD_IDR_2019', 'AZUL_IDR_2020']),
+    ('PRE:REAS', ['REAS_2021']),
+    ('aztrad', []),
+])
+def test_goc_terms(include, expected):
+    assert _allowed(compile_filter(include)) == expected
+
+
+def test_exclude_wins_over_include():
+    goc_filter = compile_filter('pre:AZTRAD;pre:AZUL', 'IDR;suf:_2021')
+    assert _allowed(goc_filter) == ['AZTRAD_USD_2020']
+    assert _allowed(compile_filter('-', 'pre:AZ')) == ['REAS_2021']
+
+
+@pytest.mark.parametrize('include, exclude, allowed', [
+    ('period:1-12', '-', [1, 5, 12]),
+    ('period:>=13', '-', [13, 40]),
+    ('period:>12', '-', [13, 40]),
+    ('period:<=12', '-', [0, 1, 5, 12]),
+    ('period:<13', '-', [0, 1, 5, 12]),
+    ('period:5', '-', [5]),
+    ('period:1-12;period:40', '-', [1, 5, 12, 40]),
+    ('period:1-40', 'period:5-12', [1, 13, 40]),
+    ('-', 'period:>=13', [0, 1, 5, 12]),
+])
+def test_period_ranges(include, exclude, allowed):
+    goc_filter = compile_filter(include, exclude)
+    assert goc_filter.has_period_filter
+    assert [p for p in (0, 1, 5, 12, 13, 40) if goc_filter.allows_period(p)] == allowed
+
+
+def test_period_and_goc_terms_combine():
+    goc_filter = compile_filter('pre:AZTRAD;period:1-12', 'USD')
+    assert _allowed(goc_filter) == ['AZTRAD_IDR_2019']
+    assert goc_filter.allows_period(12) and not goc_filter.allows_period(13)
+    assert not compile_filter('pre:AZ').has_period_filter
+
+
+@pytest.mark.parametrize('include', ['re:(', 'period:abc', 'period:1-'])
+def test_invalid_expression(include):
+    with pytest.raises(ValueError):
+        compile_filter(include)
@@ -0,0 +1,25 @@
+import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+
+from syntax.history import HistoryStore, valuation_period
+
+
+def _config(val_year, paths=None):
+    control = pd.DataFrame({'Item': ['Val Year', 'Other'], 'Value': [val_year, 'x']})
+    return SimpleNamespace(control=control, paths=paths or {}, jenis='trad', input_excel='input.xlsx')
+
+
+def test_bare_val_year_is_not_a_period(tmp_path):
+    config = _config(2025)
+    assert valuation_period(config) is None
+    assert HistoryStore(root=str(tmp_path)).save(config, {'CF ARGO': pd.DataFrame({'a': [1]})}) is None
+    assert not any(tmp_path.iterdir())
+
+
+def test_explicit_period_wins_over_val_year():
+    assert valuation_period(_config(2025), '2025Q1') == '2025Q1'
+    assert valuation_period(_config(2025, {'period': '2025-06'})) == '2025-06'
+    assert valuation_period(_config(datetime.datetime(2025, 3, 31))) == '2025-03-31'
+    assert valuation_period(_config('2025Q2')) == '2025Q2'
@@ -0,0 +1,75 @@
+import csv
+import gzip
+
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+from syntax.kernels import parse_numeric_fast, process_argo_file, process_extraction_file
+
+MEASURES = ['prm_inc', 'lrc_cl_ins']
+# nilai yang di CSV ditulis dengan notasi ilmiah
+ROWS = [
+    ['GOC_2019_A', 13, 1.23e10, -2.5e3],
+    ['GOC_2019_A', 14, 1.5e-05, 42.0],
+    ['GOC_2020_B', 20, -7.25e-3, 3.0e8],
+    ['GOC_2020_B', 2, 100.0, 1.0],
+]
+E_NOTATION = {1.23e10: '1.23E+10', -2.5e3: '-2.5E+3', 1.5e-05: '1.5e-05', -7.25e-3: '-7.25E-03', 3.0e8: '3e8'}
+
+
+def _xlsx(path, sheet, header):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = sheet
+    ws.append(header)
+    for row in ROWS:
+        ws.append(row if header[0] == 'goc' else row[2:])
+    wb.save(path)
+
+
+def _csv(path, header):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt', newline='', encoding='utf-8') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        for row in ROWS:
+            values = [E_NOTATION.get(v, v) if isinstance(v, float) else v for v in row]
+            writer.writerow(values if header[0] == 'goc' else values[2:])
+
+
+@pytest.mark.parametrize('text, value', [('1.23E+10', 1.23e10), ('-2.5E+3', -2500.0), ('1.5e-05', 1.5e-05),
+                                         ('1.234,5', 1234.5), ('12%', 0.12), ('x', None), ('inf', None)])
+def test_parse_numeric_fast(text, value):
+    assert parse_numeric_fast(text) == value
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.csv.gz'])
+def test_argo_csv_matches_xlsx(tmp_path, ext):
+    (tmp_path / 'x').mkdir()
+    (tmp_path / 'c').mkdir()
+    _xlsx(tmp_path / 'x' / 'ARGO_A.xlsx', 'Sheet1', MEASURES)
+    _csv(tmp_path / 'c' / f'ARGO_A{ext}', MEASURES)
+
+    results = [process_argo_file({'file_path': str(path), 'columns': MEASURES, 'layout': None})[0]
+               for path in (tmp_path / 'x' / 'ARGO_A.xlsx', tmp_path / 'c' / f'ARGO_A{ext}')]
+    assert results[0] == results[1]
+    assert results[0]['prm_inc'] == pytest.approx(1.23e10 + 1.5e-05 - 7.25e-3 + 100.0)
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.csv.gz'])
+def test_extraction_csv_matches_xlsx(tmp_path, ext):
+    header = ['goc', 'period'] + MEASURES
+    (tmp_path / 'x').mkdir()
+    (tmp_path / 'c').mkdir()
+    _xlsx(tmp_path / 'x' / 'RAFM_A.xlsx', 'extraction_IDR', header)
+    _csv(tmp_path / 'c' / f'RAFM_A{ext}', header)
+
+    task = {'file_name': 'RAFM_A', 'spec': {'speed': 12, 'include': '-', 'exclude': 'pre:GOC_2020', 'sar': 0},
+            'groups': (('speed', ['prm_inc']), ('nonneg', ['lrc_cl_ins'])), 'sheets': ['extraction_IDR'],
+            'layout': None}
+    results = [process_extraction_file({**task, 'file_path': str(path)})[0]
+               for path in (tmp_path / 'x' / 'RAFM_A.xlsx', tmp_path / 'c' / f'RAFM_A{ext}')]
+    assert results[0] == results[1]
+    assert results[0][0]['prm_inc'] == pytest.approx(1.23e10 + 1.5e-05)
+    assert results[0][1]['lrc_cl_ins'] == pytest.approx(-2.5e3 + 42.0)
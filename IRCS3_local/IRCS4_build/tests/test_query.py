@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('duckdb')
+openpyxl = pytest.importorskip('openpyxl')
+
+from syntax.query import QueryStore
+from syntax.run_config import RunConfig
+
+HEADER = ['goc', 'period', 'prm_inc', 'lrc_cl_ins']
+
+
+def _workbook(path, sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append(HEADER)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+def _config(tmp_path, jenis='trad'):
+    code = pd.DataFrame({'ARGO File Name': ['ARGO_A'], 'RAFM File Name': ['RAFM_A'], 'UVSG File Name': ['UVSG_A']})
+    empty = pd.DataFrame()
+    return RunConfig(input_excel=str(tmp_path / 'input.xlsx'), jenis=jenis, code=code, sign_logic=empty,
+                     control=empty, file_path=empty,
+                     paths={'rafm': str(tmp_path / 'rafm'), 'uvsg': str(tmp_path / 'uvsg')})
+
+
+def test_extract_and_sum_with_dirty_cells(tmp_path):
+    for source in ('rafm', 'uvsg'):
+        (tmp_path / source).mkdir()
+    # sheet IDR punya cell sampah, sheet USD bersih: tipe kolom harus tetap sama
+    _workbook(tmp_path / 'rafm' / 'RAFM_A.xlsx', {
+        'extraction_IDR': [['GOC_1', 13, 'x', 10.0], ['GOC_1', '14', '1.234,5', 'junk'], ['GOC_2', 5, 7.0, 1.0]],
+        'extraction_USD': [['GOC_1', 20, 100.0, 2.0], ['GOC_2', 30.0, 3.0, 4.0]],
+    })
+    _workbook(tmp_path / 'uvsg' / 'UVSG_A.xlsx', {'extraction_IDR': [['GOC_1', 1, 'n/a', 1.0]]})
+
+    store = QueryStore(root=str(tmp_path / 'query'), history_root=str(tmp_path / 'history'))
+    assert store.extract(_config(tmp_path)) == (2, 0)
+    assert store.extract(_config(tmp_path)) == (0, 2)
+
+    types = store.sql("SELECT typeof(prm_inc) t, typeof(period) p FROM extraction LIMIT 1").iloc[0]
+    assert (types['t'], types['p']) == ('DOUBLE', 'BIGINT')
+
+    totals = store.totals(['prm_inc', 'lrc_cl_ins'], by=('goc',), file='RAFM_A', period='>12')
+    assert totals['goc'].tolist() == ['GOC_1', 'GOC_2']
+    assert totals['prm_inc'].tolist() == pytest.approx([1334.5, 3.0])
+    assert totals['lrc_cl_ins'].tolist() == pytest.approx([12.0, 4.0])
+
+    nulls = store.sql("SELECT count(*) - count(prm_inc) AS n FROM extraction")['n'].iloc[0]
+    assert nulls == 2
@@ -0,0 +1,90 @@
+import datetime
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip('openpyxl')
+
+from syntax.xlsx_writer import load_sidecar, write_workbook
+
+SHEET_ORDER = ['Stale', 'Same', 'Changed']
+
+
+def _manual(path):
+    wb = openpyxl.Workbook()
+    wb.active.title = 'Notes'
+    wb.active['A1'] = 'manual'
+    wb.save(path)
+
+
+def _add_local_names(path, names):
+    """Tambah definedName lokal (nama sheet -> nama) ke workbook.xml output, seperti user di Excel"""
+    with zipfile.ZipFile(path) as src:
+        members = [(info, src.read(info.filename)) for info in src.infolist()]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as out:
+        for info, data in members:
+            if info.filename == 'xl/workbook.xml':
+                xml = data.decode('utf-8')
+                sheets = re.findall(r'<sheet\b[^>]*name="([^"]+)"', xml)
+                items = ''.join(f'<definedName name="{name}" localSheetId="{sheets.index(sheet)}">'
+                                f"'{sheet}'!$A$1:$B$3</definedName>" for sheet, name in names.items())
+                xml = re.sub(r'<definedNames\s*/>|</?definedNames>', '', xml)
+                xml = xml.replace('</sheets>', f'</sheets><definedNames>{items}</definedNames>', 1)
+                data = xml.encode('utf-8')
+            out.writestr(info, data)
+
+
+def _part(path, sheet):
+    part = load_sidecar(path)['sheets'][sheet]['part']
+    with zipfile.ZipFile(path) as z:
+        info = z.getinfo(part)
+        return info.CRC, info.compress_size, z.read(part)
+
+
+def test_incremental_round_trip(tmp_path):
+    manual, output = str(tmp_path / 'manual.xlsx'), str(tmp_path / 'out.xlsx')
+    _manual(manual)
+    same = pd.DataFrame({'ARGO File Name': ['A', 'B'], 'prm_inc': [1.5, -2.0]})
+    result = {'Stale': pd.DataFrame({'x': [1]}), 'Same': same,
+              'Changed': pd.DataFrame({'ARGO File Name': ['A'], 'prm_inc': [10.0]})}
+    write_workbook(manual, result, output, 'trad', SHEET_ORDER)
+    _add_local_names(output, {'Stale': 'stale_area', 'Same': 'same_area'})
+    before = _part(output, 'Same')
+
+    result = {'Same': same.copy(), 'Changed': pd.DataFrame({'ARGO File Name': ['A'], 'prm_inc': [20.0]})}
+    assert write_workbook(manual, result, output, 'trad', SHEET_ORDER, previous=output) == ['Changed']
+
+    assert _part(output, 'Same') == before
+    assert set(load_sidecar(output)['sheets']) == {'Same', 'Changed'}
+    wb = openpyxl.load_workbook(output)
+    assert wb.sheetnames == ['Same', 'Changed', 'Notes']
+    assert wb['Changed']['B2'].value == 20.0
+    assert wb['Notes']['A1'].value == 'manual'
+    # nama lokal sheet stale ikut dibuang, nama lokal sheet lain pindah ke index barunya
+    assert 'same_area' in wb['Same'].defined_names
+    with zipfile.ZipFile(output) as z:
+        workbook_xml = z.read('xl/workbook.xml').decode('utf-8')
+    assert 'stale_area' not in workbook_xml and "'Stale'" not in workbook_xml
+
+    # tanpa perubahan: output lama tidak disentuh
+    assert write_workbook(manual, result, output, 'trad', SHEET_ORDER, previous=output) == []
+
+
+def test_date_cells_are_serial_numbers(tmp_path):
+    manual, output = str(tmp_path / 'manual.xlsx'), str(tmp_path / 'out.xlsx')
+    _manual(manual)
+    df = pd.DataFrame({'Val Date': pd.to_datetime(['2025-03-31', None]),
+                       'Mixed': [datetime.datetime(2025, 6, 30, 12, 0), 'x']})
+    write_workbook(manual, {'Dates': df}, output, 'trad', ['Dates'])
+    with zipfile.ZipFile(output) as z:
+        sheet_xml = z.read(load_sidecar(output)['sheets']['Dates']['part']).decode('utf-8')
+    assert '<v>45747.0</v>' in sheet_xml and '<v>45838.5</v>' in sheet_xml
+    assert 't="inlineStr"><is><t>2025' not in sheet_xml
+
+    ws = openpyxl.load_workbook(output)['Dates']
+    assert ws['A2'].value == datetime.datetime(2025, 3, 31)
+    assert ws['A2'].number_format == 'yyyy-mm-dd'
+    assert ws['B2'].value == datetime.datetime(2025, 6, 30, 12, 0)
+    assert ws['B2'].number_format == 'yyyy-mm-dd hh:mm:ss'
@@ -4,6 +4,8 @@ from xlsxwriter.utility import xl_col_to_name
 import syntax.control_4_trad as trad
 import syntax.control_4_ul as ul
 import syntax.control_4_reas as reas
+from syntax.scheduler import BatchScheduler
+from syntax.run_config import load_run_config
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import time
 from functools import lru_cache
@@ -168,38 +170,32 @@ def replace_rafm_output_manual_with_linked_sheet(src_path, dest_path, sheet_name
     except Exception as e:
         print(f"⚠️ Gagal mengganti RAFM Output Manual: {e}")
 
-def process_input_file(file_path):
+def compute_input_file(file_path, scheduler=None):
+    try:
+        config = load_run_config(file_path)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
+    params = {"input excel": file_path, "config": config, "scheduler": scheduler}
+    modules = {'trad': trad, 'ul': ul, 'reas': reas}
+    return config.jenis, modules[config.jenis].main(params), config
+
+
+def process_input_file(file_path, scheduler=None, computed=None):
     filename = os.path.basename(file_path).lower()
-    if 'trad' in filename:
-        jenis = 'trad'
-        result = trad.main({"input excel": file_path})
-    elif 'ul' in filename:
-        jenis = 'ul'
-        result = ul.main({"input excel": file_path})
-    elif 'reas' in filename:
-        jenis = 'reas'
-        result = reas.main({"input excel": file_path})
-    else:
-        print(f"❌ Jenis file tidak dikenali: {filename}")
+    if computed is None:
+        computed = compute_input_file(file_path, scheduler)
+    if computed is None:
         return
+    jenis, result, config = computed
 
     print(f"\n📄 Memproses: {filename} (jenis: {jenis})")
-    try:
-        df = pd.read_excel(file_path, sheet_name='File Path')
-    except Exception as e:
-        print(f"⚠️ Tidak bisa membaca sheet 'File Path': {e}")
-        return
-
-    df.columns = df.columns.str.strip()
-    df['Name'] = df['Name'].astype(str).str.strip().str.lower()
-    df['File Path'] = df['File Path'].astype(str).str.strip()
-
-    if 'output_path' not in df['Name'].values or 'output_filename' not in df['Name'].values:
+    if not config.output_path or not config.output_filename:
         print(f"⚠️ output_path atau output_filename tidak ditemukan di sheet 'File Path'")
         return
 
-    output_path = df.loc[df['Name']=='output_path','File Path'].values[0]
-    output_filename = df.loc[df['Name']=='output_filename','File Path'].values[0]
+    output_path = config.output_path
+    output_filename = config.output_filename
     os.makedirs(output_path, exist_ok=True)
     output_file = os.path.join(output_path, output_filename)
 
@@ -230,8 +226,8 @@ def process_input_file(file_path):
 
     # -------- Ganti RAFM Output Manual langsung pakai xlwings --------
     try:
-        rafm_manual_path = df.loc[df['Name']=='rafm manual','File Path'].values[0]
-        if os.path.exists(rafm_manual_path):
+        rafm_manual_path = config.rafm_manual
+        if rafm_manual_path and os.path.exists(rafm_manual_path):
             replace_rafm_output_manual_with_linked_sheet(
                 src_path=rafm_manual_path,
                 dest_path=output_file,
@@ -246,7 +242,7 @@ def process_input_file(file_path):
 
 def main(input_path):
     import time
-    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures import ThreadPoolExecutor
 
     start_time = time.time()
 
@@ -269,19 +265,20 @@ def main(input_path):
 
     print(f"🔧 Memproses {len(files)} file...\n")
 
-    # Proses file tunggal
-    if len(files) == 1:
-        process_input_file(files[0])
-    else:
-        # Proses paralel
-        optimal_workers = min(os.cpu_count() or 4, len(files))
-        with ProcessPoolExecutor(max_workers=optimal_workers) as executor:
-            futures = [executor.submit(process_input_file, f) for f in files]
-            for future in as_completed(futures):
-                try:
-                    future.result()
-                except Exception as e:
-                    print(f"❌ Error saat memproses file: {e}")
+    # Satu worker budget global: file task dari semua input masuk ke satu pool bersama,
+    # input-level hanya thread (tidak ada pool bersarang)
+    with BatchScheduler() as scheduler:
+        if len(files) == 1:
+            process_input_file(files[0], scheduler)
+        else:
+            # Compute paralel per input, penulisan output tetap serial (xlwings)
+            with ThreadPoolExecutor(max_workers=len(files)) as executor:
+                futures = {f: executor.submit(compute_input_file, f, scheduler) for f in files}
+                for f, future in futures.items():
+                    try:
+                        process_input_file(f, computed=future.result())
+                    except Exception as e:
+                        print(f"❌ Error saat memproses file: {e}")
 
     end_time = time.time()
     print(f"\n⏲️ Total waktu proses: {end_time - start_time:.2f} detik")
\ No newline at end of file